@@ -0,0 +1,153 @@
+"""
+M1 행정동(dong) / 시간대 요약 큐브
+
+24개 시간대의 병합 결과(frame)로 한 번만 계산해 두고, 요약/상위 K개 도로 조회는
+미리 만든 dict를 그대로 반환합니다. (요청 시 원본 행 접근 없음)
+
+- 도로 단위 집계: 조각(segment)으로 나뉜 도로도 1개로 셉니다. (unique_road_id 기준)
+- 동 정보가 없는 도로는 UNKNOWN_DONG으로 묶습니다.
+"""
+import numpy as np
+
+HOURS = 24
+TOP_K = 50          # 미리 정렬해 두는 (동, 시간대)별 상위 도로 수 (top 조회 k의 최대값)
+UNKNOWN_DONG = "미상"
+
+
+class RiskCube:
+    """
+    (동, 시간대) 별 등급별 도로 수, 평균/최대 점수, 위험도 상위 도로 목록
+
+    frames: {hour: service.HourRisk}
+    risk_codes: 점수 배열 -> 등급 코드 배열 함수 (service.risk_codes)
+    """
+
+    def __init__(self, frames: dict, risk_codes, level_names, top_k: int = TOP_K):
+        self.level_names = list(level_names)
+        self.top_k = top_k
+        roads = {hour: self._road_rows(frame) for hour, frame in frames.items()}
+
+        labels = {dong for rows in roads.values() for dong in rows["dong"]}
+        self.dongs = sorted(labels)
+        dong_pos = {dong: i for i, dong in enumerate(self.dongs)}
+        shape = (len(self.dongs), HOURS)
+
+        counts = np.zeros(shape + (len(self.level_names),), dtype=np.int64)
+        sums = np.zeros(shape)
+        maxes = np.full(shape, np.nan)
+        self._top = {}
+
+        for hour, rows in roads.items():
+            d = np.array([dong_pos[dong] for dong in rows["dong"]], dtype=np.int64)
+            scores = rows["score"]
+            codes = np.asarray(risk_codes(scores), dtype=np.int64)
+            np.add.at(counts, (d, hour, codes), 1)
+            np.add.at(sums, (d, hour), scores)
+            np.fmax.at(maxes, (d, hour), scores)
+
+            # 점수 내림차순 (같은 점수는 unique_road_id 오름차순)
+            order = np.lexsort((rows["road_id"], -scores))
+            items = [
+                {
+                    "unique_road_id": int(rows["road_id"][i]),
+                    "name": rows["name"][i],
+                    "dong": rows["dong"][i],
+                    "risk_score": float(scores[i]),
+                    "risk_level": self.level_names[codes[i]],
+                }
+                for i in order.tolist()
+            ]
+            self._top[(None, hour)] = items[:top_k]
+            for dong in self.dongs:
+                self._top[(dong, hour)] = [item for item in items if item["dong"] == dong][:top_k]
+
+        # 요약 dict (동 전체 합계는 dong=None)
+        total_max = np.fmax.reduce(maxes, axis=0) if len(self.dongs) else np.full(HOURS, np.nan)
+        self._summary = {}
+        for hour in range(HOURS):
+            for i, dong in enumerate(self.dongs):
+                self._summary[(dong, hour)] = self._summarize(dong, hour, counts[i, hour], sums[i, hour], maxes[i, hour])
+            self._summary[(None, hour)] = self._summarize(
+                None, hour, counts[:, hour].sum(axis=0), sums[:, hour].sum(), total_max[hour],
+            )
+        self._by_hour = {
+            hour: [self._summary[(dong, hour)] for dong in self.dongs] for hour in range(HOURS)
+        }
+        self._by_dong = {
+            dong: [self._summary[(dong, hour)] for hour in range(HOURS)] for dong in [None, *self.dongs]
+        }
+
+    @staticmethod
+    def _road_rows(frame) -> dict:
+        """frame의 조각 행을 도로(unique_road_id)당 1행으로 줄입니다."""
+        _, first = np.unique(frame.road_ids, return_index=True)
+        first = np.sort(first)
+        dongs = frame.dongs if frame.dongs is not None else [None] * len(frame)
+        return {
+            "road_id": np.asarray(frame.road_ids)[first],
+            "name": [frame.names[i] for i in first.tolist()],
+            "dong": [dongs[i] or UNKNOWN_DONG for i in first.tolist()],
+            "score": np.asarray(frame.scores, dtype=np.float64)[first],
+        }
+
+    def _summarize(self, dong, hour, counts, total, max_score) -> dict:
+        road_count = int(counts.sum())
+        return {
+            "dong": dong,
+            "hour": hour,
+            "road_count": road_count,
+            "level_counts": dict(zip(self.level_names, counts.tolist())),
+            "mean_score": round(float(total) / road_count, 6) if road_count else None,
+            "max_score": float(max_score) if road_count else None,
+        }
+
+    def has_dong(self, dong) -> bool:
+        return dong is None or dong in self._by_dong
+
+    def summary(self, dong=None, hour=None):
+        """
+        - dong, hour 모두 지정: 해당 (동, 시간대) 요약 1개
+        - hour만 지정: 해당 시간대의 동별 요약 리스트
+        - dong만 지정 / 둘 다 생략: 해당 동(생략 시 전체)의 24개 시간대 요약 리스트
+        """
+        if hour is not None and dong is not None:
+            return self._summary.get((dong, hour))
+        if hour is not None:
+            return self._by_hour[hour]
+        return self._by_dong.get(dong)
+
+    def top(self, hour: int, dong=None, k: int = 10) -> list:
+        """(동, 시간대)의 위험도 상위 k개 도로 (dong 생략 시 전체)"""
+        return self._top.get((dong, hour), [])[:k]
+
+
+def road_scores(frame):
+    """frame의 조각 행을 도로 단위 (unique_road_id 오름차순, 점수) 배열로 줄입니다."""
+    road_ids, first = np.unique(np.asarray(frame.road_ids), return_index=True)
+    return road_ids, np.asarray(frame.scores, dtype=np.float64)[first]
+
+def diff_hours(before, after, risk_codes, level_names) -> dict:
+    """
+    두 시간대 frame 사이에서 점수나 등급이 바뀐 도로만 골라 after 값으로 반환합니다.
+    - after에만 있는 도로는 변경으로 포함, before에만 있는 도로는 removed로 반환
+    """
+    ids_a, scores_a = road_scores(before)
+    ids_b, scores_b = road_scores(after)
+    codes_b = np.asarray(risk_codes(scores_b))
+
+    pos = np.minimum(np.searchsorted(ids_a, ids_b), max(len(ids_a) - 1, 0))
+    present = (ids_a[pos] == ids_b) if len(ids_a) else np.zeros(len(ids_b), dtype=bool)
+    prev_scores = scores_a[pos] if len(ids_a) else np.zeros(len(ids_b))
+    changed = ~present | (prev_scores != scores_b) | (np.asarray(risk_codes(prev_scores)) != codes_b)
+
+    return {
+        "from": before.hour,
+        "to": after.hour,
+        "count": int(changed.sum()),
+        "total": len(ids_b),
+        "level_names": list(level_names),
+        "unique_road_id": ids_b[changed].tolist(),
+        "risk_score": scores_b[changed].tolist(),
+        "risk_level": codes_b[changed].tolist(),
+        "removed": np.setdiff1d(ids_a, ids_b).tolist(),
+    }
@@ -0,0 +1,285 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+HOURS = range(24)
+# 시간대별로 보관하는 응답 형식(variant) 수 (단순화 단계 5 x geojson/compact = 10개 + 여유)
+MAX_VARIANTS = 16
+# MVT 타일 캐시 전체 크기 상한 (bytes)
+MAX_TILE_BYTES = 64 * 1024 * 1024
+
+
+class _Entry:
+    __slots__ = ("frame", "bodies")
+
+    def __init__(self, frame):
+        self.frame = frame
+        # 응답 형식(variant)별 인코딩 결과 (예: 좌표 단순화 단계), 최근 사용 순서 (LRU)
+        self.bodies: "OrderedDict[Any, bytes]" = OrderedDict()
+
+
+class RiskCache:
+    """
+    시간대별 /m1/risk 데이터를 보관하는 인메모리 캐시입니다.
+
+    - 키: (hour, data_version)
+    - 값: 병합 결과(frame)와 최종 인코딩된 응답 본문(bytes)
+      (캐시 히트 시 DB 조회/병합/Pydantic 검증을 모두 건너뜀)
+    - 응답 본문은 시간대마다 최근 사용한 max_variants개만 보관합니다.
+    - COM_Location 데이터가 갱신되면 invalidate() 또는 refresh()로 버전을 올립니다.
+    - 여러 시간대를 합쳐 만든 결과(예: 24시간 timeline)는 get_derived()로 보관하며
+      어느 시간대든 무효화되면 함께 비웁니다.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[int], Any],
+        renderer: Callable[[Any, Any], bytes],
+        bulk_loader: Optional[Callable[[List[int]], Dict[int, Any]]] = None,
+        max_variants: int = MAX_VARIANTS,
+        on_invalidate: Optional[Callable[[], Any]] = None,
+    ):
+        # loader(hour) -> frame (데이터가 없거나 실패하면 None)
+        # renderer(frame, variant) -> 응답 bytes (variant별 최초 요청 시 1회만 생성)
+        # bulk_loader(hours) -> {hour: frame} (여러 시간대를 한 번의 조회로 생성, refresh에서 사용)
+        # on_invalidate() -> 무효화 직후 호출 (이전 버전으로 만든 디스크 파일 정리 등, 요청 처리 밖에서 실행)
+        self._loader = loader
+        self._renderer = renderer
+        self._bulk_loader = bulk_loader
+        self._on_invalidate = on_invalidate
+        self.max_variants = max_variants
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[int, int], _Entry] = {}
+        self._derived: Dict[Tuple[Any, int], Any] = {}
+        self.version = 1
+        self.hits = 0
+        self.misses = 0
+        self.last_refresh: Optional[float] = None
+        self._generation = 0    # invalidate 횟수 (시간대 단위 무효화 포함)
+
+    def _entry(self, hour: int) -> Optional[_Entry]:
+        with self._lock:
+            version = self.version
+            entry = self._entries.get((hour, version))
+            if entry is not None:
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        frame = self._loader(hour)
+        # 빈 결과(DB 오류 등)는 캐시하지 않음 -> 다음 요청에서 재시도
+        if frame is None:
+            return None
+        entry = _Entry(frame)
+        with self._lock:
+            # 빌드 도중 invalidate 되었으면 이전 버전 결과는 저장하지 않음
+            if version == self.version:
+                entry = self._entries.setdefault((hour, version), entry)
+        return entry
+
+    def get_frame(self, hour: int):
+        """캐시된 병합 결과(frame)를 반환하고, 없으면 새로 만들어 저장합니다."""
+        entry = self._entry(hour)
+        return entry.frame if entry is not None else None
+
+    def get(self, hour: int, variant: Any = 0, renderer: Optional[Callable[[Any, Any], bytes]] = None) -> Optional[bytes]:
+        """
+        캐시된 응답 본문을 반환하고, 없으면 새로 만들어 저장합니다.
+        renderer를 지정하면 기본 renderer 대신 사용합니다. (예: MVT 타일)
+        """
+        entry = self._entry(hour)
+        if entry is None:
+            return None
+        with self._lock:
+            body = entry.bodies.get(variant)
+            if body is not None:
+                entry.bodies.move_to_end(variant)
+                return body
+
+        body = (renderer or self._renderer)(entry.frame, variant)
+        with self._lock:
+            self._store(entry, variant, body)
+        return body
+
+    def _store(self, entry: _Entry, variant: Any, body: bytes):
+        # 공유 중인 entry는 self._lock 안에서 호출
+        entry.bodies[variant] = body
+        entry.bodies.move_to_end(variant)
+        while len(entry.bodies) > self.max_variants:
+            entry.bodies.popitem(last=False)
+
+    def get_derived(self, key: Any, builder: Callable[[], Any]) -> Any:
+        """
+        여러 시간대 frame으로 만든 결과를 key별로 보관합니다. (builder는 get_frame으로 frame을 조회)
+        None은 캐시하지 않습니다.
+        """
+        with self._lock:
+            version = self.version
+            generation = self._generation
+            value = self._derived.get((key, version))
+        if value is not None:
+            return value
+
+        value = builder()
+        if value is not None:
+            with self._lock:
+                # 빌드 도중 무효화되었으면 저장하지 않음
+                if version == self.version and generation == self._generation:
+                    self._derived[(key, version)] = value
+        return value
+
+    def stamp(self) -> Tuple[int, int]:
+        """(데이터 버전, 무효화 횟수): 시간대 단위 무효화까지 반영한 캐시 상태 식별값"""
+        with self._lock:
+            return self.version, self._generation
+
+    def invalidate(self, hour: Optional[int] = None):
+        """hour 지정 시 해당 시간대만, 아니면 데이터 버전을 올려 전체를 무효화합니다."""
+        with self._lock:
+            self._derived.clear()
+            self._generation += 1
+            if hour is None:
+                self.version += 1
+                self._entries.clear()
+            else:
+                self._entries.pop((hour, self.version), None)
+        if self._on_invalidate is not None:
+            self._on_invalidate()
+
+    def refresh(self, hours: Iterable[int] = HOURS, render: bool = True) -> int:
+        """
+        전체 무효화 후 지정한 시간대를 미리 생성(warm-up)합니다. 생성된 시간대 수를 반환.
+        render=False 이면 frame만 만들고 응답 본문은 첫 요청 시 생성합니다.
+        """
+        hours = list(hours)
+        self.invalidate()
+        with self._lock:
+            version, generation = self.version, self._generation
+        if self._bulk_loader is not None:
+            frames = self._bulk_loader(hours)
+        else:
+            frames = {hour: self._loader(hour) for hour in hours}
+
+        entries = {}
+        for hour, frame in frames.items():
+            if frame is None:
+                continue
+            entry = _Entry(frame)
+            if render:
+                self._store(entry, 0, self._renderer(frame, 0))
+            entries[hour] = entry
+
+        with self._lock:
+            # 조회 도중 무효화/다른 갱신이 있었으면 이전 데이터로 만든 결과는 저장하지 않음
+            if version != self.version or generation != self._generation:
+                return 0
+            for hour, entry in entries.items():
+                self._entries[(hour, version)] = entry
+        self.last_refresh = time.time()
+        return len(entries)
+
+    def rebuild(self, transform: Callable[[Any], Any]) -> int:
+        """
+        캐시된 frame을 transform(frame)으로 바꿔 새 데이터 버전으로 게시합니다. (loader 재조회 없음, 예: 가중치 재계산)
+        캐시에 없는 시간대와 응답 본문은 이후 요청 때 생성합니다. 바꾼 시간대 수를 반환합니다.
+        """
+        with self._lock:
+            version, generation = self.version, self._generation
+            frames = {hour: entry.frame for (hour, v), entry in self._entries.items() if v == version}
+
+        entries = {}
+        for hour, frame in frames.items():
+            frame = transform(frame)
+            if frame is not None:
+                entries[hour] = _Entry(frame)
+
+        with self._lock:
+            # 변환 도중 무효화/갱신되었으면 이전 데이터로 만든 결과는 버리고 전체 무효화만 수행
+            if version != self.version or generation != self._generation:
+                entries = {}
+            self._derived.clear()
+            self._generation += 1
+            self.version += 1
+            self._entries = {(hour, self.version): entry for hour, entry in entries.items()}
+        if self._on_invalidate is not None:
+            self._on_invalidate()
+        return len(entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "version": self.version,
+                "cached_hours": sorted(h for h, v in self._entries if v == self.version),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "bytes": sum(len(b) for e in self._entries.values() for b in e.bodies.values())
+                + sum(len(v) for v in self._derived.values() if isinstance(v, bytes)),
+                "last_refresh": self.last_refresh,
+            }
+
+
+class TileCache:
+    """
+    MVT 타일 전용 LRU 캐시입니다. (RiskCache의 시간대별 응답과 분리)
+
+    - 키: (hour, z, x, y), 보관한 타일 전체 크기가 max_bytes를 넘으면 오래된 타일부터 제거
+    - stamp()(RiskCache.stamp) 값이 바뀌면 (데이터 갱신/무효화) 보관한 타일을 모두 비웁니다.
+    - 빈 타일(builder가 None 또는 b"" 반환)은 보관하지 않습니다.
+    """
+
+    def __init__(self, stamp: Callable[[], Any], max_bytes: int = MAX_TILE_BYTES):
+        self._stamp_fn = stamp
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._tiles: "OrderedDict[Any, bytes]" = OrderedDict()
+        self._stamp = None
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _reset(self, stamp):
+        # self._lock 안에서 호출
+        if stamp != self._stamp:
+            self._tiles.clear()
+            self.bytes = 0
+            self._stamp = stamp
+
+    def get(self, key: Any, builder: Callable[[], Optional[bytes]]) -> Optional[bytes]:
+        """캐시된 타일을 반환하고, 없으면 builder()로 만들어 저장합니다. 빈 타일은 None."""
+        with self._lock:
+            stamp = self._stamp_fn()
+            self._reset(stamp)
+            tile = self._tiles.get(key)
+            if tile is not None:
+                self._tiles.move_to_end(key)
+                self.hits += 1
+                return tile
+            self.misses += 1
+
+        tile = builder()
+        if not tile:
+            return None
+        with self._lock:
+            # 빌드 도중 무효화되었으면 저장하지 않음
+            if stamp == self._stamp_fn() and stamp == self._stamp and len(tile) <= self.max_bytes:
+                previous = self._tiles.pop(key, None)
+                if previous is not None:
+                    self.bytes -= len(previous)
+                self._tiles[key] = tile
+                self.bytes += len(tile)
+                while self.bytes > self.max_bytes:
+                    _, evicted = self._tiles.popitem(last=False)
+                    self.bytes -= len(evicted)
+        return tile
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "tiles": len(self._tiles),
+                "tile_bytes": self.bytes,
+                "tile_hits": self.hits,
+                "tile_misses": self.misses,
+            }
@@ -0,0 +1,119 @@
+"""
+M1 compact 응답 형식 (/m1/risk?format=compact)
+
+좌표는 고정 소수점(precision 자리)으로 양자화한 뒤 Google Encoded Polyline으로
+delta 인코딩하고, 도로 속성은 feature 객체 대신 병렬 배열로 보냅니다.
+같은 geometry를 공유하는 행은 geometry를 한 번만 보냅니다. (형식 설명: m1/README.md)
+"""
+import numpy as np
+import shapely
+
+COMPACT_FORMAT = "compact-v1"
+TIMELINE_FORMAT = "timeline-v1"
+PRECISION = 6   # 1e-6도 ≈ 0.1m
+
+def _encode_values(values) -> str:
+    """zigzag + 5bit 청크 인코딩 (Google Encoded Polyline)"""
+    chars = []
+    for value in values:
+        value = ~(value << 1) if value < 0 else (value << 1)
+        while value >= 0x20:
+            chars.append(chr((0x20 | (value & 0x1F)) + 63))
+            value >>= 5
+        chars.append(chr(value + 63))
+    return "".join(chars)
+
+def _encode_lines(geoms, precision: int) -> list:
+    """
+    LineString 배열 -> encoded polyline 문자열 리스트
+    좌표 양자화와 delta 계산은 전체 좌표에 대해 한 번에 수행합니다.
+    """
+    coords, owner = shapely.get_coordinates(geoms, return_index=True)
+    # polyline 규약: (lat, lng) 순서
+    quantized = np.rint(coords[:, ::-1] * 10 ** precision).astype(np.int64)
+    deltas = np.diff(quantized, axis=0, prepend=[[0, 0]])
+    # geometry가 바뀌는 지점은 원점 기준 값으로 다시 시작
+    starts = np.flatnonzero(np.diff(owner, prepend=-1))
+    deltas[starts] = quantized[starts]
+
+    bounds = np.searchsorted(owner, np.arange(len(geoms) + 1)).tolist()
+    values = deltas.ravel().tolist()
+    return [_encode_values(values[2 * a:2 * b]) for a, b in zip(bounds[:-1], bounds[1:])]
+
+def encode_polylines(geoms, precision: int = PRECISION) -> list:
+    """
+    LineString 배열을 encoded polyline 문자열 리스트로 변환합니다.
+    MultiLineString은 조각별 polyline 문자열의 리스트가 됩니다.
+    """
+    geoms = np.asarray(geoms, dtype=object)
+    parts, part_owner = shapely.get_parts(geoms, return_index=True)
+    encoded = _encode_lines(parts, precision)
+
+    results = [""] * len(geoms)
+    for i in np.flatnonzero(shapely.get_type_id(geoms) == 5).tolist():
+        results[i] = []
+    for i, text in zip(part_owner.tolist(), encoded):
+        if isinstance(results[i], list):
+            results[i].append(text)
+        else:
+            results[i] = text
+    return results
+
+def decode_polyline(text: str, precision: int = PRECISION) -> list:
+    """encoded polyline -> [[lng, lat], ...] (GeoJSON 좌표 순서)"""
+    values, value, shift = [], 0, 0
+    for ch in text:
+        chunk = ord(ch) - 63
+        value |= (chunk & 0x1F) << shift
+        shift += 5
+        if chunk < 0x20:
+            values.append(~(value >> 1) if value & 1 else value >> 1)
+            value, shift = 0, 0
+    points = np.cumsum(np.asarray(values, dtype=np.int64).reshape(-1, 2), axis=0) / 10 ** precision
+    return points[:, ::-1].tolist()
+
+def build_compact(frame, level_codes, level_names, polylines) -> dict:
+    """
+    병합 결과(frame)를 compact 응답 dict로 변환합니다.
+    polylines는 geometry 인덱스별 encoded polyline 리스트입니다.
+    """
+    geom_idx = np.asarray(frame.geom_idx)
+    # 응답에 포함된 geometry만 순서대로 모으고, 행마다 그 위치를 기록
+    unique_geoms, geometry_index = np.unique(geom_idx, return_inverse=True)
+    return {
+        "format": COMPACT_FORMAT,
+        "hour": frame.hour,
+        "count": len(frame),
+        "precision": PRECISION,
+        "level_names": list(level_names),
+        "unique_road_id": frame.road_ids.tolist(),
+        "name": list(frame.names),
+        "risk_score": frame.scores.tolist(),
+        "risk_level": np.asarray(level_codes).tolist(),
+        "geometry_index": geometry_index.tolist(),
+        "geometries": [polylines[i] for i in unique_geoms.tolist()],
+    }
+
+def build_timeline(hours, road_ids, names, segment_road, segment_geom, scores, level_codes, level_names, polylines) -> dict:
+    """
+    시간대별 병합 결과를 합친 timeline 응답 dict를 만듭니다.
+    - road_ids/names: 도로 목록 (행렬의 열)
+    - segment_road/segment_geom: 지도에 그릴 조각별 도로 위치와 geometry 인덱스
+    - scores/level_codes: (시간대, 도로) 행렬, NaN(해당 시간대 데이터 없음)은 null / 등급 -1
+    """
+    unique_geoms, geometry_index = np.unique(np.asarray(segment_geom), return_inverse=True)
+    missing = np.isnan(scores)
+    return {
+        "format": TIMELINE_FORMAT,
+        "hours": list(hours),
+        "count": len(road_ids),
+        "precision": PRECISION,
+        "level_names": list(level_names),
+        "unique_road_id": np.asarray(road_ids).tolist(),
+        "name": list(names),
+        "segment_road": np.asarray(segment_road).tolist(),
+        "segment_geometry": geometry_index.tolist(),
+        "geometries": [polylines[i] for i in unique_geoms.tolist()],
+        "risk_score": np.where(missing, None, scores.astype(object)).tolist(),
+        "risk_level": np.where(missing, -1, level_codes).tolist(),
+    }
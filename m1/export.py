@@ -0,0 +1,167 @@
+"""
+M1 대량 내보내기 (FlatGeobuf / GeoPackage)
+
+캐시된 시간대별 병합 결과(도로 조각 1행 = 시간대, 도로, geometry)를 한 파일로 저장합니다.
+파일 이름에 데이터 해시(점수/도로/geometry)를 넣어 데이터 버전마다 한 번만 생성하고,
+같은 버전의 요청은 디스크에 저장된 파일을 그대로 반환합니다.
+파일은 전체 시간대 또는 한 시간대 단위로만 만들고 (시간대 조합 25개 x 형식 2개),
+이전 버전 파일은 요청 처리 중이 아니라 데이터 버전이 바뀔 때(prune_exports) 정리합니다.
+
+- fgb : FlatGeobuf (packed Hilbert R-tree 공간 인덱스 포함 -> HTTP range 요청으로 필요한 영역만 읽기 가능)
+- gpkg: GeoPackage (SQLite R-tree 공간 인덱스 포함)
+
+    M1_EXPORT_DIR   저장 위치 (기본: m1/data/export)
+"""
+import os
+import re
+import hashlib
+import threading
+import numpy as np
+import geopandas as gpd
+import shapely
+
+from .loader import DATA_DIR
+
+# format -> (OGR 드라이버, 확장자, media type)
+EXPORT_FORMATS = {
+    "fgb": ("FlatGeobuf", ".fgb", "application/flatgeobuf"),
+    "gpkg": ("GPKG", ".gpkg", "application/geopackage+sqlite3"),
+}
+LAYER_NAME = "road_risk"
+VERSION_LENGTH = 16
+# 데이터 버전이 바뀔 때 시간대 조합/형식별로 남겨 두는 파일 수 (직전 버전 파일은 다운로드 중일 수 있음)
+KEEP_VERSIONS = 1
+_EXPORT_NAME = re.compile(rf"^({LAYER_NAME}_(?:all|h\d+))_[0-9a-f]{{{VERSION_LENGTH}}}(\.\w+)$")
+
+_write_lock = threading.Lock()
+
+def get_export_dir():
+    return os.getenv("M1_EXPORT_DIR", os.path.join(DATA_DIR, "export"))
+
+def parse_hours(value, hours=range(24)) -> list:
+    """
+    내보낼 시간대 문자열을 정렬된 리스트로 변환합니다. 전체 또는 한 시간대만 허용합니다. (디스크 파일 수 제한)
+    - 생략 / "all" / "0-23": 전체 시간대
+    - "7": 7시만
+    여러 시간대가 필요하면 전체 파일을 hour 컬럼으로 필터링합니다.
+    """
+    if value is None or not value.strip() or value.strip() == "all":
+        return list(hours)
+    selected = set()
+    try:
+        for part in (p.strip() for p in value.split(",") if p.strip()):
+            start, _, stop = part.partition("-")
+            start = int(start)
+            stop = int(stop) if stop else start
+            if start > stop:
+                raise ValueError
+            selected.update(range(start, stop + 1))
+    except ValueError:
+        raise ValueError("hours must be 'all' or a single hour (e.g. 7)")
+    if not selected or not selected <= set(hours):
+        raise ValueError(f"hours must be within {min(hours)}-{max(hours)}")
+    if len(selected) != 1 and selected != set(hours):
+        raise ValueError("hours must be 'all' or a single hour; filter the all-hours file by the hour column")
+    return sorted(selected)
+
+def _hours_label(hours) -> str:
+    # 파일은 전체(데이터가 없는 시간대 제외) 또는 한 시간대 단위 -> 파일 이름 키는 최대 25개
+    hours = list(hours)
+    return f"h{hours[0]}" if len(hours) == 1 else "all"
+
+def data_version(frames: dict, geoms) -> str:
+    """
+    내보낼 데이터의 내용 해시 (frames: {hour: service.HourRisk}, geoms: geometry 배열)
+    캐시가 갱신되어도 내용이 같으면 같은 값이므로 기존 파일을 다시 사용합니다.
+    """
+    h = hashlib.sha1()
+    for hour in sorted(frames):
+        frame = frames[hour]
+        h.update(np.int64(hour).tobytes())
+        for values in (frame.road_ids, frame.scores, frame.geom_idx):
+            h.update(np.ascontiguousarray(values).tobytes())
+        h.update("\x1f".join(str(v) for v in frame.names).encode("utf-8"))
+        if frame.dongs is not None:
+            h.update("\x1f".join(str(v) for v in frame.dongs).encode("utf-8"))
+    used = np.unique(np.concatenate([frames[hour].geom_idx for hour in frames]))
+    h.update(used.astype(np.int64).tobytes())
+    for wkb in shapely.to_wkb(geoms[used]):
+        h.update(wkb)
+    return h.hexdigest()[:VERSION_LENGTH]
+
+def build_export_frame(frames: dict, geoms, level_names_of) -> gpd.GeoDataFrame:
+    """
+    시간대별 병합 결과를 하나의 GeoDataFrame(EPSG:4326)으로 합칩니다.
+    level_names_of: 점수 배열 -> 등급 이름 배열 함수 (service.classify_risk)
+    """
+    hours = sorted(frames)
+    scores = np.concatenate([frames[h].scores for h in hours]).astype(np.float64)
+    geom_idx = np.concatenate([frames[h].geom_idx for h in hours])
+    return gpd.GeoDataFrame(
+        {
+            "hour": np.repeat(np.asarray(hours, dtype=np.int32), [len(frames[h]) for h in hours]),
+            "unique_road_id": np.concatenate([frames[h].road_ids for h in hours]).astype(np.int64),
+            "name": [name for h in hours for name in frames[h].names],
+            "dong": [dong for h in hours for dong in (frames[h].dongs or [None] * len(frames[h]))],
+            "risk_score": scores,
+            "risk_level": np.asarray(level_names_of(scores)).tolist(),
+        },
+        geometry=np.asarray(geoms, dtype=object)[geom_idx],
+        crs="EPSG:4326",
+    )
+
+def export_file(frames: dict, geoms, fmt: str, level_names_of, out_dir=None) -> str:
+    """
+    frames(전체 또는 한 시간대)를 fmt 형식 파일로 저장하고 경로를 반환합니다.
+    같은 데이터 버전의 파일이 있으면 그대로 반환합니다. (이전 버전 파일은 prune_exports에서 정리)
+    """
+    driver, ext, _ = EXPORT_FORMATS[fmt]
+    out_dir = out_dir or get_export_dir()
+    prefix = f"{LAYER_NAME}_{_hours_label(sorted(frames))}_"
+    path = os.path.join(out_dir, f"{prefix}{data_version(frames, geoms)}{ext}")
+    if os.path.exists(path):
+        return path
+
+    with _write_lock:
+        if os.path.exists(path):
+            return path
+        os.makedirs(out_dir, exist_ok=True)
+        gdf = build_export_frame(frames, geoms, level_names_of)
+        # 임시 파일에 쓴 뒤 교체 (쓰는 도중의 파일이 응답으로 나가지 않도록)
+        tmp = f"{path}.tmp{ext}"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        options = {"SPATIAL_INDEX": "YES"} if driver == "FlatGeobuf" else {}
+        gdf.to_file(tmp, driver=driver, layer=LAYER_NAME, engine="pyogrio", **options)
+        os.replace(tmp, path)
+    print(f"[M1] Export written: {len(gdf)} rows -> {path}")
+    return path
+
+def prune_exports(out_dir=None, keep: int = KEEP_VERSIONS) -> int:
+    """
+    데이터 버전이 바뀐 직후(캐시 무효화 시) 호출: 시간대 조합/형식별로 최근 keep개 파일만 남기고 지웁니다.
+    무효화 시점에 디스크에 있는 파일은 모두 이전 버전이므로, 직전 버전 파일(전송 중일 수 있음)은 남기고
+    그보다 오래된 파일만 지웁니다. 지운 파일 수를 반환합니다.
+    """
+    out_dir = out_dir or get_export_dir()
+    if not os.path.isdir(out_dir):
+        return 0
+
+    removed = 0
+    with _write_lock:
+        groups = {}
+        for name in os.listdir(out_dir):
+            match = _EXPORT_NAME.match(name)
+            if match:
+                path = os.path.join(out_dir, name)
+                groups.setdefault(match.groups(), []).append((os.path.getmtime(path), name, path))
+        for files in groups.values():
+            for _, _, path in sorted(files, reverse=True)[keep:]:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError as e:
+                    print(f"[M1] Export prune error: {e}")
+    if removed:
+        print(f"[M1] Export pruned: {removed} old files in {out_dir}")
+    return removed
@@ -1,50 +1,248 @@
 import os
+import json
+import threading
+import numpy as np
+import pandas as pd
 import geopandas as gpd
+import shapely
 from supabase import create_client, Client
 from dotenv import load_dotenv
 from pathlib import Path
 
 # 전역 변수로 데이터 캐싱
 _road_geometry = None
+_osmid_index = None
+_osmid_index_lock = threading.Lock()
 _supabase_client = None
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+# 데이터 소스 설정 (M1_DATA_SOURCE)
+# - supabase (기본): COM_Location 조회 (클라이언트 생성 실패 시 M1_SNAPSHOT_FALLBACK=1 일 때만 스냅샷으로 대체)
+# - snapshot: m1/data/snapshot (로컬 CSV + GeoJSON을 컴파일한 결과)만 사용
+SOURCE_SUPABASE = "supabase"
+SOURCE_SNAPSHOT = "snapshot"
+
+def _env_flag(name):
+    return os.getenv(name, "0").lower() in ("1", "true", "yes")
+
+def get_data_source():
+    return os.getenv("M1_DATA_SOURCE", SOURCE_SUPABASE).lower()
+
+def snapshot_fallback_enabled():
+    """
+    M1_SNAPSHOT_FALLBACK=1 이면 supabase 모드에서 클라이언트를 만들 수 없을 때 로컬 스냅샷으로 응답합니다.
+    (기본값 0: 운영 중 .env 누락으로 조용히 CSV 데이터로 바뀌지 않도록 빈 응답)
+    """
+    return _env_flag("M1_SNAPSHOT_FALLBACK")
+
+def snapshot_compile_enabled():
+    """
+    M1_SNAPSHOT_COMPILE=1 이면 스냅샷이 없거나 원본(CSV/GeoJSON)과 다를 때 서버에서 다시 컴파일합니다.
+    (기본값 0: python -m m1.snapshot 으로 미리 컴파일)
+    """
+    return _env_flag("M1_SNAPSHOT_COMPILE")
+
+def merge_segments_enabled():
+    """
+    M1_MERGE_SEGMENTS=1 이면 도로(행)당 feature 1개로 반환합니다.
+    geometry는 그 도로의 조각(GeoJSON unique_road_id 기준)을 묶은 MultiLineString이며,
+    GeoJSON에 unique_road_id가 없으면 같은 osmid의 조각 전체를 묶습니다.
+    (기본값: osmid로 연결된 조각마다 feature 1개, 기존 병합 결과와 동일)
+    """
+    return _env_flag("M1_MERGE_SEGMENTS")
+
+def get_geojson_path():
+    # 1. 환경변수 확인
+    env_path = os.getenv("M1_GEOJSON_PATH")
+    if env_path and os.path.exists(env_path):
+        return env_path
+    # 2. 기본 경로 (m1/data)
+    return os.path.join(DATA_DIR, "roads_cleaned_filtered.geojson")
+
+def get_csv_path():
+    env_path = os.getenv("M1_CSV_PATH")
+    if env_path and os.path.exists(env_path):
+        return env_path
+    return os.path.join(DATA_DIR, "road_risk_final.csv")
+
+def normalize_osmid(x):
+    """
+    osmid를 병합용 문자열 키로 통일합니다.
+    - JSONB 리스트 [val] -> val
+    - 37398454.0 / "37398454.0" -> "37398454"
+    - 여러 osmid로 이루어진 도로 [1, 2] / "[ 1, 2 ]" -> "[1, 2]"
+    """
+    try:
+        if isinstance(x, (list, tuple)):
+            if len(x) == 1:
+                return normalize_osmid(x[0])
+            return "[" + ", ".join(normalize_osmid(v) for v in x) + "]"
+        if isinstance(x, float):
+            return str(int(x))
+        if isinstance(x, str):
+            val = x.strip()
+            if val.startswith("["):
+                return normalize_osmid(json.loads(val))
+            if val.endswith(".0"):
+                val = val[:-2]
+            return val
+        return str(x)
+    except:
+        return str(x)
+
+def read_road_geometry(geojson_path):
+    """GeoJSON을 읽어 osmid 정규화 및 EPSG:4326 변환까지 마친 GeoDataFrame을 반환합니다."""
+    gdf = gpd.read_file(geojson_path)
+    # osmid를 문자열로 통일
+    if 'osmid' in gdf.columns:
+        gdf['osmid'] = gdf['osmid'].apply(normalize_osmid)
+
+    # 좌표계 변환 (EPSG:4326)
+    if gdf.crs is not None and gdf.crs.to_string() != "EPSG:4326":
+        try:
+            gdf = gdf.to_crs(epsg=4326)
+            print("[M1] Geometry converted to EPSG:4326")
+        except Exception as e:
+            print(f"[M1] Warning: Failed to convert CRS: {e}")
+    return gdf
+
 def load_data():
     global _road_geometry
-    
+
     if _road_geometry is not None:
         return
 
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    data_dir = os.path.join(base_dir, "data")
-    
+    # 스냅샷 모드: GeoJSON 파싱 없이 컴파일된 좌표 배열로 GeoDataFrame 구성
+    if get_data_source() == SOURCE_SNAPSHOT:
+        from .snapshot import get_snapshot
+        snapshot = get_snapshot()
+        if snapshot is not None:
+            _road_geometry = snapshot.to_geodataframe()
+            print(f"[M1] Geometry data loaded from snapshot: {len(_road_geometry)} features")
+            return
+
     # 도로 지리 데이터 로드 (GeoJSON)
-    # 1. 환경변수 확인
-    env_path = os.getenv("M1_GEOJSON_PATH")
-    if env_path and os.path.exists(env_path):
-        geojson_path = env_path
+    geojson_path = get_geojson_path()
+    if os.getenv("M1_GEOJSON_PATH") == geojson_path:
         print(f"[M1] Loading GeoJSON from env: {geojson_path}")
-    else:
-        # 2. 기본 경로 (m1/data)
-        geojson_path = os.path.join(data_dir, "roads_cleaned_filtered.geojson")
-    
-    if os.path.exists(geojson_path):
-        _road_geometry = gpd.read_file(geojson_path)
-        # osmid를 문자열로 통일
-        if 'osmid' in _road_geometry.columns:
-             _road_geometry['osmid'] = _road_geometry['osmid'].astype(str)
-        
-        # 좌표계 변환 (EPSG:4326)
-        if _road_geometry.crs is not None and _road_geometry.crs.to_string() != "EPSG:4326":
-            try:
-                _road_geometry = _road_geometry.to_crs(epsg=4326)
-                print("[M1] Geometry converted to EPSG:4326")
-            except Exception as e:
-                print(f"[M1] Warning: Failed to convert CRS: {e}")
 
+    if os.path.exists(geojson_path):
+        _road_geometry = read_road_geometry(geojson_path)
         print(f"[M1] Geometry data loaded: {len(_road_geometry)} features")
     else:
         print(f"[M1] Error: Geometry data not found at {geojson_path}")
 
+class OsmidGeometryIndex:
+    """
+    정규화된 osmid -> 도로 geometry 조각 인덱스 (서버 당 1회 생성)
+
+    geometry를 osmid 순으로 정렬한 배열(order)에서 osmid마다 연속 구간 [starts, stops)를 가지므로
+    요청 시 pandas merge 없이 배열 gather만으로 병합할 수 있습니다.
+    여러 조각으로 나뉜 도로는 MultiLineString(merged)으로도 보관합니다.
+    GeoJSON에 unique_road_id가 있으면 조각별 소유 도로(road_ids)와 도로별 MultiLineString(road_merged)도 보관합니다.
+    (osmid가 같은 도로끼리는 병합 시 서로의 조각과도 연결되므로, 조각이 실제로 속한 도로를 구분할 때 사용)
+    """
+
+    def __init__(self, gdf):
+        osmids = gdf['osmid'].to_numpy(dtype=object)
+        valid = gdf.geometry.notna().to_numpy()
+
+        # 1. osmid별 연속 구간 (같은 osmid 안에서는 원래 행 순서 유지)
+        self.keys, geom_key = np.unique(osmids.astype(str), return_inverse=True)
+        geom_key = np.where(valid, geom_key, -1)
+        self.geom_key = geom_key                            # (G,) 행 -> osmid 위치 (-1: geometry 없음)
+        self.order = np.flatnonzero(valid)[np.argsort(geom_key[valid], kind="stable")]
+        counts = np.bincount(geom_key[valid], minlength=len(self.keys))
+        self.stops = np.cumsum(counts)
+        self.starts = self.stops - counts
+        self._lookup = pd.Index(self.keys)
+
+        # 2. osmid별 MultiLineString (조각이 1개여도 같은 타입으로 통일)
+        self.segments = np.asarray(gdf.geometry.values, dtype=object)
+        self.n_segments = len(self.segments)
+        # 조각 -> 소유 도로 unique_road_id (-1: 알 수 없음)
+        if 'unique_road_id' in gdf.columns:
+            self.road_ids = pd.to_numeric(gdf['unique_road_id'], errors='coerce').fillna(-1).to_numpy(np.int64)
+        else:
+            self.road_ids = np.full(self.n_segments, -1, dtype=np.int64)
+        self.merged = np.full(len(self.keys), None, dtype=object)
+        parts, owner = shapely.get_parts(self.segments[self.order], return_index=True)
+        if len(parts) > 0:
+            part_keys, dense = np.unique(geom_key[self.order][owner], return_inverse=True)
+            self.merged[part_keys] = shapely.multilinestrings(parts, indices=dense)
+
+        # 3. 도로(GeoJSON unique_road_id)별 MultiLineString: 그 도로의 조각만 (osmid를 공유하는 다른 도로 조각 제외)
+        owned = valid & (self.road_ids >= 0)
+        self.road_keys, road_key = np.unique(self.road_ids[owned], return_inverse=True)
+        self.road_merged = np.full(len(self.road_keys), None, dtype=object)
+        road_order = np.argsort(road_key, kind="stable")
+        parts, owner = shapely.get_parts(self.segments[np.flatnonzero(owned)[road_order]], return_index=True)
+        if len(parts) > 0:
+            part_keys, dense = np.unique(road_key[road_order][owner], return_inverse=True)
+            self.road_merged[part_keys] = shapely.multilinestrings(parts, indices=dense)
+        self._has_road_geom = np.array([g is not None for g in self.road_merged], dtype=bool)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def gather(self, osmids):
+        """
+        각 행의 osmid에 해당하는 geometry 조각을 모읍니다.
+        반환: (row_idx, geom_idx) - 행 i가 조각 geom_idx와 연결됨
+        순서는 기존 merge(gdf, df)와 동일하게 (geom_idx, row_idx) 오름차순입니다.
+        """
+        keys = self._lookup.get_indexer(pd.Index(osmids, dtype=object).astype(str))
+        rows = np.flatnonzero(keys >= 0)
+        keys = keys[rows]
+        counts = self.stops[keys] - self.starts[keys]
+
+        row_idx = np.repeat(rows, counts)
+        # 행별 구간 [start, stop)를 펼친 위치
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        geom_idx = self.order[np.repeat(self.starts[keys], counts) + within]
+
+        sort = np.lexsort((row_idx, geom_idx))
+        return row_idx[sort], geom_idx[sort]
+
+    def merged_geom_idx(self, geom_idx, road_ids=None):
+        """
+        조각 geometry 인덱스 -> MultiLineString 인덱스 (geometry 배열 뒤쪽)
+        road_ids(행별 unique_road_id)의 도로 조각이 GeoJSON에 있으면 도로별 MultiLineString
+        (n_segments + osmid 수 + 도로 위치), 없으면 osmid별 MultiLineString (n_segments + osmid 위치)
+        """
+        by_osmid = self.n_segments + self.geom_key[geom_idx]
+        if road_ids is None or len(self.road_keys) == 0:
+            return by_osmid
+        road_ids = np.asarray(road_ids, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.road_keys, road_ids), len(self.road_keys) - 1)
+        own = (self.road_keys[pos] == road_ids) & self._has_road_geom[pos]
+        return np.where(own, self.n_segments + len(self.merged) + pos, by_osmid)
+
+    def geometry_array(self):
+        """조각 geometry(G개) 뒤에 osmid별 MultiLineString, 도로별 MultiLineString을 이어붙인 배열"""
+        return np.concatenate([self.segments, self.merged, self.road_merged])
+
+    def geometry_road_ids(self):
+        """geometry_array() 순서의 소유 도로 unique_road_id (osmid별 MultiLineString은 여러 도로가 공유하므로 -1)"""
+        return np.concatenate([self.road_ids, np.full(len(self.merged), -1, dtype=np.int64), self.road_keys])
+
+def get_osmid_index():
+    """OsmidGeometryIndex 싱글톤 (도로 geometry가 없으면 None)"""
+    global _osmid_index
+    if _osmid_index is not None:
+        return _osmid_index
+
+    with _osmid_index_lock:
+        if _osmid_index is None:
+            gdf = get_road_geometry()
+            if gdf is None:
+                return None
+            _osmid_index = OsmidGeometryIndex(gdf)
+            print(f"[M1] osmid index built: {len(_osmid_index)} osmids / {_osmid_index.n_segments} segments")
+    return _osmid_index
+
 def get_supabase_client():
     global _supabase_client
     if _supabase_client is None:
@@ -53,11 +251,11 @@ def get_supabase_client():
         load_dotenv(dotenv_path=env_path)
         url = os.getenv("SUPABASE_URL")
         key = os.getenv("SUPABASE_KEY")
-        
+
         if not url or not key:
             print("[M1] Error: SUPABASE_URL or SUPABASE_KEY not found in .env")
             return None
-            
+
         try:
             _supabase_client = create_client(url, key)
             print("[M1] Supabase Client created")
@@ -70,5 +268,3 @@ def get_road_geometry():
     if _road_geometry is None:
         load_data()
     return _road_geometry
-
-
@@ -0,0 +1,87 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+PAGE_SIZE = 1000   # Supabase(PostgREST) 기본 최대 응답 행 수
+MAX_WORKERS = 8
+MAX_RETRIES = 3
+# COM_Location 기본 키: (hour, unique_road_id)는 중복될 수 있으므로 마지막 정렬 기준으로 추가
+PRIMARY_KEY = "id"
+
+def total_order(order: Iterable[str], primary_key: Optional[str] = PRIMARY_KEY) -> tuple:
+    """정렬 기준 끝에 기본 키를 붙여 전체 순서(동순위 없음)를 만듭니다."""
+    order = tuple(order)
+    if primary_key and primary_key not in order:
+        order += (primary_key,)
+    return order
+
+def _build_query(client, table: str, columns: str, filters: Optional[Dict], order: Iterable[str], count: Optional[str] = None):
+    # postgrest 쿼리 빌더는 호출마다 내부 상태가 바뀌므로 페이지마다 새로 생성
+    query = client.table(table).select(columns, count=count)
+    for column, value in (filters or {}).items():
+        query = query.eq(column, value)
+    # 동시 요청 시에도 페이지 경계가 어긋나지 않도록 정렬 기준 고정
+    for column in order:
+        query = query.order(column)
+    return query
+
+def with_retry(call, label: str, retries: int = MAX_RETRIES, backoff: float = 0.5):
+    """call()을 실패 시 최대 retries번까지 (backoff * 시도 횟수)초 간격으로 다시 실행합니다."""
+    for attempt in range(1, retries + 1):
+        try:
+            return call()
+        except Exception as e:
+            if attempt == retries:
+                raise
+            print(f"[M1] {label} failed ({e}), retry {attempt}/{retries - 1}")
+            time.sleep(backoff * attempt)
+
+def _execute_with_retry(make_query, start: int, end: int, retries: int, backoff: float):
+    # range(start, end)는 inclusive (start ~ end 포함)
+    return with_retry(lambda: make_query().range(start, end).execute(), f"Page {start}-{end}", retries, backoff)
+
+def fetch_all_rows(
+    client,
+    table: str,
+    columns: str = "*",
+    filters: Optional[Dict] = None,
+    order: Iterable[str] = ("hour", "unique_road_id"),
+    primary_key: Optional[str] = PRIMARY_KEY,
+    page_size: int = PAGE_SIZE,
+    max_workers: int = MAX_WORKERS,
+    retries: int = MAX_RETRIES,
+    backoff: float = 0.5,
+) -> List[dict]:
+    """
+    Supabase 테이블 전체를 페이지 단위로 병렬 조회합니다.
+
+    1. 첫 페이지를 count="exact"로 요청하여 전체 행 수를 함께 받음
+    2. 나머지 페이지는 최대 max_workers개씩 동시에 요청 (실패한 페이지만 개별 재시도)
+    3. 페이지 순서대로 이어붙여 반환
+
+    페이지를 동시에 .range()로 나눠 받으므로 정렬은 전체 순서여야 합니다. (동순위 행은 요청마다
+    순서가 달라져 페이지 사이에서 누락/중복될 수 있음) order 끝에 primary_key를 붙여 보장합니다.
+    """
+    order = total_order(order, primary_key)
+
+    def make_query(count=None):
+        return _build_query(client, table, columns, filters, order, count)
+
+    first = _execute_with_retry(lambda: make_query("exact"), 0, page_size - 1, retries, backoff)
+    rows = list(first.data or [])
+    total = first.count if first.count is not None else len(rows)
+
+    starts = list(range(page_size, total, page_size))
+    if not starts:
+        return rows
+
+    def fetch_page(start):
+        response = _execute_with_retry(make_query, start, start + page_size - 1, retries, backoff)
+        return response.data or []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(starts))) as executor:
+        # executor.map은 입력 순서대로 결과를 반환 -> 페이지 순서 유지
+        for page in executor.map(fetch_page, starts):
+            rows.extend(page)
+
+    return rows
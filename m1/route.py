@@ -0,0 +1,165 @@
+"""
+경로(polyline)를 따라 M1 도로 위험도를 누적합니다. (예: /m2/route 결과 경로 비교)
+
+1. 경로를 연속한 두 점 구간(segment)으로 나누고, 구간마다 양 끝점을 포함해 SAMPLE_SPACING_M 간격으로 점을 찍습니다.
+   (/m2/route 경로는 노드 좌표만 있으므로 굽은 도로에서는 구간 중점이 도로에서 멀어질 수 있음)
+2. 모든 표본점을 한 번에 STRtree(dwithin)로 조회하여 buffer 안의 도로 geometry 후보를 찾고,
+   거리 계산도 일괄로 수행합니다.
+3. buffer 안에 도로가 있는 표본점 비율이 MIN_COVERAGE 이상인 구간만 매칭하고 (경로가 M1 도로 밖으로 나간 구간 제외),
+   buffer 안에 든 표본점이 가장 많은 geometry(같으면 평균 거리가 가까운 것)를 구간의 도로로 고릅니다.
+   (긴 구간이 여러 도로 조각에 걸쳐 있어도 매칭되고, 교차로에서 끝점만 닿는 도로는 선택되지 않음)
+4. 조각 geometry는 그 조각이 속한 도로(GeoJSON unique_road_id)의 점수를 사용합니다.
+   (osmid 병합으로 같은 osmid의 다른 도로와도 연결되지만 그 도로의 점수는 쓰지 않음)
+   여러 도로가 공유하는 osmid별 MultiLineString(unique_road_id가 없는 GeoJSON의 M1_MERGE_SEGMENTS)만 가장 위험한 도로의 점수를 사용합니다.
+
+거리는 경로 평균 위도 기준 등장방형 근사(m)로 계산합니다. (수영구 범위에서 오차 1% 미만)
+"""
+import numpy as np
+import shapely
+
+DEFAULT_BUFFER_M = 15.0
+MAX_BUFFER_M = 100.0
+MAX_POINTS = 5000
+EARTH_M_PER_DEG = 111320.0
+SAMPLE_SPACING_M = 5.0          # 구간 표본점 간격
+MAX_SAMPLES_PER_SEGMENT = 64    # 아주 긴 구간의 표본점 수 상한
+MIN_COVERAGE = 0.5              # 매칭에 필요한 표본점 비율 (buffer 안에 도로가 있는 점)
+
+
+def _meters_per_degree(lat0: float):
+    """위도 lat0에서 경도/위도 1도당 거리 (m)"""
+    return EARTH_M_PER_DEG * np.cos(np.radians(lat0)), EARTH_M_PER_DEG
+
+def best_rows_by_geometry(frame, owners: np.ndarray) -> np.ndarray:
+    """
+    geometry 인덱스별로 점수를 매길 frame 행 번호 (해당 행이 없으면 -1)
+    owners: geometry별 소유 도로 unique_road_id (RoadGeometryIndex.road_ids, -1: 소유 도로 없음)
+    - 소유 도로가 있는 geometry: 그 도로의 행
+    - 소유 도로가 없는 geometry(공유 MultiLineString 등): 연결된 도로 중 점수가 가장 높은 행
+    """
+    owners = np.asarray(owners, dtype=np.int64)
+    road_ids = np.asarray(frame.road_ids)
+    geom_idx = np.asarray(frame.geom_idx)
+    best = np.full(len(owners), -1, dtype=np.int64)
+
+    owner = owners[geom_idx]
+    rows = np.flatnonzero((owner < 0) | (owner == road_ids))
+    order = rows[np.lexsort((road_ids[rows], -np.asarray(frame.scores)[rows]))]
+    geoms, first = np.unique(geom_idx[order], return_index=True)
+    best[geoms] = order[first]
+    return best
+
+def sample_segments(coords: np.ndarray, mx: float, my: float):
+    """
+    구간마다 양 끝점을 포함한 표본점을 만듭니다.
+    반환: (points (S, 2), segment (S,) 표본점이 속한 구간, counts (N-1,) 구간별 표본점 수)
+    """
+    lengths = np.hypot(np.diff(coords[:, 0]) * mx, np.diff(coords[:, 1]) * my)
+    counts = np.clip(np.ceil(lengths / SAMPLE_SPACING_M).astype(np.int64) + 1, 2, MAX_SAMPLES_PER_SEGMENT)
+    segment = np.repeat(np.arange(len(counts)), counts)
+    within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    t = (within / (counts[segment] - 1))[:, None]
+    points = coords[:-1][segment] * (1 - t) + coords[1:][segment] * t
+    return points, segment, counts
+
+def match_segments(coords: np.ndarray, index, valid: np.ndarray, buffer_m: float):
+    """
+    경로 구간마다 buffer_m 안에 표본점이 가장 많이 드는 geometry를 찾습니다. (모듈 설명 3 참고)
+    coords: (N, 2) [lng, lat], valid: geometry 인덱스별 사용 가능 여부
+    반환: (geom_idx, distance_m) - distance_m은 buffer 안 표본점의 평균 거리,
+    매칭 실패 구간은 geom_idx = -1, distance_m = NaN
+    """
+    mx, my = _meters_per_degree(coords[:, 1].mean())
+    samples, segment, counts = sample_segments(coords, mx, my)
+    points = shapely.points(samples)
+
+    matched = np.full(len(counts), -1, dtype=np.int64)
+    distance = np.full(len(counts), np.nan)
+
+    # 경도 방향 1도가 더 짧으므로 경도 기준으로 변환하면 위도 방향은 여유 있게 조회됨
+    sample_idx, geom_idx = index.tree.query(points, predicate="dwithin", distance=buffer_m / mx)
+    keep = valid[geom_idx]
+    sample_idx, geom_idx = sample_idx[keep], geom_idx[keep]
+    if len(sample_idx) == 0:
+        return matched, distance
+
+    # 후보 geometry 위의 최근접점까지 거리(m)를 일괄 계산 (shortest_line의 시작점 = geometry 위의 점)
+    nearest = shapely.get_coordinates(shapely.shortest_line(index.geoms[geom_idx], points[sample_idx]))[::2]
+    dist_m = np.hypot((nearest[:, 0] - samples[sample_idx, 0]) * mx, (nearest[:, 1] - samples[sample_idx, 1]) * my)
+    inside = dist_m <= buffer_m
+    if not inside.any():
+        return matched, distance
+
+    # 구간별로 buffer 안에 도로가 있는 표본점 수
+    covered = np.bincount(segment[np.unique(sample_idx[inside])], minlength=len(counts))
+
+    # (구간, geometry) 쌍별 buffer 안 표본점 수와 평균 거리
+    seg = segment[sample_idx[inside]]
+    pair, pair_inverse = np.unique(seg * len(valid) + geom_idx[inside], return_inverse=True)
+    hits = np.bincount(pair_inverse)
+    mean_m = np.bincount(pair_inverse, weights=dist_m[inside]) / hits
+    pair_seg, pair_geom = pair // len(valid), pair % len(valid)
+
+    # 구간별 최선 후보: 표본점 수 내림차순 -> 평균 거리(cm 단위, 같은 좌표의 중복 geometry는 동률) -> geometry 인덱스
+    order = np.lexsort((pair_geom, np.round(mean_m, 2), -hits, pair_seg))
+    first = order[np.flatnonzero(np.diff(pair_seg[order], prepend=-1))]
+    ok = covered[pair_seg[first]] >= MIN_COVERAGE * counts[pair_seg[first]]
+    matched[pair_seg[first[ok]]] = pair_geom[first[ok]]
+    distance[pair_seg[first[ok]]] = mean_m[first[ok]]
+    return matched, distance
+
+def score_route(frame, index, coords, level_codes, level_names, buffer_m: float = DEFAULT_BUFFER_M) -> dict:
+    """
+    경로 coords([lng, lat] 목록)를 따라 frame(한 시간대 병합 결과)의 위험도를 누적합니다.
+    - cumulative_risk: Σ(구간 위험도 × 구간 길이 km) (매칭된 구간만)
+    - mean_risk: 매칭된 길이 기준 가중 평균, max_risk: 최대값
+    """
+    coords = np.asarray(coords, dtype=np.float64)
+    mx, my = _meters_per_degree(coords[:, 1].mean())
+    lengths = np.hypot(np.diff(coords[:, 0]) * mx, np.diff(coords[:, 1]) * my)
+
+    best = best_rows_by_geometry(frame, index.road_ids)
+    matched, distance = match_segments(coords, index, best >= 0, buffer_m)
+    rows = np.where(matched >= 0, best[np.maximum(matched, 0)], -1)
+    hit = rows >= 0
+
+    scores = np.where(hit, np.asarray(frame.scores)[np.maximum(rows, 0)], np.nan)
+    codes = np.asarray(level_codes)[np.maximum(rows, 0)]
+    matched_m = float(lengths[hit].sum())
+    cumulative = float((scores[hit] * lengths[hit]).sum() / 1000)
+
+    segments = []
+    for i in range(len(lengths)):
+        row = int(rows[i])
+        segment = {
+            "index": i,
+            "length_m": round(float(lengths[i]), 2),
+            "unique_road_id": None,
+            "name": None,
+            "risk_score": None,
+            "risk_level": None,
+            "distance_m": None,
+        }
+        if row >= 0:
+            segment.update({
+                "unique_road_id": int(frame.road_ids[row]),
+                "name": frame.names[row],
+                "risk_score": float(scores[i]),
+                "risk_level": level_names[codes[i]],
+                "distance_m": round(float(distance[i]), 2),
+            })
+        segments.append(segment)
+
+    max_i = int(np.nanargmax(scores)) if hit.any() else None
+    return {
+        "hour": frame.hour,
+        "count": len(segments),
+        "buffer_m": buffer_m,
+        "length_m": round(float(lengths.sum()), 2),
+        "matched_length_m": round(matched_m, 2),
+        "cumulative_risk": round(cumulative, 6),
+        "mean_risk": round(cumulative * 1000 / matched_m, 6) if matched_m > 0 else None,
+        "max_risk": float(scores[max_i]) if max_i is not None else None,
+        "max_level": level_names[codes[max_i]] if max_i is not None else None,
+        "segments": segments,
+    }
@@ -1,27 +1,312 @@
-from fastapi import APIRouter, HTTPException, Query
-from .service import get_risk_by_hour
-from .schemas import RiskResponse
+import os
+import hashlib
+from typing import Optional, Union
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from .service import risk_cache, encode_json, query_risk, parse_risk_level, get_risk_tile, seed_tiles, tile_cache, get_compact_risk, get_timeline, stream_risk, rescore_cache, get_risk_cube, get_route_risk, get_risk_diff, warm_derived, get_export, empty_timeline
+from .tiles import MAX_ZOOM, SEED_ZOOMS
+from .spatial import parse_bbox, select_tier
+from .scoring import DEFAULT_WEIGHTS, get_active_weights, parse_weights, weights_dict
+from .analytics import TOP_K
+from .schemas import RiskResponse, CompactRiskResponse, TimelineResponse, RouteRiskRequest, RouteRiskResponse, RiskDiffResponse
+from .route import DEFAULT_BUFFER_M, MAX_BUFFER_M, MAX_POINTS
+from .export import EXPORT_FORMATS, parse_hours
 
 router = APIRouter(prefix="/m1", tags=["m1"])
 
-@router.get("/risk", response_model=RiskResponse)
-async def get_road_risk(hour: int = Query(..., ge=0, le=23, description="조회할 시간대 (0~23)")):
+# /m1/risk 응답 형식: geojson(RiskResponse) / compact(CompactRiskResponse) / stream=true(NDJSON)
+RISK_RESPONSES = {
+    200: {
+        "description": "format=geojson: RiskResponse, format=compact: CompactRiskResponse, "
+                       "stream=true: application/x-ndjson (한 줄 = RoadRiskItem 1개, 총 개수는 X-Total-Count 헤더)",
+        "content": {
+            "application/x-ndjson": {"schema": {"$ref": "#/components/schemas/RoadRiskItem"}},
+        },
+        "headers": {
+            "X-Total-Count": {"description": "stream=true 일 때 전송할 도로 수", "schema": {"type": "integer"}},
+        },
+    },
+}
+
+@router.get("/risk", response_model=Union[RiskResponse, CompactRiskResponse], responses=RISK_RESPONSES)
+async def get_road_risk(
+    hour: int = Query(..., ge=0, le=23, description="조회할 시간대 (0~23)"),
+    bbox: Optional[str] = Query(None, description="지도 영역 'minx,miny,maxx,maxy' (EPSG:4326)"),
+    min_level: Optional[str] = Query(None, description="최소 위험도 등급 (낮음/중간/높음/심각)"),
+    zoom: Optional[int] = Query(None, ge=0, le=22, description="지도 zoom 레벨 (좌표 단순화 단계 선택)"),
+    tolerance: Optional[float] = Query(None, ge=0, description="좌표 단순화 허용 오차 (도 단위, zoom보다 우선)"),
+    format: str = Query("geojson", description="응답 형식 (geojson / compact)"),
+    stream: bool = Query(False, description="NDJSON(한 줄 = 도로 1개)으로 나눠서 전송"),
+    weights: Optional[str] = Query(None, description="risk_score 재계산 가중치 'length,width,slope,density' 또는 'width=0.5,...'"),
+):
     """
     특정 시간대의 도로별 위험도와 좌표 정보를 조회합니다.
+    (시간대별로 직렬화된 응답을 캐시하여 반환)
+    bbox 지정 시 해당 영역과 교차하는 도로만, min_level 지정 시 해당 등급 이상만 반환합니다.
+    zoom/tolerance 지정 시 미리 단순화해 둔 좌표를 사용합니다.
+    format=compact 지정 시 병렬 배열 + encoded polyline 형식으로 반환합니다. (m1/README.md 참고)
+    stream=true 지정 시 application/x-ndjson으로 도로를 한 줄씩 전송합니다. (총 개수: X-Total-Count 헤더)
+    weights 지정 시 구성 점수(*_score_norm)로 risk_score/risk_level을 다시 계산합니다. (what-if, 캐시에 반영 안 됨)
     """
+    if format not in ("geojson", "compact"):
+        raise HTTPException(status_code=400, detail="format must be 'geojson' or 'compact'")
+    compact = format == "compact"
+    if stream and compact:
+        raise HTTPException(status_code=400, detail="stream=true supports format=geojson only")
+    tier = select_tier(zoom, tolerance)
+    try:
+        bbox_value = parse_bbox(bbox) if bbox else None
+        level_code = parse_risk_level(min_level) if min_level else None
+        weight_values = parse_weights(weights) if weights else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
-        data = get_risk_by_hour(hour)
-        
-        return {
-            "hour": hour,
-            "count": len(data) if data else 0,
-            "data": data if data else []
-        }
+        if stream:
+            count, chunks = stream_risk(hour, bbox_value, level_code, tier, weight_values)
+            return StreamingResponse(chunks, media_type="application/x-ndjson", headers={"X-Total-Count": str(count)})
+
+        if bbox_value is None and level_code is None and weight_values is None:
+            body = get_compact_risk(hour, tier) if compact else risk_cache.get(hour, tier)
+        else:
+            body = query_risk(hour, bbox_value, level_code, tier, compact, weight_values)
+        if body is None:
+            body = encode_json({"hour": hour, "count": 0, "data": []})
+
+        return Response(content=body, media_type="application/json")
     except Exception as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
 
+@router.get("/risk/timeline", response_model=TimelineResponse)
+def get_road_risk_timeline(
+    zoom: Optional[int] = Query(None, ge=0, le=22, description="지도 zoom 레벨 (좌표 단순화 단계 선택)"),
+    tolerance: Optional[float] = Query(None, ge=0, description="좌표 단순화 허용 오차 (도 단위, zoom보다 우선)"),
+    weights: Optional[str] = Query(None, description="risk_score 재계산 가중치 (/m1/risk와 동일)"),
+):
+    """
+    24개 시간대의 도로 위험도를 한 번에 조회합니다. (대시보드 시간대 애니메이션용)
+    도로 목록과 좌표(encoded polyline)는 한 번만, 위험도/등급은 [hour][도로] 행렬로 반환합니다.
+    """
+    tier = select_tier(zoom, tolerance)
+    try:
+        weight_values = parse_weights(weights) if weights else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        body = get_timeline(tier, weight_values)
+        if body is None:
+            body = empty_timeline()
+        return Response(content=body, media_type="application/json")
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+@router.get("/risk/diff", response_model=RiskDiffResponse)
+def get_road_risk_diff(
+    from_hour: int = Query(..., alias="from", ge=0, le=23, description="이전 시간대 (0~23)"),
+    to_hour: int = Query(..., alias="to", ge=0, le=23, description="다음 시간대 (0~23)"),
+):
+    """
+    from -> to 시간대에서 risk_score 또는 risk_level이 바뀐 도로만 반환합니다. (시간대 슬라이더 이동 시 사용)
+    값은 to 시간대 기준이며, 좌표는 포함하지 않습니다. (/m1/risk 또는 /m1/risk/timeline 결과에 unique_road_id로 반영)
+    """
+    try:
+        body = get_risk_diff(from_hour, to_hour)
+        if body is None:
+            raise HTTPException(status_code=404, detail=f"No risk data for hour {from_hour} or {to_hour}")
+        return Response(content=body, media_type="application/json")
+    except HTTPException:
+        raise
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+@router.post("/route/risk", response_model=RouteRiskResponse)
+def get_route_risk_score(
+    req: RouteRiskRequest,
+    weights: Optional[str] = Query(None, description="risk_score 재계산 가중치 (/m1/risk와 동일)"),
+):
+    """
+    경로(polyline, 예: /m2/route의 path)를 따라 해당 시간대의 도로 위험도를 누적합니다.
+    경로 구간마다 buffer_m 안의 가장 가까운 도로를 매칭하여 누적/평균/최대 위험도와 구간별 결과를 반환합니다.
+    """
+    buffer_m = req.buffer_m if req.buffer_m is not None else DEFAULT_BUFFER_M
+    if not 0 <= req.hour <= 23:
+        raise HTTPException(status_code=400, detail="hour must be between 0 and 23")
+    if not 2 <= len(req.path) <= MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"path must have 2 to {MAX_POINTS} points")
+    if not 0 < buffer_m <= MAX_BUFFER_M:
+        raise HTTPException(status_code=400, detail=f"buffer_m must be in (0, {MAX_BUFFER_M}]")
+    try:
+        weight_values = parse_weights(weights) if weights else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        coords = [(p.lng, p.lat) for p in req.path]
+        body = get_route_risk(req.hour, coords, buffer_m, weight_values)
+        if body is None:
+            raise HTTPException(status_code=404, detail=f"No risk data for hour {req.hour}")
+        return Response(content=body, media_type="application/json")
+    except HTTPException:
+        raise
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+@router.get("/export")
+def export_road_risk(
+    format: str = Query("fgb", description="파일 형식 (fgb: FlatGeobuf / gpkg: GeoPackage)"),
+    hours: Optional[str] = Query(None, description="내보낼 시간대 '7' (한 시간대) 또는 'all' (생략 시 전체, 여러 시간대는 전체 파일의 hour 컬럼으로 필터링)"),
+):
+    """
+    시간대별 도로 위험도(도로 조각 1행, EPSG:4326)를 공간 인덱스가 포함된 파일로 내려받습니다.
+    파일은 데이터 버전마다 한 번만 생성되어 디스크에 보관되며, Range 요청을 지원합니다.
+    (FlatGeobuf는 packed Hilbert R-tree를 포함하므로 클라이언트가 필요한 영역만 range 요청으로 읽을 수 있음)
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {list(EXPORT_FORMATS)}")
+    try:
+        hour_list = parse_hours(hours)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    path = get_export(hour_list, format)
+    if path is None:
+        raise HTTPException(status_code=404, detail="No risk data to export")
+    return FileResponse(
+        path,
+        media_type=EXPORT_FORMATS[format][2],
+        filename=os.path.basename(path),
+        headers={"Cache-Control": "public, max-age=3600"},
+    )
+
+@router.get("/tiles/{hour}/{z}/{x}/{y}.mvt")
+def get_risk_tile_mvt(hour: int, z: int, x: int, y: int, request: Request):
+    """
+    특정 시간대의 도로 위험도를 Mapbox Vector Tile(레이어: road_risk)로 반환합니다.
+    도로가 없는 타일은 204 (No Content)로 응답합니다.
+    """
+    if not (0 <= hour <= 23 and 0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=404, detail="Tile out of range")
+
+    tile = get_risk_tile(hour, z, x, y)
+    if tile is None:
+        return Response(status_code=204, headers={"Cache-Control": "public, max-age=3600"})
+
+    # 브라우저/CDN 캐시용 (데이터가 바뀌면 타일 내용과 함께 ETag도 바뀜)
+    etag = '"' + hashlib.md5(tile).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=3600"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=tile, media_type="application/vnd.mapbox-vector-tile", headers=headers)
+
+@router.post("/tiles/seed")
+def seed_risk_tiles(
+    zooms: str = Query(",".join(str(z) for z in SEED_ZOOMS), description="미리 생성할 zoom 목록 (쉼표 구분)"),
+    hour: Optional[int] = Query(None, ge=0, le=23, description="특정 시간대만 생성 (생략 시 전체)"),
+):
+    """
+    도로 데이터 영역의 타일을 미리 생성하여 캐시에 채웁니다.
+    """
+    try:
+        zoom_list = [int(z) for z in zooms.split(",") if z.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="zooms must be comma separated integers")
+    if any(z < 0 or z > MAX_ZOOM for z in zoom_list):
+        raise HTTPException(status_code=400, detail=f"zoom must be between 0 and {MAX_ZOOM}")
+
+    hours = [hour] if hour is not None else range(24)
+    return {"seeded_tiles": seed_tiles(hours, zoom_list), **risk_cache.stats(), **tile_cache.stats()}
+
+@router.get("/cache/stats")
+def get_cache_stats():
+    """
+    위험도 응답 캐시의 버전, 적중/미스 횟수를 조회합니다. (MVT 타일 캐시 포함)
+    """
+    return {**risk_cache.stats(), **tile_cache.stats()}
+
+@router.post("/cache/invalidate")
+def invalidate_cache(hour: Optional[int] = Query(None, ge=0, le=23, description="무효화할 시간대 (생략 시 전체)")):
+    """
+    캐시를 무효화합니다. hour 생략 시 데이터 버전을 올려 전체 시간대를 비웁니다.
+    """
+    risk_cache.invalidate(hour)
+    return risk_cache.stats()
+
+@router.post("/cache/refresh")
+def refresh_cache():
+    """
+    COM_Location 재적재(save_to_db.py) 후 호출: 전체 무효화 후 24개 시간대를 다시 생성합니다.
+    """
+    built = risk_cache.refresh()
+    warm_derived()
+    return {"built_hours": built, **risk_cache.stats()}
+
+@router.get("/analytics/summary")
+def get_dong_summary(
+    hour: Optional[int] = Query(None, ge=0, le=23, description="시간대 (생략 시 24개 시간대)"),
+    dong: Optional[str] = Query(None, description="행정동 (생략 시 hour 지정이면 동별, 아니면 전체 합계)"),
+):
+    """
+    행정동/시간대별 등급별 도로 수, 평균/최대 위험도를 조회합니다. (미리 계산된 큐브에서 조회)
+    """
+    cube = get_risk_cube()
+    if cube is None:
+        return {"hour": hour, "dong": dong, "data": []}
+    if not cube.has_dong(dong):
+        raise HTTPException(status_code=404, detail=f"Unknown dong: {dong}")
+    return {"hour": hour, "dong": dong, "dongs": cube.dongs, "data": cube.summary(dong, hour)}
+
+@router.get("/analytics/top")
+def get_top_roads(
+    hour: int = Query(..., ge=0, le=23, description="시간대 (0~23)"),
+    dong: Optional[str] = Query(None, description="행정동 (생략 시 전체)"),
+    k: int = Query(10, ge=1, le=TOP_K, description=f"반환할 도로 수 (최대 {TOP_K})"),
+):
+    """
+    시간대(와 행정동)별 위험도 상위 k개 도로를 조회합니다. (미리 정렬된 목록에서 조회)
+    """
+    cube = get_risk_cube()
+    if cube is None:
+        return {"hour": hour, "dong": dong, "count": 0, "data": []}
+    if not cube.has_dong(dong):
+        raise HTTPException(status_code=404, detail=f"Unknown dong: {dong}")
+    data = cube.top(hour, dong, k)
+    return {"hour": hour, "dong": dong, "count": len(data), "data": data}
+
+@router.get("/scoring/weights")
+def get_scoring_weights():
+    """
+    캐시(기본 응답)에 적용 중인 가중치를 조회합니다. (active가 null이면 저장된 risk_score 사용)
+    """
+    active = get_active_weights()
+    return {
+        "active": weights_dict(active) if active is not None else None,
+        "default": weights_dict(DEFAULT_WEIGHTS),
+    }
+
+@router.post("/scoring/weights")
+def set_scoring_weights(
+    weights: Optional[str] = Query(None, description="적용할 가중치 (생략 시 저장된 risk_score로 복원)"),
+):
+    """
+    가중치를 바꿔 24개 시간대의 risk_score/risk_level을 다시 계산하고 캐시를 갱신합니다. (DB는 변경하지 않음)
+    """
+    try:
+        weight_values = parse_weights(weights) if weights else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    built = rescore_cache(weight_values)
+    return {"built_hours": built, **get_scoring_weights(), **risk_cache.stats()}
+
 @router.get("/")
 def m1_info():
     return {
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional, Any, Dict
+from pydantic import BaseModel, Field
+from typing import List, Optional, Any, Dict, Union
 
 class RoadRiskItem(BaseModel):
     unique_road_id: int
@@ -13,4 +13,74 @@ class RiskResponse(BaseModel):
     count: int
     data: List[RoadRiskItem]
 
+class CompactRiskResponse(BaseModel):
+    """/m1/risk?format=compact 응답 (형식 설명: m1/README.md)"""
+    format: str
+    hour: int
+    count: int
+    precision: int
+    level_names: List[str]
+    unique_road_id: List[int]
+    name: List[Optional[str]]
+    risk_score: List[float]
+    risk_level: List[int]       # level_names의 인덱스
+    geometry_index: List[int]   # geometries의 인덱스
+    geometries: List[Union[str, List[str]]]   # Google Encoded Polyline (precision 자리), MultiLineString은 조각별 리스트
+
+class TimelineResponse(BaseModel):
+    """/m1/risk/timeline 응답: 도로 목록과 geometry는 1번, 시간대별 값은 [hour][도로] 행렬 (형식 설명: m1/README.md)"""
+    format: str
+    hours: List[int]
+    count: int
+    precision: int
+    level_names: List[str]
+    unique_road_id: List[int]
+    name: List[Optional[str]]
+    segment_road: List[int]       # 조각별 도로 위치 (unique_road_id의 인덱스)
+    segment_geometry: List[int]   # 조각별 geometries의 인덱스
+    geometries: List[Union[str, List[str]]]
+    risk_score: List[List[Optional[float]]]   # 해당 시간대에 데이터가 없으면 null
+    risk_level: List[List[int]]               # level_names의 인덱스, 데이터가 없으면 -1
+
+class RiskDiffResponse(BaseModel):
+    """/m1/risk/diff 응답: from -> to 시간대에서 점수/등급이 바뀐 도로만 (to 시간대 값)"""
+    from_hour: int = Field(alias="from")
+    to: int
+    count: int                  # 바뀐 도로 수
+    total: int                  # to 시간대 전체 도로 수
+    level_names: List[str]
+    unique_road_id: List[int]
+    risk_score: List[float]
+    risk_level: List[int]       # level_names의 인덱스
+    removed: List[int]          # to 시간대에 없는 도로
+
+class LatLng(BaseModel):
+    lat: float
+    lng: float
 
+class RouteRiskRequest(BaseModel):
+    """/m1/route/risk 요청 (path: /m2/route 응답의 path와 같은 형식)"""
+    hour: int
+    path: List[LatLng]
+    buffer_m: Optional[float] = None    # 경로 구간과 도로의 최대 매칭 거리 (m)
+
+class RouteRiskSegment(BaseModel):
+    index: int                          # path[index] -> path[index + 1] 구간
+    length_m: float
+    unique_road_id: Optional[int] = None   # 매칭된 도로 (buffer 안에 도로가 없으면 null)
+    name: Optional[str] = None
+    risk_score: Optional[float] = None
+    risk_level: Optional[str] = None
+    distance_m: Optional[float] = None
+
+class RouteRiskResponse(BaseModel):
+    hour: int
+    count: int
+    buffer_m: float
+    length_m: float
+    matched_length_m: float
+    cumulative_risk: float              # Σ(구간 위험도 × 구간 길이 km)
+    mean_risk: Optional[float] = None   # 매칭된 길이 기준 가중 평균
+    max_risk: Optional[float] = None
+    max_level: Optional[str] = None
+    segments: List[RouteRiskSegment]
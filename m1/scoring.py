@@ -0,0 +1,110 @@
+"""
+M1 위험도 재계산 (가중치 변경 / what-if 분석)
+
+    risk_score = Σ weight * component   (component: road_risk_final.csv의 *_score_norm, 0~1)
+
+CSV의 risk_score는 DEFAULT_WEIGHTS(length 0.10, width 0.30, slope 0.35, density 0.25)로 계산된 값입니다.
+구성 점수는 DB(COM_Location)에 없으므로 CSV에서 (시간대, 도로, 구성요소) 배열로 한 번만 읽어 두고,
+가중치가 바뀌면 행렬곱 한 번으로 전체 도로-시간대 점수를 다시 계산합니다.
+"""
+import threading
+import numpy as np
+import pandas as pd
+
+from .loader import get_csv_path
+
+COMPONENTS = ("length", "width", "slope", "density")
+COMPONENT_COLUMNS = tuple(f"{name}_score_norm" for name in COMPONENTS)
+DEFAULT_WEIGHTS = np.array([0.10, 0.30, 0.35, 0.25])
+HOURS = 24
+
+_component_scores = None
+_component_scores_lock = threading.Lock()
+# 캐시된 시간대에 적용 중인 가중치 (None: DB/스냅샷에 저장된 risk_score 그대로 사용)
+_active_weights = None
+
+def parse_weights(value: str) -> np.ndarray:
+    """
+    가중치 문자열을 합이 1인 배열(COMPONENTS 순서)로 변환합니다.
+    - "0.1,0.3,0.35,0.25" (length, width, slope, density 순서)
+    - "width=0.5,density=0.5" (이름 지정, 생략한 항목은 0)
+    """
+    try:
+        parts = [p.strip() for p in value.split(",") if p.strip()]
+        if parts and all("=" in p for p in parts):
+            weights = np.zeros(len(COMPONENTS))
+            for part in parts:
+                name, raw = (v.strip() for v in part.split("=", 1))
+                weights[COMPONENTS.index(name)] = float(raw)
+        else:
+            weights = np.array([float(p) for p in parts])
+    except ValueError:
+        raise ValueError(f"weights must be 4 numbers or name=value pairs ({', '.join(COMPONENTS)})")
+
+    if len(weights) != len(COMPONENTS):
+        raise ValueError(f"weights must have {len(COMPONENTS)} values ({', '.join(COMPONENTS)})")
+    if not np.isfinite(weights).all() or (weights < 0).any() or weights.sum() <= 0:
+        raise ValueError("weights must be non-negative with a positive sum")
+    return weights / weights.sum()
+
+def weights_dict(weights) -> dict:
+    return {name: round(float(w), 6) for name, w in zip(COMPONENTS, weights)}
+
+
+def _round(scores: np.ndarray) -> np.ndarray:
+    # 부동소수점 오차(0.39999999...)로 등급 경계(0.4/0.6/0.8)가 바뀌지 않도록 반올림
+    return np.round(scores, 12)
+
+
+class ComponentScores:
+    """
+    (시간대, 도로) 별 구성 점수 배열 values[hour, road_pos, component]
+    road_pos는 unique_road_id 오름차순 위치입니다. (데이터가 없으면 NaN)
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.road_ids = np.unique(df['unique_road_id'].to_numpy(np.int64))
+        self.values = np.full((HOURS, len(self.road_ids), len(COMPONENTS)), np.nan)
+        pos = np.searchsorted(self.road_ids, df['unique_road_id'].to_numpy(np.int64))
+        self.values[df['hour'].to_numpy(np.int64), pos] = df[list(COMPONENT_COLUMNS)].to_numpy(np.float64)
+
+    def __len__(self):
+        return int(np.isfinite(self.values[..., 0]).sum())
+
+    def score(self, weights) -> np.ndarray:
+        """전체 (시간대, 도로) 점수를 한 번에 계산합니다."""
+        return _round(self.values @ np.asarray(weights, dtype=np.float64))
+
+    def rescore(self, hour: int, road_ids, scores, weights) -> np.ndarray:
+        """한 시간대의 행별 점수를 가중치로 다시 계산합니다. (구성 점수가 없는 행은 기존 점수 유지)"""
+        road_ids = np.asarray(road_ids, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.road_ids, road_ids), len(self.road_ids) - 1)
+        new = _round(self.values[hour, pos] @ np.asarray(weights, dtype=np.float64))
+        valid = (self.road_ids[pos] == road_ids) & np.isfinite(new)
+        return np.where(valid, new, scores)
+
+
+def get_component_scores():
+    """ComponentScores 싱글톤 (CSV가 없으면 None)"""
+    global _component_scores
+    if _component_scores is not None:
+        return _component_scores
+
+    with _component_scores_lock:
+        if _component_scores is None:
+            try:
+                columns = ['unique_road_id', 'hour', *COMPONENT_COLUMNS]
+                _component_scores = ComponentScores(pd.read_csv(get_csv_path(), usecols=columns))
+                print(f"[M1] Component scores loaded: {len(_component_scores)} road-hours")
+            except Exception as e:
+                print(f"[M1] Error loading component scores: {e}")
+                return None
+    return _component_scores
+
+def get_active_weights():
+    return _active_weights
+
+def set_active_weights(weights):
+    """캐시에 적용할 가중치를 바꿉니다. (None: 저장된 risk_score 사용) 캐시 갱신은 호출한 쪽에서 수행"""
+    global _active_weights
+    _active_weights = None if weights is None else np.asarray(weights, dtype=np.float64)
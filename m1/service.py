@@ -1,94 +1,594 @@
+import numpy as np
 import pandas as pd
 import geopandas as gpd
+import shapely
 import json
-from .loader import get_supabase_client, get_road_geometry
+import threading
+from typing import Iterator, List, NamedTuple, Optional
+from fastapi.encoders import jsonable_encoder
+from .loader import (
+    get_supabase_client, get_data_source, get_osmid_index,
+    merge_segments_enabled, normalize_osmid, snapshot_fallback_enabled, OsmidGeometryIndex, SOURCE_SNAPSHOT,
+)
+from .snapshot import get_snapshot
+from .spatial import geometries_to_geojson, get_geometry_index
+from .tiles import SEED_ZOOMS, encode_tile, tile_intersects, tiles_for_bounds
+from .pagination import fetch_all_rows
+from .schemas import RiskResponse, CompactRiskResponse, TimelineResponse, RouteRiskResponse, RiskDiffResponse
+from .encoding import build_compact, build_timeline
+from .cache import RiskCache, TileCache, HOURS
+from .scoring import get_component_scores, get_active_weights, set_active_weights
+from .analytics import RiskCube, diff_hours
+from .route import score_route
+from .export import export_file, prune_exports
 
-def get_risk_by_hour(hour: int):
+# stream=true 응답에서 한 번에 직렬화하는 행 수
+STREAM_CHUNK_ROWS = 1000
+
+# Supabase 클라이언트가 없을 때의 경고 출력 여부 (서버 당 1회)
+_no_client_warned = False
+# 가중치 변경(set_active_weights)과 캐시 재계산을 묶는 잠금
+_rescore_lock = threading.Lock()
+
+# 위험도 등급 (코드 순서: 0 낮음 < 1 중간 < 2 높음 < 3 심각)
+# 0.8 초과 -> 심각, 0.6 이상 -> 높음, 0.4 이상 -> 중간, 나머지 낮음
+RISK_LEVEL_NAMES = np.array(["낮음", "중간", "높음", "심각"])
+
+def parse_osmid(x):
+    """osmid 파싱 (DB에는 JSONB 또는 List로 저장됨, GeoJSON과 같은 형식으로 정규화)"""
+    return normalize_osmid(x)
+
+def risk_codes(scores) -> np.ndarray:
+    """risk_score 배열을 위험도 등급 코드(0~3) 배열로 일괄 변환합니다."""
+    scores = np.asarray(scores, dtype=float)
+    conditions = [scores > 0.8, scores >= 0.6, scores >= 0.4]
+    return np.select(conditions, [3, 2, 1], default=0).astype(np.int8)
+
+def classify_risk(scores) -> np.ndarray:
+    """risk_score 배열을 위험도 등급 문자열 배열로 일괄 변환합니다."""
+    return RISK_LEVEL_NAMES[risk_codes(scores)]
+
+def parse_risk_level(level: str) -> int:
+    """등급 이름(낮음/중간/높음/심각)을 코드로 변환합니다."""
+    matches = np.flatnonzero(RISK_LEVEL_NAMES == level)
+    if len(matches) == 0:
+        raise ValueError(f"risk level must be one of {RISK_LEVEL_NAMES.tolist()}")
+    return int(matches[0])
+
+
+class HourRisk(NamedTuple):
     """
-    특정 시간대의 도로 위험도 데이터(DB)와 좌표 정보(GeoJSON)를 결합하여 반환합니다.
+    한 시간대의 병합 결과 (컬럼 단위)
+    geom_idx는 loader.OsmidGeometryIndex.geometry_array()(= spatial.RoadGeometryIndex)의 인덱스입니다.
+    (0 ~ G-1: 도로 조각, 그 뒤: osmid별 MultiLineString, 도로(unique_road_id)별 MultiLineString)
+    dongs는 행정동 (데이터에 없으면 None)
+    base_scores는 가중치를 적용하기 전 저장된 risk_score (가중치를 적용하지 않았으면 None)
+    """
+    hour: int
+    road_ids: np.ndarray
+    names: List[Optional[str]]
+    scores: np.ndarray
+    geom_idx: np.ndarray
+    dongs: Optional[List[Optional[str]]] = None
+    base_scores: Optional[np.ndarray] = None
+
+    def __len__(self):
+        return len(self.road_ids)
+
+    def take(self, mask) -> "HourRisk":
+        idx = np.flatnonzero(mask).tolist()
+        return HourRisk(
+            self.hour,
+            self.road_ids[idx],
+            [self.names[i] for i in idx],
+            self.scores[idx],
+            self.geom_idx[idx],
+            [self.dongs[i] for i in idx] if self.dongs is not None else None,
+            self.base_scores[idx] if self.base_scores is not None else None,
+        )
+
+    def slice(self, start: int, stop: int) -> "HourRisk":
+        return HourRisk(
+            self.hour,
+            self.road_ids[start:stop],
+            self.names[start:stop],
+            self.scores[start:stop],
+            self.geom_idx[start:stop],
+            self.dongs[start:stop] if self.dongs is not None else None,
+            self.base_scores[start:stop] if self.base_scores is not None else None,
+        )
+
+    def with_scores(self, scores, base_scores=None) -> "HourRisk":
+        """점수만 바꾼 frame (base_scores: 가중치 적용 전 점수, 복원/원래 점수 그대로면 None)"""
+        return HourRisk(self.hour, self.road_ids, self.names, scores, self.geom_idx, self.dongs, base_scores)
+
+
+def _rows_to_frame(rows):
+    df = pd.DataFrame(rows)
+    df['osmid'] = df['osmid'].apply(parse_osmid)
+    return df
+
+def fetch_hour_rows(hour: int):
+    """
+    DB(COM_Location)에서 해당 시간대 데이터를 조회하여 DataFrame으로 반환합니다.
+    조회 실패 또는 데이터가 없으면 None을 반환합니다.
     """
-    # 1. DB에서 해당 시간대 데이터 조회
     supabase = get_supabase_client()
     if supabase is None:
-        return []
+        return None
     
     try:
-        # Supabase select (Pagination)
-        all_data = []
-        start = 0
-        limit = 1000
-        
-        while True:
-            # range(start, end)는 inclusive (start ~ end 포함)
-            response = supabase.table("COM_Location").select("*").eq("hour", hour).range(start, start + limit - 1).execute()
-            data = response.data
-            all_data.extend(data)
-            
-            # 가져온 데이터가 limit보다 적으면 더 이상 데이터가 없다는 뜻
-            if len(data) < limit:
-                break
-            start += limit
-            
-        data = all_data
-        
+        # Supabase select (Pagination, 병렬 조회)
+        data = fetch_all_rows(supabase, "COM_Location", filters={"hour": hour})
         if not data:
-            return []
-            
-        df = pd.DataFrame(data)
-            
-        # 2. osmid 파싱 (DB에는 JSONB 또는 List로 저장됨)
-        def parse_osmid(x):
-            try:
-                if isinstance(x, list) and len(x) > 0:
-                    return str(x[0])
-                elif isinstance(x, str):
-                    # JSON 문자열인 경우
-                    val = json.loads(x)
-                    if isinstance(val, list) and len(val) > 0:
-                        return str(val[0])
-                    return str(val)
-                return str(x)
-            except:
-                return str(x)
-
-        df['osmid'] = df['osmid'].apply(parse_osmid)
+            return None
+        return _rows_to_frame(data)
 
     except Exception as e:
         print(f"[M1] DB Query Error: {e}")
-        return []
+        return None
 
-    # 3. 좌표 데이터 가져오기
-    gdf = get_road_geometry()
-    if gdf is None:
-        return []
+def fetch_all_hour_rows():
+    """
+    COM_Location 전체(24개 시간대)를 한 번에 조회하여 {hour: DataFrame}으로 반환합니다.
+    """
+    supabase = get_supabase_client()
+    if supabase is None:
+        return {}
 
-    # 4. 데이터 병합
-    merged_gdf = gdf[['osmid', 'geometry']].merge(df, on='osmid', how='inner')
-    
-    # 5. 결과 변환
-    results = []
-    
-    for _, row in merged_gdf.iterrows():
-        if row.geometry is None:
+    try:
+        data = fetch_all_rows(supabase, "COM_Location")
+        if not data:
+            return {}
+        df = _rows_to_frame(data)
+        return {int(hour): group.reset_index(drop=True) for hour, group in df.groupby('hour')}
+
+    except Exception as e:
+        print(f"[M1] DB Query Error: {e}")
+        return {}
+
+def join_hour(hour: int, df: pd.DataFrame, index: OsmidGeometryIndex, merge: bool = False) -> HourRisk:
+    """
+    위험도 데이터(df)와 좌표 데이터를 osmid 기준으로 병합합니다.
+    미리 만든 osmid 인덱스에서 배열 gather만 수행합니다. (요청 시 pandas merge 없음)
+    merge=True 이면 여러 조각으로 나뉜 도로를 MultiLineString 한 개로 묶습니다.
+    """
+    row_idx, geom_idx = index.gather(df['osmid'].to_numpy(dtype=object))
+
+    def text_column(column):
+        values = df[column].astype(object) if column in df.columns else pd.Series([None] * len(df), dtype=object)
+        return values.where(values.notna(), None).to_numpy(dtype=object)[row_idx].tolist()
+
+    frame = HourRisk(
+        hour,
+        df['unique_road_id'].to_numpy(np.int64)[row_idx],
+        text_column('name'),
+        df['risk_score'].to_numpy(np.float64)[row_idx],
+        geom_idx.astype(np.int64),
+        text_column('dong'),
+    )
+    return merge_segments(frame, index) if merge else frame
+
+def merge_segments(frame: HourRisk, index: OsmidGeometryIndex) -> HourRisk:
+    """
+    도로(unique_road_id)마다 첫 조각의 행만 남기고 geometry를 그 도로의 MultiLineString으로 바꿉니다.
+    (GeoJSON에 그 도로의 조각이 없으면 osmid별 MultiLineString)
+    """
+    _, first = np.unique(frame.road_ids, return_index=True)
+    keep = np.zeros(len(frame), dtype=bool)
+    keep[first] = True
+    merged = frame.take(keep)
+    return HourRisk(
+        merged.hour, merged.road_ids, merged.names, merged.scores,
+        index.merged_geom_idx(merged.geom_idx, merged.road_ids), merged.dongs, merged.base_scores,
+    )
+
+def frame_items(frame: HourRisk, geojson: list) -> list:
+    """컬럼 단위 데이터를 RoadRiskItem 형태의 dict 리스트로 변환합니다."""
+    columns = zip(
+        frame.road_ids.tolist(),
+        frame.names,
+        frame.scores.tolist(),
+        classify_risk(frame.scores).tolist(),
+        [geojson[i] for i in frame.geom_idx.tolist()],
+    )
+    return [
+        {
+            "unique_road_id": road_id,
+            "name": name,
+            "risk_score": score,
+            "risk_level": level,
+            "geometry": geometry,
+        }
+        for road_id, name, score, level, geometry in columns
+    ]
+
+def build_risk_items(df: pd.DataFrame, gdf: gpd.GeoDataFrame) -> list:
+    """
+    위험도 데이터(df)와 좌표 데이터(gdf)를 osmid 기준으로 병합하여 응답 항목 리스트를 만듭니다.
+    등급 분류와 좌표 변환은 컬럼 단위로 일괄 처리합니다.
+    """
+    index = OsmidGeometryIndex(gdf)
+    frame = join_hour(-1, df, index)
+    return frame_items(frame, geometries_to_geojson(index.geometry_array()))
+
+def snapshot_hour_frame(hour: int) -> Optional[HourRisk]:
+    """
+    로컬 스냅샷(m1/data/snapshot)에서 시간대별 병합 결과를 조회합니다. (DB 조회/병합 없음)
+    """
+    snapshot = get_snapshot()
+    if snapshot is None:
+        return None
+
+    road_ids, names, scores, geom_idx, dongs = snapshot.hour_columns(hour)
+    if len(road_ids) == 0:
+        return None
+    frame = HourRisk(hour, road_ids, names, scores, geom_idx.astype(np.int64), dongs)
+    if merge_segments_enabled():
+        index = get_osmid_index()
+        if index is None:
+            return None
+        frame = merge_segments(frame, index)
+    return frame
+
+def use_snapshot() -> bool:
+    """
+    스냅샷 모드이면 스냅샷을 사용합니다.
+    supabase 모드에서 클라이언트를 만들 수 없으면 M1_SNAPSHOT_FALLBACK=1 일 때만 스냅샷을 사용합니다.
+    """
+    global _no_client_warned
+    if get_data_source() == SOURCE_SNAPSHOT:
+        return True
+    if get_supabase_client() is not None:
+        return False
+
+    fallback = snapshot_fallback_enabled()
+    if not _no_client_warned:
+        _no_client_warned = True
+        if fallback:
+            print("[M1] WARNING: Supabase client unavailable, serving LOCAL SNAPSHOT data (M1_SNAPSHOT_FALLBACK=1)")
+        else:
+            print("[M1] ERROR: Supabase client unavailable, /m1 responses will be empty "
+                  "(set M1_DATA_SOURCE=snapshot or M1_SNAPSHOT_FALLBACK=1 to serve local data)")
+    return fallback
+
+def apply_weights(frame: Optional[HourRisk], weights) -> Optional[HourRisk]:
+    """
+    가중치(scoring.COMPONENTS 순서)로 risk_score를 다시 계산한 frame을 반환합니다.
+    이미 가중치를 적용한 frame도 저장된 risk_score(base_scores)에서 다시 계산하며,
+    weights=None이면 저장된 risk_score로 복원합니다.
+    """
+    if frame is None:
+        return frame
+    base = frame.base_scores if frame.base_scores is not None else frame.scores
+    if weights is None:
+        return frame if frame.base_scores is None else frame.with_scores(base)
+    components = get_component_scores()
+    if components is None:
+        return frame
+    return frame.with_scores(components.rescore(frame.hour, frame.road_ids, base, weights), base)
+
+def db_hour_frame(hour: int) -> Optional[HourRisk]:
+    """DB(COM_Location)의 시간대 데이터와 좌표 정보를 결합합니다."""
+    # 1. DB에서 해당 시간대 데이터 조회
+    df = fetch_hour_rows(hour)
+    if df is None:
+        return None
+
+    # 2. osmid -> geometry 인덱스 가져오기
+    index = get_osmid_index()
+    if index is None:
+        return None
+
+    # 3. 병합
+    frame = join_hour(hour, df, index, merge_segments_enabled())
+    return frame if len(frame) > 0 else None
+
+def load_hour_frame(hour: int) -> Optional[HourRisk]:
+    """
+    특정 시간대의 도로 위험도 데이터(DB 또는 스냅샷)와 좌표 정보를 결합합니다.
+    가중치가 설정되어 있으면(scoring.set_active_weights) risk_score를 다시 계산합니다.
+    데이터가 없으면 None을 반환합니다.
+    """
+    frame = snapshot_hour_frame(hour) if use_snapshot() else db_hour_frame(hour)
+    return apply_weights(frame, get_active_weights())
+
+def load_all_hour_frames(hours) -> dict:
+    """
+    COM_Location을 한 번에 조회하여 여러 시간대의 병합 결과를 만듭니다. (캐시 warm-up용)
+    """
+    weights = get_active_weights()
+    if use_snapshot():
+        frames = {hour: snapshot_hour_frame(hour) for hour in hours}
+        return {hour: apply_weights(frame, weights) for hour, frame in frames.items() if frame is not None}
+
+    index = get_osmid_index()
+    if index is None:
+        return {}
+
+    merge = merge_segments_enabled()
+    rows = fetch_all_hour_rows()
+    frames = {}
+    for hour in hours:
+        df = rows.get(hour)
+        if df is None:
             continue
-            
-        risk_level = "중간"
-        # risk_level 컬럼이 없으면 점수로 계산
-        score = row['risk_score']
-        
-        if score > 0.8: risk_level = "심각" # 0.8 초과 -> 진한 빨강
-        elif score >= 0.6: risk_level = "높음"
-        elif score >= 0.4: risk_level = "중간"
-        else: risk_level = "낮음"
-            
-        results.append({
-            "unique_road_id": row['unique_road_id'],
-            "name": row['name'] if pd.notna(row['name']) else None,
-            "risk_score": row['risk_score'],
-            "risk_level": risk_level,
-            "geometry": row.geometry.__geo_interface__
-        })
-        
-    return results
+        frame = join_hour(hour, df, index, merge)
+        if len(frame) > 0:
+            frames[hour] = apply_weights(frame, weights)
+    return frames
+
+def rescore_cache(weights) -> int:
+    """
+    캐시에 적용할 가중치를 바꾸고 캐시된 시간대의 risk_score만 다시 계산합니다. (weights=None: 저장된 risk_score로 복원)
+    DB 재조회/geometry 병합 없이 캐시된 frame에 행렬곱 결과만 바꿔 넣고 데이터 버전을 올립니다.
+    캐시에 없는 시간대와 응답 본문은 첫 요청 시 새 가중치로 생성합니다. 다시 계산한 시간대 수를 반환합니다.
+    """
+    # 가중치 변경과 캐시 갱신을 한 번에 (동시 요청이 서로 다른 가중치를 섞지 않도록)
+    with _rescore_lock:
+        set_active_weights(weights)
+        rescored = risk_cache.rebuild(lambda frame: apply_weights(frame, weights))
+    warm_derived()
+    return rescored
+
+def warm_derived():
+    """캐시 갱신 직후 여러 시간대를 합쳐 만드는 결과(동/시간대 큐브, 인접 시간대 diff)를 미리 생성합니다."""
+    get_risk_cube()
+    get_adjacent_diffs()
+
+def build_risk_cube() -> Optional[RiskCube]:
+    """캐시된 24개 시간대 병합 결과로 동/시간대 요약 큐브를 만듭니다."""
+    frames = {hour: risk_cache.get_frame(hour) for hour in HOURS}
+    frames = {hour: frame for hour, frame in frames.items() if frame is not None}
+    if not frames:
+        return None
+    cube = RiskCube(frames, risk_codes, RISK_LEVEL_NAMES.tolist())
+    print(f"[M1] Risk cube built: {len(cube.dongs)} dongs x {len(frames)} hours")
+    return cube
+
+def get_risk_cube() -> Optional[RiskCube]:
+    """동/시간대 요약 큐브 (캐시 무효화 시 함께 다시 생성)"""
+    return risk_cache.get_derived(("cube",), build_risk_cube)
+
+def get_risk_by_hour(hour: int):
+    """
+    특정 시간대의 도로 위험도 데이터(DB)와 좌표 정보(GeoJSON)를 결합하여 반환합니다.
+    """
+    frame = load_hour_frame(hour)
+    index = get_geometry_index()
+    if frame is None or index is None:
+        return []
+    return frame_items(frame, index.geojson())
+
+def encode_json(payload) -> bytes:
+    """FastAPI JSONResponse와 동일한 형식으로 JSON을 인코딩합니다."""
+    return json.dumps(
+        jsonable_encoder(payload),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+def render_frame(frame: HourRisk, tier: int = 0) -> bytes:
+    """병합 결과를 RiskResponse 검증 후 JSON bytes로 인코딩합니다. (tier: 좌표 단순화 단계)"""
+    index = get_geometry_index()
+    data = frame_items(frame, index.geojson(tier)) if index is not None else []
+    response = RiskResponse(hour=frame.hour, count=len(data), data=data)
+    return encode_json(response)
+
+def render_compact(frame: HourRisk, variant) -> bytes:
+    """병합 결과를 compact 형식(병렬 배열 + encoded polyline)으로 인코딩합니다."""
+    _, tier = variant
+    index = get_geometry_index()
+    polylines = index.polylines(tier) if index is not None else []
+    payload = build_compact(frame, risk_codes(frame.scores), RISK_LEVEL_NAMES.tolist(), polylines)
+    return encode_json(CompactRiskResponse(**payload))
+
+def get_compact_risk(hour: int, tier: int = 0) -> Optional[bytes]:
+    return risk_cache.get(hour, ("compact", tier), renderer=render_compact)
+
+def filter_frame(frame: HourRisk, bbox=None, min_level: Optional[int] = None) -> Optional[HourRisk]:
+    """viewport(bbox) / 최소 등급 조건에 맞는 행만 남깁니다."""
+    if bbox is None and min_level is None:
+        return frame
+
+    mask = np.ones(len(frame), dtype=bool)
+    if bbox is not None:
+        index = get_geometry_index()
+        if index is None:
+            return None
+        mask &= index.bbox_mask(bbox)[frame.geom_idx]
+    if min_level is not None:
+        mask &= risk_codes(frame.scores) >= min_level
+    return frame.take(mask)
+
+def query_risk(hour: int, bbox=None, min_level: Optional[int] = None, tier: int = 0, compact: bool = False,
+               weights=None) -> Optional[bytes]:
+    """
+    viewport(bbox) / 최소 등급 조건으로 필터링한 응답을 생성합니다.
+    시간대 데이터는 캐시를 사용하고, 필터링 결과만 매번 직렬화합니다.
+    weights 지정 시 캐시된 데이터의 risk_score를 해당 가중치로 다시 계산합니다. (캐시는 그대로)
+    """
+    frame = apply_weights(risk_cache.get_frame(hour), weights)
+    if frame is None:
+        return None
+
+    frame = filter_frame(frame, bbox, min_level)
+    if frame is None:
+        return None
+    if compact:
+        return render_compact(frame, ("compact", tier))
+    return render_frame(frame, tier)
+
+def iter_ndjson(frame: HourRisk, tier: int = 0, chunk_rows: int = STREAM_CHUNK_ROWS) -> Iterator[bytes]:
+    """
+    병합 결과를 NDJSON(한 줄 = RoadRiskItem 1개)으로 chunk_rows 행씩 직렬화합니다.
+    전체 응답 리스트를 만들지 않으므로 첫 바이트가 바로 전송되고 메모리 사용량이 일정합니다.
+    """
+    index = get_geometry_index()
+    if index is None:
+        return
+    geojson = index.geojson(tier)
+    for start in range(0, len(frame), chunk_rows):
+        items = frame_items(frame.slice(start, start + chunk_rows), geojson)
+        lines = [json.dumps(item, ensure_ascii=False, allow_nan=False, separators=(",", ":")) for item in items]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+def stream_risk(hour: int, bbox=None, min_level: Optional[int] = None, tier: int = 0, weights=None):
+    """
+    stream=true 응답: (항목 수, NDJSON chunk generator)를 반환합니다. 데이터가 없으면 (0, 빈 generator)
+    """
+    frame = apply_weights(risk_cache.get_frame(hour), weights)
+    if frame is not None:
+        frame = filter_frame(frame, bbox, min_level)
+    if frame is None:
+        return 0, iter(())
+    return len(frame), iter_ndjson(frame, tier)
+
+def render_timeline(tier: int = 0, weights=None) -> Optional[bytes]:
+    """
+    24개 시간대의 병합 결과(캐시)를 합쳐 도로 목록/geometry 1벌 + (시간대, 도로) 위험도 행렬로 인코딩합니다.
+    도로(열) 위치는 unique_road_id 오름차순이며, 조각(segment)마다 도로 위치와 geometry를 가집니다.
+    """
+    index = get_geometry_index()
+    frames = {hour: apply_weights(risk_cache.get_frame(hour), weights) for hour in HOURS}
+    frames = {hour: frame for hour, frame in frames.items() if frame is not None}
+    if index is None or not frames:
+        return None
+
+    hours = sorted(frames)
+    road_ids = np.concatenate([frames[h].road_ids for h in hours])
+    names = [name for h in hours for name in frames[h].names]
+    roads, first = np.unique(road_ids, return_index=True)
+
+    # 조각 = (도로 위치, geometry) 쌍
+    pairs = np.column_stack([
+        np.searchsorted(roads, road_ids),
+        np.concatenate([frames[h].geom_idx for h in hours]),
+    ])
+    segments = np.unique(pairs, axis=0)
+
+    # 도로마다 시간대별 점수 1개 (데이터가 없으면 NaN -> 응답에서 null)
+    scores = np.full((len(HOURS), len(roads)), np.nan)
+    for hour in hours:
+        frame = frames[hour]
+        scores[hour, np.searchsorted(roads, frame.road_ids)] = frame.scores
+
+    payload = build_timeline(
+        list(HOURS), roads, [names[i] for i in first.tolist()], segments[:, 0], segments[:, 1],
+        scores, risk_codes(scores), RISK_LEVEL_NAMES.tolist(), index.polylines(tier),
+    )
+    return encode_json(TimelineResponse(**payload))
+
+def empty_timeline() -> bytes:
+    """데이터가 없을 때의 timeline 응답 (TimelineResponse의 모든 필드, 빈 목록)"""
+    payload = build_timeline(
+        [], [], [], [], [], np.empty((0, 0)), np.empty((0, 0), dtype=np.int8), RISK_LEVEL_NAMES.tolist(), [],
+    )
+    return encode_json(TimelineResponse(**payload))
+
+def get_timeline(tier: int = 0, weights=None) -> Optional[bytes]:
+    """timeline 응답 (캐시 무효화 시 함께 다시 생성, weights 지정 시에는 캐시하지 않음)"""
+    if weights is not None:
+        return render_timeline(tier, weights)
+    return risk_cache.get_derived(("timeline", tier), lambda: render_timeline(tier))
+
+def get_route_risk(hour: int, coords, buffer_m: float, weights=None) -> Optional[bytes]:
+    """
+    경로 coords([lng, lat] 목록)를 따라 hour 시간대의 도로 위험도를 누적한 응답을 만듭니다.
+    데이터가 없으면 None을 반환합니다.
+    """
+    frame = apply_weights(risk_cache.get_frame(hour), weights)
+    index = get_geometry_index()
+    if frame is None or index is None:
+        return None
+    payload = score_route(frame, index, coords, risk_codes(frame.scores), RISK_LEVEL_NAMES.tolist(), buffer_m)
+    return encode_json(RouteRiskResponse(**payload))
+
+def render_diff(from_hour: int, to_hour: int) -> Optional[bytes]:
+    """from -> to 시간대에서 점수/등급이 바뀐 도로만 인코딩합니다. (캐시된 시간대 데이터 사용)"""
+    before = risk_cache.get_frame(from_hour)
+    after = risk_cache.get_frame(to_hour)
+    if before is None or after is None:
+        return None
+    payload = diff_hours(before, after, risk_codes, RISK_LEVEL_NAMES.tolist())
+    return encode_json(RiskDiffResponse(**payload))
+
+def build_adjacent_diffs() -> dict:
+    """인접 시간대(h <-> h+1, 23 <-> 0) diff 48개를 한 번에 만듭니다."""
+    diffs = {}
+    for hour in HOURS:
+        after = (hour + 1) % len(HOURS)
+        for pair in ((hour, after), (after, hour)):
+            body = render_diff(*pair)
+            if body is not None:
+                diffs[pair] = body
+    return diffs
+
+def get_adjacent_diffs() -> dict:
+    return risk_cache.get_derived(("diff", "adjacent"), build_adjacent_diffs)
+
+def get_risk_diff(from_hour: int, to_hour: int) -> Optional[bytes]:
+    """
+    시간대 diff 응답. 인접 시간대는 미리 만든 결과를, 그 외는 요청 시 만든 결과를 캐시하여 반환합니다.
+    """
+    body = get_adjacent_diffs().get((from_hour, to_hour))
+    if body is not None:
+        return body
+    return risk_cache.get_derived(("diff", from_hour, to_hour), lambda: render_diff(from_hour, to_hour))
+
+def get_export(hours, fmt: str) -> Optional[str]:
+    """
+    hours 시간대의 병합 결과(캐시)를 fmt(fgb/gpkg) 파일로 내보내고 경로를 반환합니다.
+    파일은 데이터 버전마다 한 번만 생성되며, 경로는 캐시 무효화 전까지 보관합니다.
+    (이전 버전 파일은 요청 처리 중이 아니라 캐시 무효화 시 prune_exports로 정리)
+    데이터가 없으면 None을 반환합니다.
+    """
+    hours = tuple(hours)
+
+    def build():
+        index = get_geometry_index()
+        frames = {hour: risk_cache.get_frame(hour) for hour in hours}
+        frames = {hour: frame for hour, frame in frames.items() if frame is not None}
+        if index is None or not frames:
+            return None
+        return export_file(frames, index.geoms, fmt, classify_risk)
+
+    return risk_cache.get_derived(("export", fmt, hours), build)
+
+def get_risk_tile(hour: int, z: int, x: int, y: int) -> Optional[bytes]:
+    """
+    시간대별 도로 위험도 MVT 타일을 반환합니다. 빈 타일(도로 영역 밖 포함)은 None.
+    (hour, z, x, y) 단위로 tile_cache에 보관하며 데이터 버전이 바뀌면 함께 무효화됩니다.
+    """
+    index = get_geometry_index()
+    # 도로 영역 밖 타일은 캐시/조회 없이 빈 타일
+    if index is None or not tile_intersects(index.bounds, z, x, y):
+        return None
+
+    def build():
+        frame = risk_cache.get_frame(hour)
+        if frame is None:
+            return None
+        return encode_tile(frame, classify_risk(frame.scores).tolist(), index, z, x, y)
+
+    return tile_cache.get((hour, z, x, y), build)
+
+def seed_tiles(hours=HOURS, zooms=SEED_ZOOMS) -> int:
+    """도로 데이터 영역을 덮는 타일을 미리 생성합니다. 생성(또는 확인)한 비어 있지 않은 타일 수를 반환."""
+    index = get_geometry_index()
+    if index is None:
+        return 0
+    tiles = [(z, x, y) for z in zooms for x, y in tiles_for_bounds(index.bounds, z)]
 
+    seeded = 0
+    for hour in hours:
+        for z, x, y in tiles:
+            if get_risk_tile(hour, z, x, y) is not None:
+                seeded += 1
+    return seeded
 
+# 시간대별 응답 캐시 (COM_Location 갱신 시 /m1/cache/refresh 호출)
+risk_cache = RiskCache(load_hour_frame, render_frame, load_all_hour_frames, on_invalidate=prune_exports)
+# MVT 타일 캐시 (크기 제한 LRU, risk_cache가 무효화되면 함께 비움)
+tile_cache = TileCache(lambda: risk_cache.stamp())
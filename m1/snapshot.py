@@ -0,0 +1,247 @@
+"""
+M1 오프라인 스냅샷
+
+로컬 CSV(road_risk_final.csv)와 GeoJSON(roads_cleaned_filtered.geojson)을 한 번 컴파일하여
+memory-map 가능한 numpy(.npy) 배열로 저장합니다. 정규화된 osmid 기준으로 미리 병합하고
+시간대별로 파티션하므로, 요청 시에는 배열 슬라이스만으로 /m1/risk 응답을 만들 수 있습니다.
+
+    python -m m1.snapshot            # m1/data/snapshot 생성
+    M1_DATA_SOURCE=snapshot          # 스냅샷만으로 서비스 (Supabase 불필요)
+    M1_SNAPSHOT_COMPILE=1            # 없거나 원본과 다른 스냅샷을 서버에서 다시 컴파일 (기본: 사용 안 함)
+
+로드 시 meta.json의 원본 sha1을 현재 CSV/GeoJSON과 비교하여, 원본이 바뀐 스냅샷은 사용하지 않습니다.
+(원본 파일이 없는 배포 환경에서는 비교를 생략)
+
+디렉토리 구성
+    meta.json           포맷 버전, 원본 파일 sha1, 개수 정보
+    attributes.json     문자열 컬럼 (road_osmid, road_name, road_dong, geom_osmid)
+    road_ids.npy        (R,)   int64    도로(CSV) 고유 ID
+    geom_road_ids.npy   (G,)   int64    GeoJSON feature의 unique_road_id
+    geom_coords.npy     (P, 2) float64  전체 LineString 좌표 (EPSG:4326)
+    geom_offsets.npy    (G+1,) int64    geometry i의 좌표 = coords[offsets[i]:offsets[i+1]]
+    hour_offsets.npy    (25,)  int64    시간대 h의 행 = rows[hour_offsets[h]:hour_offsets[h+1]]
+    rows_geom.npy       (N,)   int32    병합 결과 행의 geometry 인덱스
+    rows_road.npy       (N,)   int32    병합 결과 행의 도로 인덱스
+    rows_score.npy      (N,)   float64  병합 결과 행의 risk_score
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+import shapely
+
+from .loader import DATA_DIR, get_csv_path, get_geojson_path, normalize_osmid, read_road_geometry, snapshot_compile_enabled
+
+FORMAT_VERSION = 1
+HOURS = 24
+
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+def get_snapshot_dir():
+    return os.getenv("M1_SNAPSHOT_DIR", os.path.join(DATA_DIR, "snapshot"))
+
+def _sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _none_if_nan(values):
+    return [None if pd.isna(v) else v for v in values]
+
+def compile_snapshot(csv_path=None, geojson_path=None, out_dir=None):
+    """CSV + GeoJSON을 병합/파티션하여 스냅샷 디렉토리에 저장하고, 경로를 반환합니다."""
+    csv_path = csv_path or get_csv_path()
+    geojson_path = geojson_path or get_geojson_path()
+    out_dir = out_dir or get_snapshot_dir()
+    t0 = time.time()
+
+    # 1. 도로 위험도 (save_to_db.py와 동일한 osmid 전처리 후 정규화)
+    df = pd.read_csv(csv_path, dtype={'osmid': str})
+    df['osmid'] = df['osmid'].apply(normalize_osmid)
+    roads = df.drop_duplicates('unique_road_id').sort_values('unique_road_id').reset_index(drop=True)
+    road_index = pd.Series(np.arange(len(roads)), index=roads['unique_road_id'])
+
+    # 2. 도로 좌표 (EPSG:4326, LineString만 사용)
+    gdf = read_road_geometry(geojson_path).reset_index(drop=True)
+    geoms = gdf.geometry.values
+    if not (shapely.get_type_id(geoms) == 1).all():
+        raise ValueError("snapshot only supports LineString geometries")
+    coords = shapely.get_coordinates(geoms)
+    offsets = np.concatenate([[0], np.cumsum(shapely.get_num_coordinates(geoms))]).astype(np.int64)
+
+    # 3. 시간대별 병합 (서비스의 osmid 병합과 동일한 순서를 유지)
+    geo_keys = pd.DataFrame({'osmid': gdf['osmid'], 'geom_idx': np.arange(len(gdf))})
+    hour_offsets = [0]
+    rows_geom, rows_road, rows_score = [], [], []
+    for hour in range(HOURS):
+        hour_df = df.loc[df['hour'] == hour, ['osmid', 'unique_road_id', 'risk_score']]
+        merged = geo_keys.merge(hour_df, on='osmid', how='inner')
+        rows_geom.append(merged['geom_idx'].to_numpy(np.int32))
+        rows_road.append(road_index.loc[merged['unique_road_id']].to_numpy(np.int32))
+        rows_score.append(merged['risk_score'].to_numpy(np.float64))
+        hour_offsets.append(hour_offsets[-1] + len(merged))
+
+    os.makedirs(out_dir, exist_ok=True)
+    arrays = {
+        "road_ids": roads['unique_road_id'].to_numpy(np.int64),
+        "geom_road_ids": gdf['unique_road_id'].to_numpy(np.int64),
+        "geom_coords": coords,
+        "geom_offsets": offsets,
+        "hour_offsets": np.asarray(hour_offsets, dtype=np.int64),
+        "rows_geom": np.concatenate(rows_geom),
+        "rows_road": np.concatenate(rows_road),
+        "rows_score": np.concatenate(rows_score),
+    }
+    for name, arr in arrays.items():
+        # 임시 파일에 쓴 뒤 교체 (이미 memory-map으로 열린 이전 스냅샷 파일을 덮어쓰지 않도록)
+        path = os.path.join(out_dir, f"{name}.npy")
+        np.save(path + ".tmp.npy", arr)
+        os.replace(path + ".tmp.npy", path)
+
+    attributes = {
+        "road_osmid": roads['osmid'].tolist(),
+        "road_name": _none_if_nan(roads['name']),
+        "road_dong": _none_if_nan(roads['dong']),
+        "geom_osmid": gdf['osmid'].tolist(),
+    }
+    with open(os.path.join(out_dir, "attributes.json"), "w", encoding="utf-8") as f:
+        json.dump(attributes, f, ensure_ascii=False)
+
+    meta = {
+        "format": FORMAT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "sources": {"csv": _sha1(csv_path), "geojson": _sha1(geojson_path)},
+        "n_roads": len(roads),
+        "n_geometries": len(gdf),
+        "n_rows": int(hour_offsets[-1]),
+    }
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    print(f"[M1] Snapshot compiled: {meta['n_rows']} rows -> {out_dir} ({time.time() - t0:.1f}s)")
+    return out_dir
+
+
+class RiskSnapshot:
+    """컴파일된 스냅샷을 memory-map으로 열어 시간대별 컬럼을 제공합니다."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format") != FORMAT_VERSION:
+            raise ValueError(f"unsupported snapshot format: {self.meta.get('format')}")
+        with open(os.path.join(path, "attributes.json"), encoding="utf-8") as f:
+            attributes = json.load(f)
+
+        def load(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+        self.road_ids = load("road_ids")
+        self.geom_road_ids = load("geom_road_ids")
+        self.geom_coords = load("geom_coords")
+        self.geom_offsets = load("geom_offsets")
+        self.hour_offsets = load("hour_offsets")
+        self.rows_geom = load("rows_geom")
+        self.rows_road = load("rows_road")
+        self.rows_score = load("rows_score")
+
+        self.road_osmid = attributes["road_osmid"]
+        self.road_name = attributes["road_name"]
+        self.road_dong = attributes["road_dong"]
+        self.geom_osmid = attributes["geom_osmid"]
+
+    def stale_reason(self, csv_path=None, geojson_path=None):
+        """원본(CSV/GeoJSON)이 컴파일 당시와 다르면 그 이유, 같으면 None (원본 파일이 없으면 비교 생략)"""
+        sources = {"csv": csv_path or get_csv_path(), "geojson": geojson_path or get_geojson_path()}
+        for name, source in sources.items():
+            if os.path.exists(source) and self.meta["sources"].get(name) != _sha1(source):
+                return f"{os.path.basename(source)} changed since compile"
+        return None
+
+    @property
+    def version(self):
+        sources = self.meta["sources"]
+        return f"{sources['csv'][:8]}-{sources['geojson'][:8]}"
+
+    def hour_slice(self, hour):
+        return slice(int(self.hour_offsets[hour]), int(self.hour_offsets[hour + 1]))
+
+    def hour_columns(self, hour):
+        """시간대 hour의 병합 결과를 (road_ids, names, scores, geom_idx, dongs) 컬럼으로 반환합니다."""
+        rows = self.hour_slice(hour)
+        road_idx = np.asarray(self.rows_road[rows])
+        names = [self.road_name[i] for i in road_idx.tolist()]
+        dongs = [self.road_dong[i] for i in road_idx.tolist()]
+        return (
+            np.asarray(self.road_ids)[road_idx],
+            names,
+            np.asarray(self.rows_score[rows]),
+            np.asarray(self.rows_geom[rows]),
+            dongs,
+        )
+
+    def geometries(self):
+        """shapely LineString 배열 (EPSG:4326)"""
+        counts = np.diff(self.geom_offsets)
+        return shapely.linestrings(np.asarray(self.geom_coords), indices=np.repeat(np.arange(len(counts)), counts))
+
+    def to_geodataframe(self):
+        import geopandas as gpd
+        return gpd.GeoDataFrame(
+            {"osmid": self.geom_osmid, "unique_road_id": np.asarray(self.geom_road_ids)},
+            geometry=self.geometries(),
+            crs="EPSG:4326",
+        )
+
+
+def _open_snapshot(path):
+    """(RiskSnapshot, 사용할 수 없는 이유) - 사용할 수 있으면 이유는 None"""
+    if not os.path.exists(os.path.join(path, "meta.json")):
+        return None, "missing"
+    try:
+        snapshot = RiskSnapshot(path)
+    except Exception as e:
+        return None, str(e)
+    return snapshot, snapshot.stale_reason()
+
+def get_snapshot(compile=None):
+    """
+    스냅샷을 로드합니다. 없거나 원본과 다르면 compile(기본: M1_SNAPSHOT_COMPILE)일 때만 다시 컴파일하고,
+    아니면 사용하지 않습니다. 로드/컴파일에 실패하면 None을 반환합니다.
+    """
+    global _snapshot
+    if _snapshot is not None:
+        return _snapshot
+
+    with _snapshot_lock:
+        if _snapshot is not None:
+            return _snapshot
+        path = get_snapshot_dir()
+        compile = snapshot_compile_enabled() if compile is None else compile
+        try:
+            snapshot, reason = _open_snapshot(path)
+            if reason is not None:
+                if not compile:
+                    print(f"[M1] ERROR: Snapshot not usable ({reason}): {path} "
+                          f"- run 'python -m m1.snapshot' or set M1_SNAPSHOT_COMPILE=1")
+                    return None
+                print(f"[M1] Snapshot not usable ({reason}), compiling...")
+                compile_snapshot(out_dir=path)
+                snapshot = RiskSnapshot(path)
+            _snapshot = snapshot
+            print(f"[M1] Snapshot loaded: {path} (version {_snapshot.version})")
+        except Exception as e:
+            print(f"[M1] Error loading snapshot: {e}")
+            return None
+    return _snapshot
+
+
+if __name__ == "__main__":
+    compile_snapshot()
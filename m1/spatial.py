@@ -0,0 +1,156 @@
+import threading
+import numpy as np
+import shapely
+from shapely import STRtree
+
+from .loader import get_osmid_index
+from .encoding import encode_polylines
+
+_geometry_index = None
+_geometry_index_lock = threading.Lock()
+
+# 좌표 단순화(Douglas-Peucker) 단계별 허용 오차 (EPSG:4326 도 단위, 0.00001도 ≈ 1m)
+# 0단계는 원본 좌표
+SIMPLIFY_TOLERANCES = (0.0, 0.00001, 0.00003, 0.0001, 0.0003)
+
+def tier_for_zoom(zoom: int) -> int:
+    """지도 zoom 레벨에 맞는 단순화 단계를 반환합니다. (zoom 17 이상은 원본)"""
+    if zoom >= 17:
+        return 0
+    if zoom >= 16:
+        return 1
+    if zoom >= 15:
+        return 2
+    if zoom >= 13:
+        return 3
+    return 4
+
+def tier_for_tolerance(tolerance: float) -> int:
+    """요청한 허용 오차를 넘지 않는 가장 거친 단순화 단계를 반환합니다."""
+    tier = 0
+    for i, value in enumerate(SIMPLIFY_TOLERANCES):
+        if value <= tolerance:
+            tier = i
+    return tier
+
+def select_tier(zoom=None, tolerance=None) -> int:
+    if tolerance is not None:
+        return tier_for_tolerance(tolerance)
+    if zoom is not None:
+        return tier_for_zoom(zoom)
+    return 0
+
+def geometries_to_geojson(geoms) -> list:
+    """
+    shapely geometry 배열을 GeoJSON geometry dict 리스트로 변환합니다.
+    LineString은 좌표를 한 번에 추출(shapely.get_coordinates)하여 잘라 쓰고,
+    그 외 타입은 __geo_interface__를 사용합니다.
+    """
+    geoms = np.asarray(geoms, dtype=object)
+    results = [None] * len(geoms)
+
+    is_line = (shapely.get_type_id(geoms) == 1) & ~shapely.has_z(geoms)
+    line_idx = np.flatnonzero(is_line)
+    if len(line_idx) > 0:
+        coords = shapely.get_coordinates(geoms[line_idx]).tolist()
+        ends = np.cumsum(shapely.get_num_coordinates(geoms[line_idx])).tolist()
+        start = 0
+        for i, end in zip(line_idx.tolist(), ends):
+            results[i] = {"type": "LineString", "coordinates": coords[start:end]}
+            start = end
+
+    for i in np.flatnonzero(~is_line).tolist():
+        geom = geoms[i]
+        results[i] = geom.__geo_interface__ if geom is not None else None
+    return results
+
+def parse_bbox(value: str):
+    """'minx,miny,maxx,maxy' 문자열을 (minx, miny, maxx, maxy) 튜플로 변환합니다."""
+    try:
+        minx, miny, maxx, maxy = (float(v) for v in value.split(","))
+    except ValueError:
+        raise ValueError("bbox must be 'minx,miny,maxx,maxy'")
+    if minx > maxx or miny > maxy:
+        raise ValueError("bbox min must be <= max")
+    return minx, miny, maxx, maxy
+
+
+class RoadGeometryIndex:
+    """
+    도로 geometry(loader.OsmidGeometryIndex.geometry_array() 순서)에 대한 공간 인덱스입니다.
+    서버 당 한 번만 생성하여 viewport(bbox) 조회, 단순화 단계별 좌표,
+    GeoJSON 변환 결과를 재사용합니다. (요청 시 단순화 연산 없음)
+    """
+
+    def __init__(self, geoms, road_ids=None):
+        self.geoms = np.asarray(geoms, dtype=object)
+        self.tree = STRtree(self.geoms)
+        # geometry별 소유 도로 unique_road_id (-1: 여러 도로가 공유하는 MultiLineString 또는 알 수 없음)
+        self.road_ids = (
+            np.asarray(road_ids, dtype=np.int64) if road_ids is not None
+            else np.full(len(self.geoms), -1, dtype=np.int64)
+        )
+        # 전체 도로 영역 (min_lon, min_lat, max_lon, max_lat): 영역 밖 타일은 조회 없이 빈 타일
+        self.bounds = tuple(shapely.total_bounds(self.geoms).tolist())
+        # 단계별 단순화 geometry (topology 보존)
+        self.tiers = [self.geoms] + [
+            shapely.simplify(self.geoms, tolerance, preserve_topology=True)
+            for tolerance in SIMPLIFY_TOLERANCES[1:]
+        ]
+        self._geojson = {}
+        self._polylines = {}
+        self._geojson_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.geoms)
+
+    def geojson(self, tier: int = 0) -> list:
+        """단계별, geometry 인덱스별 GeoJSON geometry dict (단계마다 최초 1회 생성)"""
+        cached = self._geojson.get(tier)
+        if cached is None:
+            with self._geojson_lock:
+                cached = self._geojson.get(tier)
+                if cached is None:
+                    cached = geometries_to_geojson(self.tiers[tier])
+                    self._geojson[tier] = cached
+        return cached
+
+    def polylines(self, tier: int = 0) -> list:
+        """단계별, geometry 인덱스별 encoded polyline 문자열 (compact 형식용, 최초 1회 생성)"""
+        cached = self._polylines.get(tier)
+        if cached is None:
+            with self._geojson_lock:
+                cached = self._polylines.get(tier)
+                if cached is None:
+                    cached = encode_polylines(self.tiers[tier])
+                    self._polylines[tier] = cached
+        return cached
+
+    def coordinate_count(self, tier: int = 0) -> int:
+        return int(shapely.get_num_coordinates(self.tiers[tier]).sum())
+
+    def query_bbox(self, bbox) -> np.ndarray:
+        """bbox와 교차하는 geometry 인덱스(오름차순)를 반환합니다."""
+        hits = self.tree.query(shapely.box(*bbox), predicate="intersects")
+        return np.sort(hits)
+
+    def bbox_mask(self, bbox) -> np.ndarray:
+        mask = np.zeros(len(self.geoms), dtype=bool)
+        mask[self.query_bbox(bbox)] = True
+        return mask
+
+
+def get_geometry_index():
+    """RoadGeometryIndex 싱글톤 (도로 geometry가 없으면 None)"""
+    global _geometry_index
+    if _geometry_index is not None:
+        return _geometry_index
+
+    with _geometry_index_lock:
+        if _geometry_index is None:
+            osmid_index = get_osmid_index()
+            if osmid_index is None:
+                return None
+            _geometry_index = RoadGeometryIndex(osmid_index.geometry_array(), osmid_index.geometry_road_ids())
+            print(f"[M1] Spatial index built: {len(_geometry_index)} geometries")
+    return _geometry_index
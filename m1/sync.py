@@ -0,0 +1,192 @@
+"""
+COM_Location 동기화 도구 (m1/data/road_risk_final.csv -> Supabase)
+
+(unique_road_id, hour) 행마다 내용 해시를 계산하여 DB에 저장된 행과 비교하고,
+바뀐 행만 upsert 합니다. 몇 번을 실행해도 테이블 행 수는 늘어나지 않습니다.
+
+    python -m m1.sync              # 변경분만 반영
+    python -m m1.sync --dry-run    # 비교 결과만 출력
+    python -m m1.sync --prune      # CSV에 없는 (unique_road_id, hour) 행 삭제
+
+upsert에는 (unique_road_id, hour) UNIQUE 제약이 필요합니다. (최초 1회, 중복 행이 없을 때)
+    ALTER TABLE "COM_Location" ADD CONSTRAINT "COM_Location_road_hour_key" UNIQUE (unique_road_id, hour);
+이미 중복 저장된 키가 있으면 해당 키의 행을 모두 지운 뒤 1개만 다시 저장합니다.
+
+반영 후 API 서버에서 POST /m1/cache/refresh 를 호출해야 응답 캐시가 갱신됩니다.
+"""
+import argparse
+import hashlib
+import json
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, NamedTuple, Tuple
+
+import pandas as pd
+from dotenv import load_dotenv
+
+from .loader import get_csv_path, get_supabase_client, normalize_osmid
+from .pagination import fetch_all_rows, with_retry, MAX_RETRIES, PRIMARY_KEY
+
+TABLE = "COM_Location"
+KEY_COLUMNS = ("unique_road_id", "hour")
+SYNC_COLUMNS = ("unique_road_id", "hour", "osmid", "name", "dong", "risk_score")
+# DB 조회 순서: 중복 저장된 키는 정렬 기준이 같으므로 기본 키(id)까지 정렬해야 페이지 사이에서 빠지거나 두 번 읽히지 않음
+SYNC_ORDER = ("hour", "unique_road_id", PRIMARY_KEY)
+CHUNK_SIZE = 1000     # 한 요청에 보내는 행 수 (너무 크면 API 타임아웃)
+MAX_WORKERS = 4
+
+
+class SyncPlan(NamedTuple):
+    upserts: List[dict]                 # 새로 추가되거나 내용이 바뀐 행
+    duplicates: List[Tuple[int, int]]   # DB에 2번 이상 저장된 키 (삭제 후 다시 저장)
+    stale: List[Tuple[int, int]]        # DB에만 있는 키 (--prune 시 삭제)
+    unchanged: int
+
+
+def load_csv_rows(csv_path=None) -> List[dict]:
+    """CSV를 COM_Location 행(dict) 리스트로 변환합니다. (osmid는 JSONB 리스트 [val])"""
+    df = pd.read_csv(csv_path or get_csv_path(), dtype={'osmid': str})
+    df['osmid'] = df['osmid'].apply(lambda x: [normalize_osmid(x)])
+    # Supabase는 NaN을 받지 못함 -> None
+    df = df[list(SYNC_COLUMNS)].astype(object)
+    df = df.where(pd.notnull(df), None)
+    return df.to_dict(orient='records')
+
+def row_key(row) -> Tuple[int, int]:
+    return int(row['unique_road_id']), int(row['hour'])
+
+def row_hash(row) -> str:
+    """행 내용 해시 (CSV 행과 DB 행을 같은 형식으로 정규화한 뒤 계산)"""
+    score = row.get('risk_score')
+    payload = [
+        *row_key(row),
+        normalize_osmid(row.get('osmid')),
+        row.get('name'),
+        row.get('dong'),
+        None if score is None else round(float(score), 12),
+    ]
+    return hashlib.sha1(json.dumps(payload, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def plan_sync(local_rows: List[dict], remote_rows: List[dict]) -> SyncPlan:
+    """CSV 행과 DB 행을 키/해시로 비교하여 반영할 작업을 계산합니다."""
+    counts = Counter()
+    remote = {}
+    for row in remote_rows:
+        key = row_key(row)
+        counts[key] += 1
+        remote[key] = row_hash(row)
+    duplicates = {key for key, count in counts.items() if count > 1}
+
+    upserts, local_keys, unchanged = [], set(), 0
+    for row in local_rows:
+        key = row_key(row)
+        local_keys.add(key)
+        if key not in duplicates and remote.get(key) == row_hash(row):
+            unchanged += 1
+        else:
+            upserts.append(row)
+
+    return SyncPlan(
+        upserts,
+        sorted(duplicates & local_keys),
+        sorted(set(remote) - local_keys),
+        unchanged,
+    )
+
+def _run_batches(label: str, batches: list, send, max_workers: int, retries: int, size=len) -> int:
+    """
+    batches를 동시에 전송하고 (배치별 재시도) 진행률/처리량을 출력합니다. 전송한 행 수를 반환.
+    send(batch)는 처리한 행 수를 반환하고, size(batch)는 배치의 행 수입니다.
+    """
+    total = sum(size(batch) for batch in batches)
+    if total == 0:
+        return 0
+
+    done, t0 = 0, time.time()
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+        futures = [
+            executor.submit(with_retry, lambda batch=batch: send(batch), f"{label} batch", retries)
+            for batch in batches
+        ]
+        for future in as_completed(futures):
+            done += future.result()
+            elapsed = max(time.time() - t0, 1e-9)
+            print(f"[M1] {label}: {done} / {total} rows ({done / elapsed:.0f} rows/s)")
+    return done
+
+def _key_batches(keys, chunk_size: int) -> list:
+    """(unique_road_id, hour) 키를 시간대별로 묶어 삭제 요청 단위로 나눕니다."""
+    by_hour = defaultdict(list)
+    for road_id, hour in keys:
+        by_hour[hour].append(road_id)
+    return [
+        (hour, road_ids[i:i + chunk_size])
+        for hour, road_ids in sorted(by_hour.items())
+        for i in range(0, len(road_ids), chunk_size)
+    ]
+
+def _key_count(batch) -> int:
+    return len(batch[1])
+
+def sync_com_location(csv_path=None, dry_run=False, prune=False,
+                      chunk_size=CHUNK_SIZE, max_workers=MAX_WORKERS, retries=MAX_RETRIES) -> dict:
+    """
+    CSV와 COM_Location을 비교하여 바뀐 행만 반영하고, 작업 요약 dict를 반환합니다.
+    """
+    client = get_supabase_client()
+    if client is None:
+        raise RuntimeError("Supabase client is not available (SUPABASE_URL / SUPABASE_KEY)")
+
+    t0 = time.time()
+    local_rows = load_csv_rows(csv_path)
+    remote_rows = fetch_all_rows(client, TABLE, columns=",".join(SYNC_COLUMNS), order=SYNC_ORDER, max_workers=max_workers)
+    plan = plan_sync(local_rows, remote_rows)
+    summary = {
+        "csv_rows": len(local_rows),
+        "db_rows": len(remote_rows),
+        "unchanged": plan.unchanged,
+        "upserts": len(plan.upserts),
+        "duplicates": len(plan.duplicates),
+        "stale": len(plan.stale),
+    }
+    print(f"[M1] Sync plan: {summary}")
+    if dry_run:
+        return summary
+
+    def delete_batch(batch):
+        hour, road_ids = batch
+        client.table(TABLE).delete().eq("hour", hour).in_("unique_road_id", road_ids).execute()
+        return len(road_ids)
+
+    def upsert_batch(rows):
+        client.table(TABLE).upsert(rows, on_conflict=",".join(KEY_COLUMNS)).execute()
+        return len(rows)
+
+    # 1. 중복 저장된 키는 모두 지우고 (2단계에서 1개만 다시 저장)
+    _run_batches("Delete duplicates", _key_batches(plan.duplicates, chunk_size), delete_batch, max_workers, retries, _key_count)
+    # 2. 바뀐 행만 upsert
+    upsert_chunks = [plan.upserts[i:i + chunk_size] for i in range(0, len(plan.upserts), chunk_size)]
+    _run_batches("Upsert", upsert_chunks, upsert_batch, max_workers, retries)
+    # 3. CSV에서 빠진 행 삭제 (선택)
+    if prune:
+        _run_batches("Prune", _key_batches(plan.stale, chunk_size), delete_batch, max_workers, retries, _key_count)
+
+    summary["seconds"] = round(time.time() - t0, 2)
+    print(f"[M1] Sync done in {summary['seconds']}s (POST /m1/cache/refresh to reload the API cache)")
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sync road_risk_final.csv into COM_Location (changed rows only)")
+    parser.add_argument("--csv", help="CSV path (default: M1_CSV_PATH or m1/data/road_risk_final.csv)")
+    parser.add_argument("--dry-run", action="store_true", help="print the plan without writing")
+    parser.add_argument("--prune", action="store_true", help="delete DB rows missing from the CSV")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    return sync_com_location(args.csv, args.dry_run, args.prune, args.chunk_size, args.workers)
+
+if __name__ == "__main__":
+    main()
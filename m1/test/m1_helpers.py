@@ -0,0 +1,159 @@
+"""
+m1 테스트 공용 도구 (DB 없이 로컬 CSV/GeoJSON + 메모리 Supabase 대용 사용)
+
+    from m1_helpers import load_hour_rows, timed, StubClient
+"""
+import sys
+import os
+import time
+import random
+import functools
+import pandas as pd
+
+# 현재 디렉토리(.../package/m1/test)의 상위 상위 디렉토리(.../package)를 path에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+m1_dir = os.path.dirname(current_dir)      # .../package/m1
+package_dir = os.path.dirname(m1_dir)      # .../package
+if package_dir not in sys.path:
+    sys.path.append(package_dir)
+
+from m1.loader import get_osmid_index, load_data
+from m1.service import parse_osmid
+
+CSV_PATH = os.path.join(m1_dir, "data", "road_risk_final.csv")
+
+@functools.lru_cache(maxsize=1)
+def _read_csv():
+    return pd.read_csv(CSV_PATH, dtype={'osmid': str})
+
+def load_hour_rows(hour):
+    """DB(COM_Location)에 저장된 형태를 로컬 CSV로 재현합니다. (save_to_db.py와 동일한 전처리)"""
+    df = _read_csv()
+    df = df[df['hour'] == hour].copy()
+    df['osmid'] = df['osmid'].apply(lambda x: [str(x).split('.')[0]]).apply(parse_osmid)
+    df = df.astype(object).where(pd.notnull(df), None)
+    return df[['unique_road_id', 'hour', 'osmid', 'name', 'dong', 'risk_score']]
+
+def local_hour_frame(hour):
+    """로컬 CSV로 만든 시간대 병합 결과 (service.db_hour_frame과 같은 경로, DB 대신 CSV)"""
+    from m1.service import join_hour
+    load_data()
+    frame = join_hour(hour, load_hour_rows(hour), get_osmid_index())
+    return frame if len(frame) > 0 else None
+
+def use_local_cache(loader=local_hour_frame):
+    """service.risk_cache를 로컬 CSV를 읽는 캐시로 바꿉니다. (Supabase/스냅샷 디렉토리 사용 안 함)"""
+    from m1 import service
+    from m1.cache import RiskCache
+    service.risk_cache = RiskCache(loader, service.render_frame)
+    # router는 risk_cache를 import 시점에 가져오므로 함께 교체
+    router = sys.modules.get("m1.router")
+    if router is not None:
+        router.risk_cache = service.risk_cache
+    return service.risk_cache
+
+def timed(func, *args, repeat=3):
+    """func(*args)를 repeat번 실행하여 (결과, 가장 짧은 실행 시간)을 반환합니다."""
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - t0)
+    return result, best
+
+def check_speedup(new_sec, old_sec):
+    """BENCH_ASSERT=1 일 때만 속도 개선을 검사합니다. (부하가 있는 CI에서 시간 비교는 불안정)"""
+    if os.getenv("BENCH_ASSERT") == "1":
+        assert new_sec < old_sec
+
+
+class StubQuery:
+    """Supabase(postgrest) 쿼리 빌더 중 m1이 사용하는 부분만 흉내 냅니다."""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.action = "select"
+        self.count = None
+        self.filters = []
+        self.orders = []
+        self.bounds = None
+        self.payload = None
+
+    def select(self, columns="*", count=None):
+        self.count = count
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, column):
+        self.orders.append(column)
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    def delete(self):
+        self.action = "delete"
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self.action = "upsert"
+        self.payload = (rows, on_conflict.split(","))
+        return self
+
+    def execute(self):
+        rows = self.client.tables.setdefault(self.table, [])
+        matched = [row for row in rows if all(f(row) for f in self.filters)]
+        if self.action == "delete":
+            self.client.tables[self.table] = [row for row in rows if row not in matched]
+            return StubResponse(matched)
+        if self.action == "upsert":
+            new_rows, keys = self.payload
+            for new in new_rows:
+                same = [row for row in rows if all(row.get(k) == new.get(k) for k in keys)]
+                if same:
+                    same[0].update(new)
+                else:
+                    rows.append(dict(new, id=self.client.next_id()))
+            return StubResponse(new_rows)
+
+        # 정렬 기준이 같은 행(동순위)은 PostgREST처럼 요청마다 순서가 달라질 수 있음
+        self.client.rng.shuffle(matched)
+        matched.sort(key=lambda row: tuple(row.get(c) for c in self.orders))
+        total = len(matched)
+        if self.bounds is not None:
+            matched = matched[self.bounds[0]:self.bounds[1] + 1]
+        return StubResponse([dict(row) for row in matched], total if self.count == "exact" else None)
+
+
+class StubResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class StubClient:
+    """테이블을 메모리 리스트로 갖는 Supabase 클라이언트 대용 (행마다 기본 키 id 부여)"""
+
+    def __init__(self, tables=None, seed=0):
+        self.rng = random.Random(seed)
+        self._id = 0
+        self.tables = {}
+        for table, rows in (tables or {}).items():
+            self.tables[table] = [dict(row, id=self.next_id()) for row in rows]
+
+    def next_id(self):
+        self._id += 1
+        return self._id
+
+    def table(self, name):
+        return StubQuery(self, name)
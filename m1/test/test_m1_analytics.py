@@ -0,0 +1,125 @@
+import sys
+import os
+import json
+import numpy as np
+import pandas as pd
+
+# 현재 디렉토리(.../package/m1/test)의 상위 상위 디렉토리(.../package)를 path에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+m1_dir = os.path.dirname(current_dir)      # .../package/m1
+package_dir = os.path.dirname(m1_dir)      # .../package
+sys.path.append(current_dir)
+sys.path.append(package_dir)
+
+from m1.analytics import TOP_K, UNKNOWN_DONG, diff_hours
+from m1.cache import HOURS
+from m1.service import RISK_LEVEL_NAMES, classify_risk, get_risk_cube, get_risk_diff, risk_codes
+from m1_helpers import use_local_cache
+
+TEST_HOURS = (0, 8, 18)
+# (from, to): 인접 시간대(미리 생성), 자정 경계, 임의 시간대, 같은 시간대
+DIFF_PAIRS = ((17, 18), (18, 17), (23, 0), (3, 15), (9, 9))
+
+def road_table(frame):
+    """frame 조각 행 -> 도로당 1행 DataFrame (비교용, pandas로 직접 계산)"""
+    df = pd.DataFrame({
+        "unique_road_id": frame.road_ids,
+        "name": frame.names,
+        "dong": [dong or UNKNOWN_DONG for dong in frame.dongs],
+        "risk_score": frame.scores,
+    })
+    df = df.drop_duplicates("unique_road_id", keep="first")
+    df["risk_level"] = classify_risk(df["risk_score"].to_numpy())
+    return df
+
+def top_items(df, k):
+    df = df.sort_values(["risk_score", "unique_road_id"], ascending=[False, True]).head(k)
+    df = df.astype(object).where(df.notna(), None)
+    return [
+        {**row, "unique_road_id": int(row["unique_road_id"]), "risk_score": float(row["risk_score"])}
+        for row in df[["unique_road_id", "name", "dong", "risk_score", "risk_level"]].to_dict(orient="records")
+    ]
+
+def test_cube_top_k_per_dong():
+    cache = use_local_cache()
+    cube = get_risk_cube()
+    assert cube is not None
+
+    for hour in TEST_HOURS:
+        df = road_table(cache.get_frame(hour))
+        assert cube.dongs == sorted(df["dong"].unique())
+        assert cube.top(hour, k=TOP_K) == top_items(df, TOP_K)
+        for dong in cube.dongs:
+            expected = top_items(df[df["dong"] == dong], TOP_K)
+            assert cube.top(hour, dong, TOP_K) == expected
+            assert cube.top(hour, dong, 3) == expected[:3]
+        print(f"[Test] {hour}시: 동 {len(cube.dongs)}개, 도로 {len(df)}개, 전체 1위 {cube.top(hour, k=1)}")
+    assert cube.top(TEST_HOURS[0], "없는동") == []
+
+def test_cube_summary_matches_groupby():
+    cache = use_local_cache()
+    cube = get_risk_cube()
+
+    for hour in TEST_HOURS:
+        df = road_table(cache.get_frame(hour))
+        groups = df.groupby("dong")["risk_score"]
+        for dong, scores in groups:
+            summary = cube.summary(dong, hour)
+            assert summary["road_count"] == len(scores)
+            assert np.isclose(summary["mean_score"], round(scores.mean(), 6))
+            assert summary["max_score"] == scores.max()
+            counts = df[df["dong"] == dong]["risk_level"].value_counts()
+            assert summary["level_counts"] == {name: int(counts.get(name, 0)) for name in RISK_LEVEL_NAMES.tolist()}
+
+        total = cube.summary()[hour]      # 전체 합계 (dong=None)
+        assert total["road_count"] == len(df) and total["max_score"] == df["risk_score"].max()
+        assert [s["dong"] for s in cube.summary(hour=hour)] == cube.dongs
+
+    # 동만 지정하면 24개 시간대
+    assert [s["hour"] for s in cube.summary(cube.dongs[0])] == list(HOURS)
+
+def brute_force_diff(before, after):
+    """도로별 점수/등급을 dict로 직접 비교 (비교용)"""
+    old = dict(zip(before["unique_road_id"], zip(before["risk_score"], before["risk_level"])))
+    new = dict(zip(after["unique_road_id"], zip(after["risk_score"], after["risk_level"])))
+    changed = sorted(road for road, value in new.items() if old.get(road) != value)
+    return changed, new, sorted(set(old) - set(new))
+
+def test_diff_matches_brute_force():
+    cache = use_local_cache()
+    for from_hour, to_hour in DIFF_PAIRS:
+        diff = json.loads(get_risk_diff(from_hour, to_hour))
+        changed, new, removed = brute_force_diff(
+            road_table(cache.get_frame(from_hour)), road_table(cache.get_frame(to_hour)),
+        )
+        print(f"[Test] diff {from_hour} -> {to_hour}: 변경 {diff['count']} / 전체 {diff['total']}")
+
+        assert (diff["from"], diff["to"]) == (from_hour, to_hour)
+        assert diff["count"] == len(changed) == len(diff["unique_road_id"])
+        assert diff["unique_road_id"] == changed
+        assert diff["total"] == len(new)
+        assert diff["removed"] == removed
+        for road_id, score, level in zip(diff["unique_road_id"], diff["risk_score"], diff["risk_level"]):
+            assert (score, diff["level_names"][level]) == new[road_id]
+        if from_hour == to_hour:
+            assert diff["count"] == 0
+
+    # 캐시된 응답도 같은 결과
+    assert get_risk_diff(*DIFF_PAIRS[0]) == get_risk_diff(*DIFF_PAIRS[0])
+
+    # 한쪽 시간대에만 있는 도로: before에만 -> removed, after에만 -> 변경으로 포함
+    frame = cache.get_frame(TEST_HOURS[-1])
+    roads = np.unique(frame.road_ids)
+    before = frame.take(frame.road_ids != roads[0])
+    after = frame.take(frame.road_ids != roads[1])
+    after = after.with_scores(np.where(after.road_ids == roads[2], 1.0 - after.scores, after.scores))
+    diff = diff_hours(before, after, risk_codes, RISK_LEVEL_NAMES.tolist())
+    changed, _, removed = brute_force_diff(road_table(before), road_table(after))
+    assert diff["unique_road_id"] == changed == sorted([int(roads[0]), int(roads[2])])
+    assert diff["removed"] == removed == [int(roads[1])]
+
+if __name__ == "__main__":
+    test_cube_top_k_per_dong()
+    test_cube_summary_matches_groupby()
+    test_diff_matches_brute_force()
+    print("[Success] 동/시간대 큐브와 시간대 diff가 직접 계산한 결과와 같습니다.")
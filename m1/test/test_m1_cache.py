@@ -0,0 +1,163 @@
+import sys
+import os
+
+# 현재 디렉토리(.../package/m1/test)의 상위 상위 디렉토리(.../package)를 path에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+m1_dir = os.path.dirname(current_dir)      # .../package/m1
+package_dir = os.path.dirname(m1_dir)      # .../package
+sys.path.append(package_dir)
+
+from m1.cache import RiskCache
+
+class StubData:
+    """시간대별 frame 대신 (hour, 적재 횟수) 튜플을 돌려주는 loader/renderer (호출 횟수 기록)"""
+
+    def __init__(self, missing=()):
+        self.missing = set(missing)
+        self.loads = []
+        self.renders = []
+        self.bulk_loads = []
+
+    def load(self, hour):
+        self.loads.append(hour)
+        if hour in self.missing:
+            return None
+        return (hour, len(self.loads))
+
+    def render(self, frame, variant):
+        self.renders.append((frame[0], variant))
+        return f"{frame}:{variant}".encode("utf-8")
+
+    def bulk_load(self, hours):
+        self.bulk_loads.append(list(hours))
+        return {hour: (hour, "bulk") for hour in hours if hour not in self.missing}
+
+def test_hit_miss_and_variants():
+    data = StubData()
+    cache = RiskCache(data.load, data.render)
+
+    first = cache.get(7)
+    assert cache.get(7) == first
+    assert cache.get(7, 1) != first
+    assert data.loads == [7] and data.renders == [(7, 0), (7, 1)]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["cached_hours"]) == (2, 1, [7])
+
+    # renderer 지정 (예: 타일)
+    assert cache.get(7, "x", renderer=lambda frame, variant: b"custom") == b"custom"
+
+def test_none_is_not_cached():
+    data = StubData(missing={3})
+    cache = RiskCache(data.load, data.render)
+    assert cache.get(3) is None
+    assert cache.get(3) is None
+    assert data.loads == [3, 3]
+    assert cache.stats()["cached_hours"] == []
+
+def test_variants_are_bounded():
+    data = StubData()
+    cache = RiskCache(data.load, data.render, max_variants=3)
+    for variant in range(10):
+        cache.get(1, variant)
+    cache.get(1, 7)             # 최근 사용 -> 유지
+    cache.get(1, 10)
+    entry = cache._entries[(1, cache.version)]
+    assert list(entry.bodies) == [9, 7, 10]
+
+    renders = len(data.renders)
+    cache.get(1, 0)             # 밀려난 variant는 다시 생성
+    assert len(data.renders) == renders + 1
+
+def test_invalidate_hour_and_version():
+    data = StubData()
+    cache = RiskCache(data.load, data.render)
+    cache.get(1)
+    cache.get(2)
+    version = cache.version
+
+    cache.invalidate(1)
+    assert cache.version == version
+    assert cache.stats()["cached_hours"] == [2]
+    cache.get(1)
+    cache.get(2)
+    assert data.loads == [1, 2, 1]
+
+    cache.invalidate()
+    assert cache.version == version + 1
+    assert cache.stats()["cached_hours"] == []
+    cache.get(2)
+    assert data.loads == [1, 2, 1, 2]
+
+def test_derived_is_cleared_on_invalidate():
+    data = StubData()
+    cache = RiskCache(data.load, data.render)
+    builds = []
+
+    def build():
+        builds.append(1)
+        return (cache.get_frame(0), cache.get_frame(1))
+
+    assert cache.get_derived("pair", build) == cache.get_derived("pair", build)
+    assert len(builds) == 1
+    cache.invalidate(5)         # 어느 시간대든 무효화되면 함께 비움
+    cache.get_derived("pair", build)
+    assert len(builds) == 2
+    assert cache.get_derived("none", lambda: None) is None
+
+def test_invalidate_during_build_is_not_stored():
+    data = StubData()
+    cache = RiskCache(data.load, lambda frame, variant: b"")
+
+    def load_and_invalidate(hour):
+        cache.invalidate()
+        return data.load(hour)
+
+    cache._loader = load_and_invalidate
+    assert cache.get_frame(4) is not None
+    assert cache.stats()["cached_hours"] == []
+
+def test_refresh_uses_bulk_loader():
+    data = StubData(missing={23})
+    cache = RiskCache(data.load, data.render, data.bulk_load)
+    cache.get(0)
+    version = cache.version
+
+    assert cache.refresh() == 23
+    assert cache.version == version + 1
+    assert data.bulk_loads == [list(range(24))]
+    assert cache.stats()["cached_hours"] == list(range(23))
+    assert cache.get_frame(5) == (5, "bulk")
+    # render=True: 기본 응답은 refresh에서 미리 생성
+    assert cache.get(5) == b"(5, 'bulk'):0" and (5, 0) in data.renders
+    assert cache.stats()["last_refresh"] is not None
+
+    assert cache.refresh([1, 2], render=False) == 2
+    assert cache.stats()["bytes"] == 0
+
+def test_invalidate_during_refresh_is_not_stored():
+    data = StubData()
+    cache = RiskCache(data.load, data.render, data.bulk_load)
+
+    # 전체 조회 도중 /m1/cache/invalidate (또는 다른 refresh)가 들어온 상황
+    for invalidate in (lambda: cache.invalidate(), lambda: cache.invalidate(3)):
+        def bulk_load_and_invalidate(hours):
+            frames = data.bulk_load(hours)
+            invalidate()
+            return frames
+
+        cache._bulk_loader = bulk_load_and_invalidate
+        assert cache.refresh() == 0
+        assert cache.stats()["cached_hours"] == []
+        # 다음 요청은 새 데이터로 다시 생성
+        assert cache.get_frame(5) == (5, len(data.loads))
+
+if __name__ == "__main__":
+    test_hit_miss_and_variants()
+    test_none_is_not_cached()
+    test_variants_are_bounded()
+    test_invalidate_hour_and_version()
+    test_derived_is_cleared_on_invalidate()
+    test_invalidate_during_build_is_not_stored()
+    test_refresh_uses_bulk_loader()
+    test_invalidate_during_refresh_is_not_stored()
+    print("[Success] RiskCache 적중/무효화/갱신 동작 확인")
@@ -0,0 +1,59 @@
+import sys
+import os
+import json
+import gzip
+import numpy as np
+
+# 현재 디렉토리(.../package/m1/test)의 상위 상위 디렉토리(.../package)를 path에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+m1_dir = os.path.dirname(current_dir)      # .../package/m1
+package_dir = os.path.dirname(m1_dir)      # .../package
+sys.path.append(current_dir)
+sys.path.append(package_dir)
+
+from m1.loader import get_osmid_index, load_data
+from m1.encoding import decode_polyline, PRECISION
+from m1.service import join_hour, render_frame, render_compact
+from m1.spatial import get_geometry_index
+from m1_helpers import load_hour_rows, timed
+
+TEST_HOUR = 18
+
+def test_compact_format_benchmark():
+    load_data()
+    frame = join_hour(TEST_HOUR, load_hour_rows(TEST_HOUR), get_osmid_index())
+    index = get_geometry_index()
+    # geometry 변환 결과는 서버 당 1회 생성되므로 측정에서 제외
+    index.geojson()
+    index.polylines()
+
+    geojson_body, geojson_sec = timed(render_frame, frame, 0)
+    compact_body, compact_sec = timed(render_compact, frame, ("compact", 0))
+
+    print(f"[Test] {TEST_HOUR}시 응답 항목: {len(frame)}개")
+    print(f"[Size] geojson: {len(geojson_body) / 1024:.0f} KB (gzip {len(gzip.compress(geojson_body)) / 1024:.0f} KB)"
+          f" / compact: {len(compact_body) / 1024:.0f} KB (gzip {len(gzip.compress(compact_body)) / 1024:.0f} KB)")
+    print(f"[Time] geojson: {geojson_sec * 1000:.1f} ms / compact: {compact_sec * 1000:.1f} ms")
+
+    # compact 응답을 복원하여 원본과 비교
+    original = json.loads(geojson_body)["data"]
+    compact = json.loads(compact_body)
+    assert compact["count"] == len(original)
+    for i, item in enumerate(original):
+        assert compact["unique_road_id"][i] == item["unique_road_id"]
+        assert compact["name"][i] == item["name"]
+        assert compact["risk_score"][i] == item["risk_score"]
+        assert compact["level_names"][compact["risk_level"][i]] == item["risk_level"]
+
+    decoded = [decode_polyline(p, compact["precision"]) for p in compact["geometries"]]
+    for i in range(0, len(original), 97):
+        coords = np.asarray(decoded[compact["geometry_index"][i]])
+        expected = np.asarray(original[i]["geometry"]["coordinates"])
+        assert coords.shape == expected.shape
+        assert np.abs(coords - expected).max() <= 0.5 / 10 ** PRECISION + 1e-12
+
+    assert len(compact_body) < len(geojson_body)
+
+if __name__ == "__main__":
+    test_compact_format_benchmark()
+    print("[Success] compact 형식 복원 결과가 원본과 일치합니다.")
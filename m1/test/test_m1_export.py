@@ -0,0 +1,97 @@
+import sys
+import os
+import shutil
+import tempfile
+import numpy as np
+import pyogrio
+import shapely
+
+# 현재 디렉토리(.../package/m1/test)의 상위 상위 디렉토리(.../package)를 path에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+m1_dir = os.path.dirname(current_dir)      # .../package/m1
+package_dir = os.path.dirname(m1_dir)      # .../package
+sys.path.append(current_dir)
+sys.path.append(package_dir)
+
+from m1.cache import RiskCache
+from m1.export import LAYER_NAME, export_file, parse_hours, prune_exports
+from m1.service import classify_risk, render_frame
+from m1.spatial import get_geometry_index
+from m1_helpers import local_hour_frame
+
+TEST_HOUR = 18
+TEST_BBOX = (129.112, 35.148, 129.122, 35.158)
+
+def test_parse_hours_allows_all_or_single_hour():
+    for value in (None, "", "all", "0-23", "0-11,12-23"):
+        assert parse_hours(value) == list(range(24))
+    assert parse_hours("7") == [7]
+    assert parse_hours(" 23 ") == [23]
+    # 임의 조합은 파일 수가 2^24까지 늘어나므로 거부
+    for value in ("7,8", "0-6,18-23", "24", "-1", "a", "9-7", ","):
+        try:
+            parse_hours(value)
+            assert False, value
+        except ValueError:
+            pass
+
+def test_fgb_reads_back_with_pyogrio():
+    frame = local_hour_frame(TEST_HOUR)
+    index = get_geometry_index()
+    work_dir = tempfile.mkdtemp(prefix="m1_export_")
+    try:
+        for fmt in ("fgb", "gpkg"):
+            path = export_file({TEST_HOUR: frame}, index.geoms, fmt, classify_risk, out_dir=work_dir)
+            assert os.path.basename(path).startswith(f"{LAYER_NAME}_h{TEST_HOUR}_")
+            # 같은 데이터는 같은 파일
+            assert export_file({TEST_HOUR: frame}, index.geoms, fmt, classify_risk, out_dir=work_dir) == path
+
+            gdf = pyogrio.read_dataframe(path, layer=LAYER_NAME)
+            print(f"[Test] {fmt}: {len(gdf)}행 -> {os.path.basename(path)}")
+            assert len(gdf) == len(frame)
+            assert gdf.crs.to_epsg() == 4326
+            assert (gdf["hour"] == TEST_HOUR).all()
+            # FlatGeobuf는 공간 인덱스(Hilbert) 순서로 저장하므로 (도로, geometry) 기준으로 정렬하여 비교
+            got = sorted(zip(gdf["unique_road_id"], shapely.to_wkb(gdf.geometry.values), gdf["risk_score"], gdf["risk_level"]))
+            expected = sorted(zip(
+                frame.road_ids.tolist(), shapely.to_wkb(index.geoms[frame.geom_idx]),
+                frame.scores.tolist(), classify_risk(frame.scores).tolist(),
+            ))
+            assert got == expected
+
+            # 공간 인덱스로 bbox 영역만 읽기
+            subset = pyogrio.read_dataframe(path, layer=LAYER_NAME, bbox=TEST_BBOX)
+            expected = shapely.intersects(index.geoms[frame.geom_idx], shapely.box(*TEST_BBOX))
+            assert 0 < len(subset) == int(expected.sum())
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def test_old_files_pruned_on_invalidate_only():
+    frame = local_hour_frame(TEST_HOUR)
+    index = get_geometry_index()
+    work_dir = tempfile.mkdtemp(prefix="m1_export_")
+    try:
+        paths = []
+        for step in range(3):
+            changed = frame.with_scores(np.clip(frame.scores + 0.01 * step, 0, 1))
+            path = export_file({TEST_HOUR: changed}, index.geoms, "fgb", classify_risk, out_dir=work_dir)
+            os.utime(path, (1_000_000 + step, 1_000_000 + step))
+            paths.append(path)
+        other = export_file({TEST_HOUR: frame}, index.geoms, "gpkg", classify_risk, out_dir=work_dir)
+
+        # 요청(export_file) 중에는 이전 버전 파일을 지우지 않음 (전송 중일 수 있음)
+        assert len(set(paths)) == 3 and all(os.path.exists(path) for path in paths)
+
+        # 무효화 시 형식/시간대 조합별로 최신 파일만 남김
+        cache = RiskCache(local_hour_frame, render_frame, on_invalidate=lambda: prune_exports(work_dir))
+        cache.invalidate()
+        assert sorted(os.listdir(work_dir)) == sorted(os.path.basename(p) for p in (paths[-1], other))
+        assert prune_exports(work_dir) == 0
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_parse_hours_allows_all_or_single_hour()
+    test_fgb_reads_back_with_pyogrio()
+    test_old_files_pruned_on_invalidate_only()
+    print("[Success] 내보내기 파일을 pyogrio로 다시 읽어 확인, 이전 파일은 무효화 시에만 정리")
@@ -0,0 +1,78 @@
+import sys
+import os
+import json
+import shapely
+
+# 현재 디렉토리(.../package/m1/test)의 상위 상위 디렉토리(.../package)를 path에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+m1_dir = os.path.dirname(current_dir)      # .../package/m1
+package_dir = os.path.dirname(m1_dir)      # .../package
+sys.path.append(current_dir)
+sys.path.append(package_dir)
+
+from m1.service import RISK_LEVEL_NAMES, parse_risk_level, query_risk
+from m1.spatial import get_geometry_index, parse_bbox
+from m1_helpers import use_local_cache
+
+TEST_HOUR = 18
+# 광안리 해수욕장 주변
+TEST_BBOX = (129.112, 35.148, 129.122, 35.158)
+
+def items_of(body):
+    return json.loads(body)["data"]
+
+def test_bbox_filter_matches_brute_force():
+    cache = use_local_cache()
+    frame = cache.get_frame(TEST_HOUR)
+    index = get_geometry_index()
+
+    # 모든 행의 geometry와 bbox를 직접 교차 판정
+    box = shapely.box(*TEST_BBOX)
+    expected = shapely.intersects(index.geoms[frame.geom_idx], box)
+    items = items_of(query_risk(TEST_HOUR, bbox=TEST_BBOX))
+
+    print(f"[Test] {TEST_HOUR}시 전체 {len(frame)}개 중 bbox 안 {len(items)}개")
+    assert 0 < len(items) < len(frame)
+    assert len(items) == int(expected.sum())
+    assert [item["unique_road_id"] for item in items] == frame.road_ids[expected].tolist()
+    for item in items:
+        assert shapely.intersects(shapely.geometry.shape(item["geometry"]), box)
+
+    # 도로가 없는 영역은 빈 결과
+    assert items_of(query_risk(TEST_HOUR, bbox=(0.0, 0.0, 0.1, 0.1))) == []
+
+def test_min_level_filter():
+    cache = use_local_cache()
+    frame = cache.get_frame(TEST_HOUR)
+    all_items = items_of(query_risk(TEST_HOUR, min_level=0))
+    assert len(all_items) == len(frame)
+
+    for code, level in enumerate(RISK_LEVEL_NAMES.tolist()):
+        items = items_of(query_risk(TEST_HOUR, min_level=parse_risk_level(level)))
+        expected = [item for item in all_items if RISK_LEVEL_NAMES.tolist().index(item["risk_level"]) >= code]
+        assert items == expected
+
+    # bbox + 등급 조건은 둘 다 만족하는 행만
+    both = items_of(query_risk(TEST_HOUR, bbox=TEST_BBOX, min_level=2))
+    in_bbox = items_of(query_risk(TEST_HOUR, bbox=TEST_BBOX))
+    assert both == [item for item in in_bbox if item["risk_level"] in ("높음", "심각")]
+
+def test_parse_errors():
+    assert parse_bbox("129.1,35.1,129.2,35.2") == (129.1, 35.1, 129.2, 35.2)
+    for value in ("1,2,3", "a,b,c,d", "2,0,1,1"):
+        try:
+            parse_bbox(value)
+            assert False, value
+        except ValueError:
+            pass
+    try:
+        parse_risk_level("매우높음")
+        assert False
+    except ValueError:
+        pass
+
+if __name__ == "__main__":
+    test_bbox_filter_matches_brute_force()
+    test_min_level_filter()
+    test_parse_errors()
+    print("[Success] bbox / min_level 필터 결과가 전체 비교 결과와 같습니다.")
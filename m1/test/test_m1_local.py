@@ -13,7 +13,8 @@ m1_dir = os.path.dirname(current_dir)      # .../package/m1
 package_dir = os.path.dirname(m1_dir)      # .../package
 sys.path.append(package_dir)
 
-from m1.loader import get_road_geometry, load_data
+from m1.loader import get_road_geometry, get_osmid_index, load_data
+from m1.pagination import fetch_all_rows
 
 def diagnose_data_mismatch():
     print("[Test] 데이터 정합성 진단 시작...\n")
@@ -35,19 +36,8 @@ def diagnose_data_mismatch():
     try:
         supabase = create_client(url, key)
         
-        # Pagination으로 전체 데이터 가져오기
-        all_data = []
-        start = 0
-        limit = 1000
-        while True:
-            response = supabase.table("COM_Location").select("*").eq("hour", 18).range(start, start + limit - 1).execute()
-            data = response.data
-            all_data.extend(data)
-            if len(data) < limit:
-                break
-            start += limit
-            
-        db_data = all_data
+        # Pagination으로 전체 데이터 가져오기 (병렬 조회)
+        db_data = fetch_all_rows(supabase, "COM_Location", filters={"hour": 18})
         df = pd.DataFrame(db_data)
         print(f"[DB] 데이터 (18시 위험도): {len(df)}개")
     except Exception as e:
@@ -105,6 +95,9 @@ def diagnose_data_mismatch():
     if len(merged) > len(common):
         print(f"   -> 1:N 매칭 발생! (하나의 osmid가 여러 조각으로 나뉘어짐)")
         print(f"   -> 배율: 약 {len(merged)/len(common):.1f}배")
+        index = get_osmid_index()
+        multi = int(((index.stops - index.starts) > 1).sum())
+        print(f"   -> 여러 조각으로 나뉜 osmid: {multi}개 (M1_MERGE_SEGMENTS=1 이면 MultiLineString 1개로 반환)")
 
 if __name__ == "__main__":
     diagnose_data_mismatch()
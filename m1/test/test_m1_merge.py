@@ -0,0 +1,134 @@
+import sys
+import os
+import numpy as np
+import shapely
+
+# 현재 디렉토리(.../package/m1/test)의 상위 상위 디렉토리(.../package)를 path에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+m1_dir = os.path.dirname(current_dir)      # .../package/m1
+package_dir = os.path.dirname(m1_dir)      # .../package
+sys.path.append(current_dir)
+sys.path.append(package_dir)
+
+from m1.loader import get_osmid_index, get_road_geometry, load_data
+from m1.service import join_hour, merge_segments
+from m1_helpers import load_hour_rows, timed
+
+TEST_HOUR = 18
+
+def legacy_merge(df, gdf):
+    """변경 전 pandas merge (비교용): (geometry 행 위치, df 행 위치) 쌍을 같은 순서로 반환"""
+    left = gdf[['osmid', 'geometry']].assign(geom_pos=np.arange(len(gdf)))
+    right = df.assign(row_pos=np.arange(len(df)))
+    merged = left.merge(right, on='osmid', how='inner')
+    merged = merged[merged.geometry.notna()]
+    return merged['row_pos'].to_numpy(), merged['geom_pos'].to_numpy()
+
+def test_osmid_index_slices():
+    load_data()
+    gdf = get_road_geometry()
+    index = get_osmid_index()
+    osmids = gdf['osmid'].astype(str).to_numpy()
+    valid = gdf.geometry.notna().to_numpy()
+
+    assert index.n_segments == len(gdf)
+    for key_pos, key in enumerate(index.keys.tolist()):
+        segments = index.order[index.starts[key_pos]:index.stops[key_pos]]
+        # osmid마다 연속 구간 = 해당 osmid의 geometry 행 (원래 순서)
+        assert segments.tolist() == np.flatnonzero((osmids == key) & valid).tolist()
+        # MultiLineString = 구간의 조각을 순서대로 모은 것
+        merged = index.merged[key_pos]
+        if len(segments) > 0:
+            parts = shapely.get_parts(gdf.geometry.values[segments])
+            assert shapely.equals_exact(shapely.get_parts(merged), parts, tolerance=0).all()
+
+    geoms = index.geometry_array()
+    assert len(geoms) == len(gdf) + len(index.keys) + len(index.road_keys)
+    assert (index.merged_geom_idx(np.array([0])) == len(gdf) + index.geom_key[0]).all()
+
+    # 도로별 MultiLineString = GeoJSON에서 unique_road_id가 같은 조각만 모은 것
+    road_ids = gdf['unique_road_id'].to_numpy(np.int64)
+    assert index.road_keys.tolist() == np.unique(road_ids[valid]).tolist()
+    for road_pos in range(0, len(index.road_keys), 97):
+        parts = shapely.get_parts(gdf.geometry.values[(road_ids == index.road_keys[road_pos]) & valid])
+        assert shapely.equals_exact(shapely.get_parts(index.road_merged[road_pos]), parts, tolerance=0).all()
+    road_pos = np.array([0, len(index.road_keys) - 1])
+    segment = np.flatnonzero(road_ids == index.road_keys[0])[:1].repeat(2)
+    assert index.merged_geom_idx(segment, index.road_keys[road_pos]).tolist() == (len(gdf) + len(index.keys) + road_pos).tolist()
+    # GeoJSON에 없는 도로는 osmid별 MultiLineString
+    assert index.merged_geom_idx(segment[:1], np.array([-5])).tolist() == (len(gdf) + index.geom_key[segment[:1]]).tolist()
+
+def test_gather_matches_legacy_merge():
+    load_data()
+    gdf = get_road_geometry()
+    index = get_osmid_index()
+    df = load_hour_rows(TEST_HOUR)
+
+    (legacy_rows, legacy_geoms), legacy_sec = timed(legacy_merge, df, gdf)
+    (rows, geoms), gather_sec = timed(index.gather, df['osmid'].to_numpy(dtype=object))
+    print(f"[Test] {TEST_HOUR}시 병합 결과: {len(rows)}행")
+    print(f"[Time] pandas merge: {legacy_sec * 1000:.1f} ms / gather: {gather_sec * 1000:.1f} ms")
+
+    # 같은 행, 같은 순서
+    assert rows.tolist() == legacy_rows.tolist()
+    assert geoms.tolist() == legacy_geoms.tolist()
+
+    # 인덱스에 없는 osmid는 제외
+    rows, geoms = index.gather(np.array(["-1", index.keys[0]], dtype=object))
+    assert set(rows.tolist()) == {1}
+
+def test_merge_segments_one_row_per_road():
+    load_data()
+    index = get_osmid_index()
+    frame = join_hour(TEST_HOUR, load_hour_rows(TEST_HOUR), index)
+    merged = merge_segments(frame, index)
+    geoms = index.geometry_array()
+
+    print(f"[Test] {TEST_HOUR}시 조각 {len(frame)}개 -> 도로 {len(merged)}개")
+    assert len(merged) == len(np.unique(frame.road_ids)) < len(frame)
+    assert len(np.unique(merged.road_ids)) == len(merged)
+    assert (merged.geom_idx >= index.n_segments + len(index.merged)).all()
+
+    # 병합 geometry는 그 도로의 조각(GeoJSON unique_road_id)만 모은 것이고 점수/이름은 그대로
+    owners = index.geometry_road_ids()
+    for i in range(0, len(merged), 53):
+        road_id = merged.road_ids[i]
+        own = np.flatnonzero(owners[:index.n_segments] == road_id)
+        assert shapely.equals_exact(shapely.get_parts(geoms[merged.geom_idx[i]]), geoms[own], tolerance=0).all()
+        first = int(np.flatnonzero(frame.road_ids == road_id)[0])
+        assert merged.scores[i] == frame.scores[first]
+        assert merged.names[i] == frame.names[first]
+    assert join_hour(TEST_HOUR, load_hour_rows(TEST_HOUR), index, merge=True).road_ids.tolist() == merged.road_ids.tolist()
+
+def test_merged_payload_smaller_than_cross_product():
+    load_data()
+    index = get_osmid_index()
+    frame = join_hour(TEST_HOUR, load_hour_rows(TEST_HOUR), index)
+    merged = merge_segments(frame, index)
+    geoms = index.geometry_array()
+    # 변경 전 병합: 도로마다 첫 조각의 osmid별 MultiLineString
+    first = np.unique(frame.road_ids, return_index=True)[1]
+    by_osmid = index.merged_geom_idx(frame.geom_idx[first])
+
+    def size(geom_idx):
+        picked = geoms[geom_idx]
+        coords = int(shapely.get_num_coordinates(picked).sum())
+        nbytes = sum(len(text) for text in shapely.to_geojson(picked))
+        return coords, nbytes
+
+    segments, osmid, road = size(frame.geom_idx), size(by_osmid), size(merged.geom_idx)
+    print(f"[Test] {TEST_HOUR}시 좌표 수 / GeoJSON geometry 크기")
+    print(f"       조각별 {len(frame)}행: {segments[0]}개 / {segments[1] / 1e6:.1f} MB")
+    print(f"       osmid별 병합 {len(merged)}행: {osmid[0]}개 / {osmid[1] / 1e6:.1f} MB")
+    print(f"       도로별 병합 {len(merged)}행: {road[0]}개 / {road[1] / 1e6:.2f} MB")
+
+    # 도로별 병합은 GeoJSON 조각을 한 번씩만 포함 (osmid 교차곱 없음)
+    assert road[0] == int(shapely.get_num_coordinates(index.segments).sum())
+    assert road[0] < osmid[0] and road[0] < segments[0]
+
+if __name__ == "__main__":
+    test_osmid_index_slices()
+    test_gather_matches_legacy_merge()
+    test_merge_segments_one_row_per_road()
+    test_merged_payload_smaller_than_cross_product()
+    print("[Success] osmid 인덱스 gather 결과가 pandas merge와 같고, 도로별 병합이 올바릅니다.")
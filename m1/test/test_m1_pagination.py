@@ -0,0 +1,45 @@
+import sys
+import os
+
+# 현재 디렉토리(.../package/m1/test)의 상위 상위 디렉토리(.../package)를 path에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+m1_dir = os.path.dirname(current_dir)      # .../package/m1
+package_dir = os.path.dirname(m1_dir)      # .../package
+sys.path.append(current_dir)
+sys.path.append(package_dir)
+
+from m1.pagination import fetch_all_rows, total_order
+from m1_helpers import StubClient
+
+def make_rows():
+    # (hour, unique_road_id)가 중복된 행 포함 (동순위 정렬)
+    rows = []
+    for hour in range(3):
+        for road_id in range(50):
+            for copy in range(1 + (road_id % 7 == 0)):
+                rows.append({"hour": hour, "unique_road_id": road_id, "risk_score": copy / 10})
+    return rows
+
+def test_total_order_appends_primary_key():
+    assert total_order(("hour", "unique_road_id")) == ("hour", "unique_road_id", "id")
+    assert total_order(("id", "hour")) == ("id", "hour")
+    assert total_order(("hour",), primary_key=None) == ("hour",)
+
+def test_concurrent_pages_return_every_row_once():
+    client = StubClient({"COM_Location": make_rows()})
+    expected = sorted(row["id"] for row in client.tables["COM_Location"])
+
+    for seed in range(5):
+        client.rng.seed(seed)
+        rows = fetch_all_rows(client, "COM_Location", page_size=7, max_workers=4)
+        assert sorted(row["id"] for row in rows) == expected
+        assert [(r["hour"], r["unique_road_id"], r["id"]) for r in rows] == \
+            sorted((r["hour"], r["unique_road_id"], r["id"]) for r in rows)
+
+    rows = fetch_all_rows(client, "COM_Location", filters={"hour": 1}, page_size=7)
+    assert len(rows) == len(expected) // 3 and {r["hour"] for r in rows} == {1}
+
+if __name__ == "__main__":
+    test_total_order_appends_primary_key()
+    test_concurrent_pages_return_every_row_once()
+    print("[Success] 병렬 페이지 조회 결과에 누락/중복이 없습니다.")
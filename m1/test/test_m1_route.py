@@ -0,0 +1,190 @@
+import sys
+import os
+import json
+import numpy as np
+import pandas as pd
+import shapely
+
+# 현재 디렉토리(.../package/m1/test)의 상위 상위 디렉토리(.../package)를 path에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+m1_dir = os.path.dirname(current_dir)      # .../package/m1
+package_dir = os.path.dirname(m1_dir)      # .../package
+sys.path.append(current_dir)
+sys.path.append(package_dir)
+
+from m1.route import (
+    DEFAULT_BUFFER_M, MIN_COVERAGE, SAMPLE_SPACING_M, MAX_SAMPLES_PER_SEGMENT,
+    _meters_per_degree, best_rows_by_geometry, match_segments,
+)
+from m1.loader import get_osmid_index, get_road_geometry
+from m1.service import HourRisk, get_route_risk, merge_segments
+from m1.spatial import get_geometry_index
+from m1_helpers import CSV_PATH, use_local_cache
+
+TEST_HOUR = 18
+# /m2/route 결과 경로 3개 ([lng, lat], M1 도로 데이터 영역 안), M2 그래프 없이 고정 좌표로 사용
+TEST_PATHS = [
+    [
+        [129.1303304, 35.1557649], [129.129216, 35.1554982], [129.1279781, 35.155202],
+        [129.1276526, 35.1560857], [129.1260608, 35.1557228], [129.1254764, 35.1555896],
+        [129.1249446, 35.1554683], [129.1248802, 35.1556601], [129.1243055, 35.1558979],
+        [129.12412, 35.15586], [129.1235958, 35.1557407], [129.1228966, 35.1555898],
+        [129.1227742, 35.1559514], [129.1225032, 35.1566268], [129.1221223, 35.1571341],
+        [129.121732, 35.157654], [129.1210611, 35.1567635], [129.1207307, 35.1563277],
+        [129.1201123, 35.1564795], [129.1191452, 35.1562994], [129.1181159, 35.1549615],
+        [129.1173749, 35.1539859], [129.1167949, 35.1542515], [129.1146594, 35.154694],
+        [129.1144945, 35.1541565], [129.1132096, 35.1544189], [129.1130283, 35.1537943],
+        [129.1128784, 35.1534598], [129.1131547, 35.1531769], [129.1130321, 35.1526401],
+        [129.1129002, 35.1520623], [129.1124546, 35.1517339], [129.1122673, 35.1511626],
+        [129.1120557, 35.1504219], [129.1119083, 35.1498896], [129.1117417, 35.1492897],
+        [129.1114457, 35.1482547], [129.1111489, 35.1471726], [129.1106135, 35.1461407],
+        [129.1112023, 35.1458589], [129.1105219, 35.144963], [129.1098693, 35.1441036],
+        [129.1097933, 35.1440036], [129.1103397, 35.143716], [129.1100556, 35.1432207],
+        [129.10984, 35.1428685], [129.1091041, 35.1421165], [129.1086086, 35.1416341],
+        [129.1081095, 35.1411483], [129.1086152, 35.1408126], [129.1092084, 35.1404186],
+    ],
+    [
+        [129.118363, 35.1535048], [129.1179229, 35.1537265], [129.1173749, 35.1539859],
+        [129.1167949, 35.1542515], [129.1146594, 35.154694], [129.1144945, 35.1541565],
+        [129.1132096, 35.1544189], [129.1130283, 35.1537943], [129.1128784, 35.1534598],
+        [129.1131547, 35.1531769], [129.1130321, 35.1526401], [129.1129002, 35.1520623],
+        [129.1124546, 35.1517339], [129.1122673, 35.1511626], [129.1120557, 35.1504219],
+        [129.1119083, 35.1498896], [129.1117417, 35.1492897], [129.1114457, 35.1482547],
+        [129.1111489, 35.1471726], [129.1106135, 35.1461407], [129.1112023, 35.1458589],
+        [129.1117417, 35.1455742],
+    ],
+    [
+        [129.118363, 35.1535048], [129.1179229, 35.1537265], [129.1173749, 35.1539859],
+        [129.1181159, 35.1549615], [129.1191452, 35.1562994], [129.1201123, 35.1564795],
+        [129.1207462, 35.1573452], [129.1213448, 35.1581698], [129.1223064, 35.1582572],
+        [129.1234092, 35.1583575], [129.1242154, 35.1584429], [129.1248687, 35.158512],
+        [129.1247012, 35.159026], [129.1258696, 35.159389], [129.1269331, 35.1597194],
+        [129.1281734, 35.1601047], [129.1294289, 35.1604122], [129.1295235, 35.1610382],
+        [129.1291801, 35.1614742],
+    ],
+]
+
+def legacy_match_midpoints(coords, index, valid, buffer_m):
+    """변경 전 구현 (구간 중점 1개만 매칭, 비교용)"""
+    mx, my = _meters_per_degree(coords[:, 1].mean())
+    mid = (coords[:-1] + coords[1:]) / 2
+    matched = np.full(len(mid), -1, dtype=np.int64)
+    candidates = np.flatnonzero(valid)
+    for i, point in enumerate(shapely.points(mid)):
+        nearest = shapely.get_coordinates(shapely.shortest_line(index.geoms[candidates], point))[::2]
+        dist = np.hypot((nearest[:, 0] - mid[i, 0]) * mx, (nearest[:, 1] - mid[i, 1]) * my)
+        if dist.min() <= buffer_m:
+            matched[i] = candidates[np.argmin(dist)]
+    return matched
+
+def brute_force_match(coords, index, valid, buffer_m):
+    """모든 geometry와 표본점 거리를 직접 계산하여 구간별 최선 geometry를 고릅니다. (비교용)"""
+    mx, my = _meters_per_degree(coords[:, 1].mean())
+    candidates = np.flatnonzero(valid)
+    # 등장방형 근사(m) 좌표로 변환한 뒤 거리 계산
+    geoms_m = shapely.transform(index.geoms[candidates], lambda c: c * [mx, my])
+    matched = np.full(len(coords) - 1, -1, dtype=np.int64)
+    for i in range(len(coords) - 1):
+        length = np.hypot((coords[i + 1, 0] - coords[i, 0]) * mx, (coords[i + 1, 1] - coords[i, 1]) * my)
+        n = int(np.clip(np.ceil(length / SAMPLE_SPACING_M) + 1, 2, MAX_SAMPLES_PER_SEGMENT))
+        samples = np.linspace(coords[i], coords[i + 1], n) * [mx, my]
+        dist = shapely.distance(geoms_m[:, None], shapely.points(samples)[None, :])
+        inside = dist <= buffer_m
+        hits = inside.sum(axis=1)
+        if inside.any(axis=0).sum() < MIN_COVERAGE * n:
+            continue
+        mean = np.where(hits > 0, np.where(inside, dist, 0).sum(axis=1) / np.maximum(hits, 1), np.inf)
+        best = np.lexsort((candidates, np.round(mean, 2), -hits))[0]
+        matched[i] = candidates[best]
+    return matched
+
+def own_rows(frame, index):
+    """geometry별로 GeoJSON unique_road_id가 같은 frame 행 (dict로 직접 찾기, 비교용)"""
+    rows = {(g, road): i for i, (g, road) in enumerate(zip(frame.geom_idx.tolist(), frame.road_ids.tolist()))}
+    return np.array([rows.get((g, road), -1) for g, road in enumerate(index.road_ids.tolist())])
+
+def test_geometry_scored_by_own_road():
+    cache = use_local_cache()
+    frame = cache.get_frame(TEST_HOUR)
+    index = get_geometry_index()
+    gdf = get_road_geometry()
+    n = len(gdf)
+
+    # 조각 geometry(GeoJSON 행 순서)의 소유 도로 = GeoJSON unique_road_id, 공유(osmid별) MultiLineString은 -1
+    osmid_index = get_osmid_index()
+    shared = n + len(osmid_index.merged)
+    assert index.road_ids[:n].tolist() == gdf['unique_road_id'].tolist()
+    assert (index.road_ids[n:shared] == -1).all()
+    assert index.road_ids[shared:].tolist() == osmid_index.road_keys.tolist()
+
+    best = best_rows_by_geometry(frame, index.road_ids)
+    assert best[:n].tolist() == own_rows(frame, index)[:n].tolist()
+    assert (best[:n] >= 0).all()
+    assert (frame.road_ids[best[:n]] == gdf['unique_road_id'].to_numpy()).all()
+
+    # 변경 전(조각에 연결된 도로 중 최고 점수)과 다른 조각 수
+    legacy = best_rows_by_geometry(frame, np.full(len(index), -1))
+    differs = frame.road_ids[legacy[:n]] != frame.road_ids[best[:n]]
+    print(f"[Test] 조각 {n}개 중 다른 도로로 집계되던 조각 {int(differs.sum())}개")
+
+    # 병합 모드의 도로별 MultiLineString은 그 도로의 점수
+    merged = merge_segments(frame, osmid_index)
+    best = best_rows_by_geometry(merged, index.road_ids)
+    assert (best[merged.geom_idx] == np.arange(len(merged))).all()
+
+    # 공유 MultiLineString(unique_road_id가 없는 GeoJSON)은 연결된 도로 중 최고 점수
+    first = np.unique(frame.road_ids, return_index=True)[1]
+    shared_idx = osmid_index.merged_geom_idx(frame.geom_idx[np.sort(first)])
+    shared_frame = HourRisk(merged.hour, merged.road_ids, merged.names, merged.scores, shared_idx)
+    best = best_rows_by_geometry(shared_frame, index.road_ids)
+    for g in np.unique(shared_idx).tolist():
+        sharing = merged.scores[shared_idx == g]
+        assert merged.scores[best[g]] == sharing.max()
+
+def test_m2_route_matches_dense_samples():
+    cache = use_local_cache()
+    frame = cache.get_frame(TEST_HOUR)
+    index = get_geometry_index()
+    best = best_rows_by_geometry(frame, index.road_ids)
+    valid = best >= 0
+    names = pd.read_csv(CSV_PATH).drop_duplicates('unique_road_id').set_index('unique_road_id')['name']
+
+    for path in TEST_PATHS:
+        coords = np.array(path)
+        matched, distance = match_segments(coords, index, valid, DEFAULT_BUFFER_M)
+        expected = brute_force_match(coords, index, valid, DEFAULT_BUFFER_M)
+        legacy = legacy_match_midpoints(coords, index, valid, DEFAULT_BUFFER_M)
+        assert matched.tolist() == expected.tolist()
+        assert (distance[matched >= 0] <= DEFAULT_BUFFER_M).all()
+
+        result = json.loads(get_route_risk(TEST_HOUR, path, DEFAULT_BUFFER_M))
+        segments = result["segments"]
+        coverage = result["matched_length_m"] / result["length_m"]
+        mx, my = _meters_per_degree(coords[:, 1].mean())
+        lengths = np.hypot(np.diff(coords[:, 0]) * mx, np.diff(coords[:, 1]) * my)
+        legacy_coverage = lengths[legacy >= 0].sum() / lengths.sum()
+        print(f"[Test] 경로 {len(path)}점 {result['length_m']:.0f}m: 매칭 길이 {coverage:.1%} "
+              f"(중점 방식 {legacy_coverage:.1%}), cumulative_risk {result['cumulative_risk']}")
+
+        # 경로 대부분이 M1 도로 위를 지나고, 중점 방식보다 덜 빠뜨림
+        assert coverage >= 0.9
+        assert coverage >= legacy_coverage - 1e-9
+
+        # 구간 도로 = 매칭된 조각의 GeoJSON unique_road_id, 이름/점수도 그 도로의 값
+        rows = best[expected[expected >= 0]]
+        matched_segments = [s for s in segments if s["unique_road_id"] is not None]
+        assert [s["unique_road_id"] for s in matched_segments] == index.road_ids[expected[expected >= 0]].tolist()
+        assert [s["unique_road_id"] for s in matched_segments] == frame.road_ids[rows].tolist()
+        for s in matched_segments:
+            name = names.loc[s["unique_road_id"]]
+            assert s["name"] == (None if pd.isna(name) else name)
+
+        # cumulative_risk = Σ(매칭 구간 점수 × 길이 km)
+        cumulative = float((frame.scores[rows] * lengths[expected >= 0]).sum() / 1000)
+        assert np.isclose(result["cumulative_risk"], cumulative, rtol=0, atol=1e-6)
+        assert result["max_risk"] == frame.scores[rows].max()
+
+if __name__ == "__main__":
+    test_geometry_scored_by_own_road()
+    test_m2_route_matches_dense_samples()
+    print("[Success] /m2/route 경로의 구간별 매칭이 전체 비교 결과와 같습니다.")
@@ -0,0 +1,86 @@
+import sys
+import os
+import json
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# 현재 디렉토리(.../package/m1/test)의 상위 상위 디렉토리(.../package)를 path에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+m1_dir = os.path.dirname(current_dir)      # .../package/m1
+package_dir = os.path.dirname(m1_dir)      # .../package
+sys.path.append(current_dir)
+sys.path.append(package_dir)
+
+from m1.router import router
+from m1.schemas import TimelineResponse
+from m1.service import STREAM_CHUNK_ROWS
+from m1_helpers import use_local_cache
+
+TEST_HOUR = 18
+TEST_BBOX = "129.112,35.148,129.122,35.158"
+
+def make_client():
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+def test_risk_openapi_declares_all_formats():
+    spec = make_client().get("/openapi.json").json()
+    content = spec["paths"]["/m1/risk"]["get"]["responses"]["200"]["content"]
+
+    # format=geojson / compact 는 application/json, stream=true 는 NDJSON
+    json_schema = content["application/json"]["schema"]
+    refs = {option["$ref"].rsplit("/", 1)[-1] for option in json_schema["anyOf"]}
+    assert refs == {"RiskResponse", "CompactRiskResponse"}
+    assert content["application/x-ndjson"]["schema"]["$ref"].endswith("/RoadRiskItem")
+    for name in ("RiskResponse", "CompactRiskResponse", "RoadRiskItem"):
+        assert name in spec["components"]["schemas"]
+
+def test_ndjson_stream_matches_total_count():
+    use_local_cache()
+    client = make_client()
+
+    for params in ({}, {"bbox": TEST_BBOX}, {"bbox": TEST_BBOX, "min_level": "높음"}, {"zoom": 14}):
+        query = {"hour": TEST_HOUR, "stream": "true", **params}
+        with client.stream("GET", "/m1/risk", params=query) as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("application/x-ndjson")
+            total = int(response.headers["x-total-count"])
+            body = b"".join(response.iter_bytes())
+
+        lines = body.decode("utf-8").splitlines()
+        print(f"[Test] stream {params}: X-Total-Count {total}, 줄 {len(lines)}개")
+        assert total == len(lines)
+        assert body.endswith(b"\n") or total == 0
+
+        # 같은 조건의 일반(geojson) 응답과 같은 항목, 같은 순서
+        plain = client.get("/m1/risk", params={k: v for k, v in query.items() if k != "stream"}).json()
+        assert plain["count"] == total
+        assert [json.loads(line) for line in lines] == plain["data"]
+    assert len(lines) > STREAM_CHUNK_ROWS      # 여러 chunk로 나눠 전송한 경우 포함
+
+    # compact 형식은 stream 미지원
+    assert client.get("/m1/risk", params={"hour": TEST_HOUR, "stream": "true", "format": "compact"}).status_code == 400
+
+def test_empty_timeline_matches_schema():
+    use_local_cache(lambda hour: None)     # 데이터 없음 (DB 오류 등)
+    client = make_client()
+    try:
+        response = client.get("/m1/risk/timeline")
+        assert response.status_code == 200
+        body = response.json()
+
+        # OpenAPI에 공개한 필수 필드를 모두 포함한 빈 응답
+        spec = client.get("/openapi.json").json()
+        required = spec["components"]["schemas"]["TimelineResponse"]["required"]
+        assert set(required) <= set(body)
+        TimelineResponse(**body)
+        assert body["count"] == 0 and body["hours"] == [] and body["risk_score"] == [] and body["geometries"] == []
+    finally:
+        use_local_cache()
+
+if __name__ == "__main__":
+    test_risk_openapi_declares_all_formats()
+    test_ndjson_stream_matches_total_count()
+    test_empty_timeline_matches_schema()
+    print("[Success] /m1/risk OpenAPI 응답 형식과 NDJSON 줄 수 확인")
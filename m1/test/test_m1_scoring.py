@@ -0,0 +1,139 @@
+import sys
+import os
+import threading
+import numpy as np
+import pandas as pd
+
+# 현재 디렉토리(.../package/m1/test)의 상위 상위 디렉토리(.../package)를 path에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+m1_dir = os.path.dirname(current_dir)      # .../package/m1
+package_dir = os.path.dirname(m1_dir)      # .../package
+sys.path.append(current_dir)
+sys.path.append(package_dir)
+
+from m1.cache import HOURS
+from m1.scoring import COMPONENT_COLUMNS, DEFAULT_WEIGHTS, ComponentScores, get_active_weights, parse_weights, set_active_weights
+from m1.service import apply_weights, classify_risk, rescore_cache
+from m1_helpers import CSV_PATH, local_hour_frame, timed, use_local_cache
+
+TEST_HOUR = 18
+
+def test_default_weights_reproduce_csv():
+    df = pd.read_csv(CSV_PATH)
+    components = ComponentScores(df)
+    scores = components.score(DEFAULT_WEIGHTS)
+    got = scores[df['hour'].to_numpy(), np.searchsorted(components.road_ids, df['unique_road_id'].to_numpy())]
+
+    expected = df['risk_score'].to_numpy()
+    print(f"[Test] 도로-시간대 {len(components)}개, CSV risk_score와 최대 차이 {np.abs(got - expected).max():.2e}")
+    assert len(components) == len(df)
+    assert np.allclose(got, expected, rtol=0, atol=1e-12)
+    # 등급: CSV 값 중 경계 바로 아래(0.5999999999999999 등)는 재계산 시 반올림되어 경계(0.6) 등급이 됨
+    boundary = classify_risk(got) != classify_risk(expected)
+    print(f"[Test] 등급 경계 부동소수점 오차 행: {int(boundary.sum())}개")
+    assert np.allclose(got[boundary] * 10, np.round(got[boundary] * 10), rtol=0, atol=1e-12)
+    assert (classify_risk(got) == classify_risk(np.round(expected, 12))).all()
+
+    # 행렬곱 한 번 = 행별 Σ weight * component
+    weights = parse_weights("width=0.5,density=0.5")
+    manual = df[list(COMPONENT_COLUMNS)].to_numpy() @ weights
+    got = components.score(weights)[df['hour'].to_numpy(), np.searchsorted(components.road_ids, df['unique_road_id'].to_numpy())]
+    assert np.allclose(got, manual, rtol=0, atol=1e-12)
+
+def test_rescore_frame():
+    frame = local_hour_frame(TEST_HOUR)
+    same = apply_weights(frame, DEFAULT_WEIGHTS)
+    assert np.allclose(same.scores, frame.scores, rtol=0, atol=1e-12)
+    assert apply_weights(frame, None) is frame
+
+    weights = parse_weights("1,0,0,0")
+    rescored = apply_weights(frame, weights)
+    df = pd.read_csv(CSV_PATH)
+    length = df[df['hour'] == TEST_HOUR].set_index('unique_road_id')['length_score_norm']
+    assert np.allclose(rescored.scores, length.loc[frame.road_ids].to_numpy(), rtol=0, atol=1e-12)
+    assert (rescored.road_ids == frame.road_ids).all() and (rescored.geom_idx == frame.geom_idx).all()
+
+    # 구성 점수가 없는 도로는 기존 점수 유지
+    components = ComponentScores(df[df['unique_road_id'] != frame.road_ids[0]])
+    kept = components.rescore(TEST_HOUR, frame.road_ids, frame.scores, weights)
+    missing = frame.road_ids == frame.road_ids[0]
+    assert (kept[missing] == frame.scores[missing]).all()
+    assert np.allclose(kept[~missing], rescored.scores[~missing])
+
+def test_rescore_cache_without_reload():
+    loads = []
+
+    def loader(hour):
+        loads.append(hour)
+        return local_hour_frame(hour)
+
+    cache = use_local_cache(loader)
+    cache.refresh(render=False)
+    base = {hour: cache.get_frame(hour) for hour in HOURS}
+    loads.clear()
+    try:
+        weights = parse_weights("width=0.5,density=0.5")
+        version = cache.version
+        rescored, sec = timed(rescore_cache, weights, repeat=1)
+        print(f"[Test] 가중치 재계산: {rescored}개 시간대 {sec * 1000:.1f} ms, loader 호출 {len(loads)}회")
+        # DB(loader) 재조회 없이 캐시된 frame만 다시 계산하고 버전을 올림
+        assert rescored == len(HOURS) and loads == []
+        assert cache.version > version
+        for hour in HOURS:
+            frame = cache.get_frame(hour)
+            assert np.array_equal(frame.scores, apply_weights(base[hour], weights).scores)
+            assert np.array_equal(frame.base_scores, base[hour].scores)
+            assert (frame.road_ids == base[hour].road_ids).all()
+
+        # 다른 가중치로 다시 바꿔도 저장된 점수에서 계산, None이면 저장된 점수 그대로 복원
+        rescore_cache(DEFAULT_WEIGHTS)
+        assert np.array_equal(cache.get_frame(TEST_HOUR).scores, apply_weights(base[TEST_HOUR], DEFAULT_WEIGHTS).scores)
+        rescore_cache(None)
+        for hour in HOURS:
+            assert np.array_equal(cache.get_frame(hour).scores, base[hour].scores)
+            assert cache.get_frame(hour).base_scores is None
+        assert loads == []
+    finally:
+        set_active_weights(None)
+
+def test_concurrent_rescore_keeps_weights_consistent():
+    cache = use_local_cache()
+    cache.refresh(render=False)
+    base = cache.get_frame(TEST_HOUR)
+    options = [parse_weights("1,0,0,0"), parse_weights("0,0,0,1"), parse_weights("1,1,1,1")]
+    try:
+        def run(weights):
+            for _ in range(5):
+                rescore_cache(weights)
+
+        threads = [threading.Thread(target=run, args=(weights,)) for weights in options]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        # 마지막으로 적용된 가중치 = 캐시 점수를 만든 가중치
+        active = get_active_weights()
+        assert any(np.array_equal(active, weights) for weights in options)
+        assert np.array_equal(cache.get_frame(TEST_HOUR).scores, apply_weights(base, active).scores)
+    finally:
+        set_active_weights(None)
+
+def test_parse_weights():
+    assert np.allclose(parse_weights("0.1,0.3,0.35,0.25"), DEFAULT_WEIGHTS)
+    assert np.allclose(parse_weights("1,3,3.5,2.5"), DEFAULT_WEIGHTS)
+    assert np.allclose(parse_weights("slope=1"), [0, 0, 1, 0])
+    for value in ("1,2,3", "a,b,c,d", "0,0,0,0", "-1,1,1,1", "speed=1"):
+        try:
+            parse_weights(value)
+            assert False, value
+        except ValueError:
+            pass
+
+if __name__ == "__main__":
+    test_default_weights_reproduce_csv()
+    test_rescore_frame()
+    test_rescore_cache_without_reload()
+    test_concurrent_rescore_keeps_weights_consistent()
+    test_parse_weights()
+    print("[Success] DEFAULT_WEIGHTS 재계산 결과가 CSV risk_score와 같습니다.")
@@ -0,0 +1,92 @@
+import sys
+import os
+import shutil
+import tempfile
+import numpy as np
+import shapely
+
+# 현재 디렉토리(.../package/m1/test)의 상위 상위 디렉토리(.../package)를 path에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+m1_dir = os.path.dirname(current_dir)      # .../package/m1
+package_dir = os.path.dirname(m1_dir)      # .../package
+sys.path.append(current_dir)
+sys.path.append(package_dir)
+
+from m1 import snapshot as snapshot_module
+from m1.loader import get_geojson_path, get_road_geometry
+from m1.snapshot import RiskSnapshot, compile_snapshot, get_snapshot
+from m1_helpers import CSV_PATH, local_hour_frame
+
+TEST_HOURS = (0, 8, 18)
+
+def test_compile_load_matches_csv():
+    out_dir = tempfile.mkdtemp(prefix="m1_snapshot_")
+    try:
+        compile_snapshot(out_dir=out_dir)
+        snapshot = RiskSnapshot(out_dir)
+        assert snapshot.stale_reason() is None
+
+        # geometry: GeoJSON 원본과 같은 좌표
+        gdf = get_road_geometry()
+        assert shapely.equals_exact(snapshot.geometries(), gdf.geometry.values, tolerance=0).all()
+
+        # 시간대별 병합 결과: CSV + osmid 인덱스 병합(service.join_hour)과 같은 행/순서
+        for hour in TEST_HOURS:
+            road_ids, names, scores, geom_idx, dongs = snapshot.hour_columns(hour)
+            frame = local_hour_frame(hour)
+            assert len(road_ids) == len(frame) > 0
+            assert (road_ids == frame.road_ids).all()
+            assert (scores == frame.scores).all()
+            assert (geom_idx == frame.geom_idx).all()
+            assert names == frame.names
+            assert dongs == frame.dongs
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+def test_stale_snapshot_is_refused_or_recompiled():
+    work_dir = tempfile.mkdtemp(prefix="m1_snapshot_")
+    csv_path = os.path.join(work_dir, "road_risk_final.csv")
+    out_dir = os.path.join(work_dir, "snapshot")
+    shutil.copyfile(CSV_PATH, csv_path)
+    env = {"M1_CSV_PATH": csv_path, "M1_SNAPSHOT_DIR": out_dir}
+    previous = {name: os.environ.get(name) for name in env}
+    os.environ.update(env)
+    try:
+        snapshot_module._snapshot = None
+        # 스냅샷이 없으면 기본값으로는 컴파일하지 않음
+        assert get_snapshot() is None
+        assert not os.path.exists(out_dir)
+
+        compile_snapshot(out_dir=out_dir)
+        loaded = get_snapshot()
+        assert loaded is not None and loaded.stale_reason() is None
+        version = loaded.version
+
+        # 원본 CSV가 바뀌면 (마지막 행 삭제) 더 이상 사용하지 않음
+        with open(csv_path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        lines = lines[:-1]
+        with open(csv_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        assert RiskSnapshot(out_dir).stale_reason() is not None
+        snapshot_module._snapshot = None
+        assert get_snapshot() is None
+
+        # compile=True 이면 다시 컴파일
+        recompiled = get_snapshot(compile=True)
+        assert recompiled is not None and recompiled.version != version
+        assert recompiled.stale_reason() is None
+        assert recompiled.meta["n_rows"] <= loaded.meta["n_rows"]
+    finally:
+        snapshot_module._snapshot = None
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_compile_load_matches_csv()
+    test_stale_snapshot_is_refused_or_recompiled()
+    print("[Success] 스냅샷 컴파일/로드 결과가 CSV와 일치하고, 원본 변경 시 다시 사용하지 않습니다.")
@@ -0,0 +1,107 @@
+import sys
+import os
+import shutil
+import tempfile
+import pandas as pd
+
+# 현재 디렉토리(.../package/m1/test)의 상위 상위 디렉토리(.../package)를 path에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+m1_dir = os.path.dirname(current_dir)      # .../package/m1
+package_dir = os.path.dirname(m1_dir)      # .../package
+sys.path.append(current_dir)
+sys.path.append(package_dir)
+
+from m1 import sync
+from m1.sync import TABLE, load_csv_rows, plan_sync, row_hash, row_key, sync_com_location
+from m1_helpers import CSV_PATH, StubClient
+
+TEST_HOURS = (0, 1)
+
+def make_row(road_id, hour, score=0.5, osmid=("100",), name="광안로", dong="광안동"):
+    return {"unique_road_id": road_id, "hour": hour, "osmid": list(osmid), "name": name, "dong": dong, "risk_score": score}
+
+def test_row_hash_normalizes_db_format():
+    row = make_row(1, 7, 0.325, ("37398454",))
+    # DB/CSV 표현 차이 (osmid 형식, 정수 키 타입, float 오차, id 컬럼)는 같은 해시
+    for same in (
+        dict(row, osmid="37398454.0"),
+        dict(row, osmid=[37398454.0]),
+        dict(row, unique_road_id="1", hour=7.0),
+        dict(row, risk_score=0.32500000000000001),
+        dict(row, id=99),
+    ):
+        assert row_hash(same) == row_hash(row)
+    for different in (
+        dict(row, risk_score=0.326),
+        dict(row, name=None),
+        dict(row, dong="민락동"),
+        dict(row, osmid=["37398454", "1"]),
+        dict(row, hour=8),
+    ):
+        assert row_hash(different) != row_hash(row)
+
+def test_plan_sync_cases():
+    local = [make_row(1, 0), make_row(2, 0, 0.9), make_row(3, 0), make_row(4, 0)]
+    remote = [
+        make_row(1, 0),                 # 그대로
+        make_row(2, 0, 0.1),            # 점수 변경
+        make_row(3, 0), make_row(3, 0), # 중복 저장
+        make_row(9, 0),                 # CSV에 없음
+    ]                                   # 4: 새 행
+    plan = plan_sync(local, remote)
+    assert plan.unchanged == 1
+    assert [row_key(row) for row in plan.upserts] == [(2, 0), (3, 0), (4, 0)]
+    assert plan.duplicates == [(3, 0)]
+    assert plan.stale == [(9, 0)]
+
+    # 이미 같으면 아무 작업 없음
+    plan = plan_sync(local, local)
+    assert (plan.upserts, plan.duplicates, plan.stale, plan.unchanged) == ([], [], [], len(local))
+
+def test_sync_against_stub_client():
+    work_dir = tempfile.mkdtemp(prefix="m1_sync_")
+    csv_path = os.path.join(work_dir, "road_risk_final.csv")
+    df = pd.read_csv(CSV_PATH, dtype={'osmid': str})
+    df[df['hour'].isin(TEST_HOURS)].to_csv(csv_path, index=False)
+    local = load_csv_rows(csv_path)
+    hour0 = [row for row in local if row['hour'] == 0]
+
+    # DB: 0시만 저장, 일부 변경/중복, CSV에 없는 시간대 행 포함
+    remote = [dict(row) for row in hour0]
+    for row in remote[:5]:
+        row['risk_score'] = 0.0
+    remote += [dict(row) for row in hour0[100:103]]
+    remote += [make_row(row['unique_road_id'], 23) for row in hour0[:2]]
+    client = StubClient({TABLE: remote}, seed=3)
+
+    get_client = sync.get_supabase_client
+    sync.get_supabase_client = lambda: client
+    try:
+        summary = sync_com_location(csv_path, chunk_size=500, max_workers=4)
+        print(f"[Test] 1차 동기화: {summary}")
+        assert summary["db_rows"] == len(remote)
+        assert summary["unchanged"] == len(hour0) - 5 - 3
+        assert summary["upserts"] == len(local) - summary["unchanged"]
+        assert summary["duplicates"] == 3
+        assert summary["stale"] == 2
+
+        rows = client.tables[TABLE]
+        keys = [row_key(row) for row in rows]
+        assert len(keys) == len(set(keys)) == len(local) + 2
+        by_key = {row_key(row): row_hash(row) for row in rows}
+        assert all(by_key[row_key(row)] == row_hash(row) for row in local)
+
+        # 다시 실행하면 변경 없음, --prune은 CSV에 없는 행 삭제
+        summary = sync_com_location(csv_path, prune=True, chunk_size=500, max_workers=4)
+        assert (summary["unchanged"], summary["upserts"], summary["duplicates"], summary["stale"]) == (len(local), 0, 0, 2)
+        assert len(client.tables[TABLE]) == len(local)
+        assert sync_com_location(csv_path, dry_run=True)["stale"] == 0
+    finally:
+        sync.get_supabase_client = get_client
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_row_hash_normalizes_db_format()
+    test_plan_sync_cases()
+    test_sync_against_stub_client()
+    print("[Success] row_hash / plan_sync / 동기화 결과 확인")
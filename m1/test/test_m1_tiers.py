@@ -0,0 +1,68 @@
+import sys
+import os
+import json
+import numpy as np
+import shapely
+
+# 현재 디렉토리(.../package/m1/test)의 상위 상위 디렉토리(.../package)를 path에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+m1_dir = os.path.dirname(current_dir)      # .../package/m1
+package_dir = os.path.dirname(m1_dir)      # .../package
+sys.path.append(current_dir)
+sys.path.append(package_dir)
+
+from m1.service import render_frame
+from m1.spatial import (
+    SIMPLIFY_TOLERANCES, get_geometry_index, select_tier, tier_for_tolerance, tier_for_zoom,
+)
+from m1_helpers import local_hour_frame
+
+TEST_HOUR = 18
+
+def test_tier_choice():
+    # zoom: 17 이상은 원본, 낮을수록 거친 단계
+    assert [tier_for_zoom(z) for z in (20, 17, 16, 15, 14, 13, 12, 5)] == [0, 0, 1, 2, 3, 3, 4, 4]
+
+    # tolerance: 허용 오차를 넘지 않는 가장 거친 단계
+    assert tier_for_tolerance(0) == 0
+    assert tier_for_tolerance(0.000005) == 0
+    for tier, tolerance in enumerate(SIMPLIFY_TOLERANCES):
+        assert tier_for_tolerance(tolerance) == tier
+    assert tier_for_tolerance(0.00005) == 2
+    assert tier_for_tolerance(1.0) == len(SIMPLIFY_TOLERANCES) - 1
+
+    # tolerance가 zoom보다 우선, 둘 다 없으면 원본
+    assert select_tier() == 0
+    assert select_tier(zoom=12) == 4
+    assert select_tier(zoom=12, tolerance=0) == 0
+    assert select_tier(zoom=20, tolerance=0.0003) == 4
+
+def test_tiers_stay_within_tolerance():
+    frame = local_hour_frame(TEST_HOUR)
+    index = get_geometry_index()
+    used = np.unique(frame.geom_idx)
+    geoms = index.geoms[used]
+
+    previous = None
+    for tier, tolerance in enumerate(SIMPLIFY_TOLERANCES):
+        simplified = index.tiers[tier][used]
+        count = int(shapely.get_num_coordinates(simplified).sum())
+        # 단순화 결과는 원본에서 허용 오차 이상 벗어나지 않음
+        distance = shapely.hausdorff_distance(geoms, simplified).max()
+        print(f"[Test] tier {tier} (tolerance {tolerance}): 좌표 {count}개, 최대 편차 {distance:.7f}")
+        assert distance <= tolerance + 1e-12
+        if previous is not None:
+            assert count <= previous
+        previous = count
+    assert previous < int(shapely.get_num_coordinates(geoms).sum())
+
+    # 응답 본문은 선택한 단계의 좌표를 사용
+    items = json.loads(render_frame(frame, 3))["data"]
+    expected = index.geojson(3)
+    for i in range(0, len(items), 211):
+        assert items[i]["geometry"] == expected[frame.geom_idx[i]]
+
+if __name__ == "__main__":
+    test_tier_choice()
+    test_tiers_stay_within_tolerance()
+    print("[Success] 단순화 단계 선택과 허용 오차 확인")
@@ -0,0 +1,234 @@
+import sys
+import os
+import math
+import struct
+import numpy as np
+import shapely
+
+# 현재 디렉토리(.../package/m1/test)의 상위 상위 디렉토리(.../package)를 path에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+m1_dir = os.path.dirname(current_dir)      # .../package/m1
+package_dir = os.path.dirname(m1_dir)      # .../package
+sys.path.append(current_dir)
+sys.path.append(package_dir)
+
+from m1 import service
+from m1.cache import TileCache
+from m1.service import RISK_LEVEL_NAMES, classify_risk, get_risk_tile, seed_tiles
+from m1.spatial import get_geometry_index, tier_for_zoom
+from m1.tiles import BUFFER, EXTENT, LAYER_NAME, PROPERTY_KEYS, tile_bounds, tile_intersects, tiles_for_bounds
+from m1_helpers import use_local_cache
+
+TEST_HOUR = 18
+TEST_ZOOM = 15
+# 광안리 해수욕장
+TEST_POINT = (129.118, 35.153)
+
+# --- 테스트용 최소 MVT(protobuf) 디코더 ---
+
+def read_varint(data, pos):
+    result, shift = 0, 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return result, pos
+
+def read_fields(data):
+    """(field 번호, 값) 목록 (varint -> int, length-delimited -> bytes, fixed64 -> bytes)"""
+    fields, pos = [], 0
+    while pos < len(data):
+        key, pos = read_varint(data, pos)
+        number, wire = key >> 3, key & 7
+        if wire == 0:
+            value, pos = read_varint(data, pos)
+        elif wire == 1:
+            value, pos = data[pos:pos + 8], pos + 8
+        elif wire == 2:
+            length, pos = read_varint(data, pos)
+            value, pos = data[pos:pos + length], pos + length
+        else:
+            raise ValueError(f"unexpected wire type {wire}")
+        fields.append((number, value))
+    return fields
+
+def read_packed(data):
+    values, pos = [], 0
+    while pos < len(data):
+        value, pos = read_varint(data, pos)
+        values.append(value)
+    return values
+
+def unzigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+def decode_value(data):
+    number, value = read_fields(data)[0]
+    if number == 1:
+        return value.decode("utf-8")
+    if number == 3:
+        return struct.unpack("<d", value)[0]
+    return value
+
+def decode_lines(commands):
+    parts, x, y, i = [], 0, 0, 0
+    while i < len(commands):
+        command, count = commands[i] & 7, commands[i] >> 3
+        i += 1
+        for _ in range(count):
+            x += unzigzag(commands[i])
+            y += unzigzag(commands[i + 1])
+            i += 2
+            if command == 1:
+                parts.append([])
+            parts[-1].append((x, y))
+    return parts
+
+def decode_tile(data):
+    layers = []
+    for number, layer_bytes in read_fields(data):
+        assert number == 3
+        layer = {"features": [], "keys": [], "values": []}
+        for field, value in read_fields(layer_bytes):
+            if field == 1:
+                layer["name"] = value.decode("utf-8")
+            elif field == 2:
+                layer["features"].append(dict(read_fields(value)))
+            elif field == 3:
+                layer["keys"].append(value.decode("utf-8"))
+            elif field == 4:
+                layer["values"].append(decode_value(value))
+            elif field == 5:
+                layer["extent"] = value
+            elif field == 15:
+                layer["version"] = value
+        layers.append(layer)
+    return layers
+
+def pixel_to_lonlat(px, py, z, x, y):
+    n = 2 ** z
+    lon = (x + px / EXTENT) / n * 360.0 - 180.0
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + py / EXTENT) / n))))
+    return lon, lat
+
+# --- 테스트 ---
+
+def test_seeded_tile_decodes():
+    use_local_cache()
+    service.tile_cache = TileCache(lambda: service.risk_cache.stamp())
+    frame = service.risk_cache.get_frame(TEST_HOUR)
+    index = get_geometry_index()
+    (x, y), = tiles_for_bounds(TEST_POINT * 2, TEST_ZOOM)
+
+    assert seed_tiles([TEST_HOUR], [TEST_ZOOM]) > 0
+    hits = service.tile_cache.stats()["tile_hits"]
+    tile = get_risk_tile(TEST_HOUR, TEST_ZOOM, x, y)
+    assert service.tile_cache.stats()["tile_hits"] == hits + 1
+
+    layers = decode_tile(tile)
+    assert len(layers) == 1
+    layer = layers[0]
+    assert layer["name"] == LAYER_NAME
+    assert layer["extent"] == EXTENT
+    assert layer["version"] == 2
+    assert tuple(layer["keys"]) == PROPERTY_KEYS
+
+    # 기대 결과: 타일 영역(+buffer)으로 잘랐을 때 선이 남는 행 (전체 행 직접 비교)
+    geoms = index.tiers[tier_for_zoom(TEST_ZOOM)][frame.geom_idx]
+    clipped = shapely.clip_by_rect(geoms, *tile_bounds(TEST_ZOOM, x, y, BUFFER))
+    expected_rows = np.flatnonzero(shapely.length(clipped) > 0)
+    features = layer["features"]
+    print(f"[Test] z{TEST_ZOOM}/{x}/{y}: feature {len(features)}개, 기대 {len(expected_rows)}개, {len(tile)} bytes")
+    assert len(features) == len(expected_rows) > 0
+
+    ids = [feature[1] for feature in features]
+    assert len(set(ids)) == len(ids)
+    assert sorted(row + 1 for row in expected_rows.tolist()) == sorted(ids)
+
+    levels = classify_risk(frame.scores).tolist()
+    pixel = 360.0 / 2 ** TEST_ZOOM / EXTENT
+    for feature in features:
+        row = feature[1] - 1
+        assert feature[3] == 2      # LINESTRING
+        tags = read_packed(feature[2])
+        props = {layer["keys"][k]: layer["values"][v] for k, v in zip(tags[::2], tags[1::2])}
+        assert props["unique_road_id"] == int(frame.road_ids[row])
+        assert props.get("name") == frame.names[row]
+        assert props["risk_score"] == float(frame.scores[row])
+        assert props["risk_level"] == levels[row] and props["risk_level"] in RISK_LEVEL_NAMES.tolist()
+
+        # 타일 좌표 -> 경위도로 되돌린 점은 원래 도로에서 1픽셀 이내
+        parts = decode_lines(read_packed(feature[4]))
+        assert parts and all(len(part) >= 2 for part in parts)
+        points = shapely.points([pixel_to_lonlat(px, py, TEST_ZOOM, x, y) for part in parts for px, py in part])
+        for px, py in (p for part in parts for p in part):
+            assert -BUFFER - 1 <= px <= EXTENT + BUFFER + 1 and -BUFFER - 1 <= py <= EXTENT + BUFFER + 1
+        assert shapely.distance(points, geoms[row]).max() <= 2 * pixel
+
+def test_empty_tiles_are_not_cached():
+    use_local_cache()
+    service.tile_cache = TileCache(lambda: service.risk_cache.stamp())
+    index = get_geometry_index()
+
+    # 도로 영역 밖 (데이터 조회도 하지 않음)
+    (x, y), = tiles_for_bounds((126.97, 37.56, 126.97, 37.56), TEST_ZOOM)
+    assert get_risk_tile(TEST_HOUR, TEST_ZOOM, x, y) is None
+    assert service.tile_cache.stats()["tile_misses"] == 0
+    assert service.risk_cache.stats()["cached_hours"] == []
+
+    # 영역 안이지만 도로가 없는 타일 (바다/공원 등): 매번 다시 확인하고 보관하지 않음
+    tiles = tiles_for_bounds(index.bounds, 17)
+    empty = [t for t in tiles if get_risk_tile(TEST_HOUR, 17, *t) is None]
+    stats = service.tile_cache.stats()
+    print(f"[Test] z17 타일 {len(tiles)}개 중 빈 타일 {len(empty)}개")
+    assert 0 < len(empty) < len(tiles)
+    assert all(tile_intersects(index.bounds, 17, *t) for t in empty)
+    assert stats["tiles"] == len(tiles) - len(empty)
+    assert get_risk_tile(TEST_HOUR, 17, *empty[0]) is None
+    assert service.tile_cache.stats()["tile_misses"] == stats["tile_misses"] + 1
+
+def test_tile_cache_is_bounded():
+    stamp = [1]
+    cache = TileCache(lambda: stamp[0], max_bytes=10)
+    builds = []
+
+    def builder(body):
+        def build():
+            builds.append(body)
+            return body
+        return build
+
+    assert cache.get("a", builder(b"aaaa")) == b"aaaa"
+    assert cache.get("b", builder(b"bbbb")) == b"bbbb"
+    assert cache.get("a", builder(b"xxxx")) == b"aaaa"       # 최근 사용 -> 유지
+    cache.get("c", builder(b"cccc"))
+    assert cache.stats()["tile_bytes"] <= 10
+    assert cache.get("a", builder(b"xxxx")) == b"aaaa"
+    assert cache.get("b", builder(b"bbbb")) == b"bbbb" and builds.count(b"bbbb") == 2
+
+    # 너무 큰 타일, 빈 타일은 보관하지 않음
+    assert cache.get("big", builder(b"0" * 11)) == b"0" * 11
+    assert cache.get("empty", builder(b"")) is None
+    assert cache.get("none", builder(None)) is None
+    assert "big" not in cache._tiles and cache.stats()["tiles"] <= 2
+
+    # stamp(데이터 버전)가 바뀌면 비움
+    stamp[0] = 2
+    assert cache.get("a", builder(b"new")) == b"new"
+    assert cache.stats()["tiles"] == 1
+
+    # 빌드 도중 무효화되면 저장하지 않음
+    def build_and_invalidate():
+        stamp[0] = 3
+        return b"old"
+
+    assert cache.get("d", build_and_invalidate) == b"old"
+    assert cache.get("d", builder(b"ddd")) == b"ddd"
+
+if __name__ == "__main__":
+    test_seeded_tile_decodes()
+    test_empty_tiles_are_not_cached()
+    test_tile_cache_is_bounded()
+    print("[Success] MVT 타일 디코딩 결과가 원본 도로/속성과 일치하고, 빈 타일은 캐시하지 않습니다.")
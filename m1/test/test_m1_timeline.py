@@ -0,0 +1,69 @@
+import sys
+import os
+import json
+import numpy as np
+
+# 현재 디렉토리(.../package/m1/test)의 상위 상위 디렉토리(.../package)를 path에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+m1_dir = os.path.dirname(current_dir)      # .../package/m1
+package_dir = os.path.dirname(m1_dir)      # .../package
+sys.path.append(current_dir)
+sys.path.append(package_dir)
+
+from m1.cache import HOURS
+from m1.service import RISK_LEVEL_NAMES, classify_risk, get_timeline
+from m1.spatial import get_geometry_index
+from m1_helpers import use_local_cache
+
+def test_timeline_matrix_matches_hours():
+    cache = use_local_cache()
+    timeline = json.loads(get_timeline())
+    frames = {hour: cache.get_frame(hour) for hour in HOURS}
+
+    count = timeline["count"]
+    all_roads = np.unique(np.concatenate([f.road_ids for f in frames.values() if f is not None]))
+    print(f"[Test] timeline: 도로 {count}개 x {len(timeline['hours'])}시간, 조각 {len(timeline['segment_road'])}개, "
+          f"geometry {len(timeline['geometries'])}개")
+
+    # 행렬 모양: (시간대 24, 도로 count)
+    assert timeline["hours"] == list(HOURS)
+    assert count == len(all_roads) == len(timeline["unique_road_id"]) == len(timeline["name"])
+    assert timeline["unique_road_id"] == all_roads.tolist()
+    assert len(timeline["risk_score"]) == len(timeline["risk_level"]) == len(HOURS)
+    assert all(len(row) == count for row in timeline["risk_score"] + timeline["risk_level"])
+
+    # 시간대별 값은 각 시간대 응답과 같음 (데이터 없는 도로는 null / -1)
+    level_names = timeline["level_names"]
+    assert level_names == RISK_LEVEL_NAMES.tolist()
+    for hour, frame in frames.items():
+        scores = timeline["risk_score"][hour]
+        levels = timeline["risk_level"][hour]
+        columns = np.searchsorted(all_roads, frame.road_ids) if frame is not None else np.array([], dtype=int)
+        expected = dict(zip(columns.tolist(), frame.scores.tolist())) if frame is not None else {}
+        expected_levels = dict(zip(columns.tolist(), classify_risk(frame.scores).tolist())) if frame is not None else {}
+        for column in range(count):
+            if column in expected:
+                assert scores[column] == expected[column]
+                assert level_names[levels[column]] == expected_levels[column]
+            else:
+                assert scores[column] is None and levels[column] == -1
+
+    # 조각: 모든 시간대의 (도로, geometry) 쌍, geometry는 한 번씩만
+    index = get_geometry_index()
+    pairs = {
+        (int(np.searchsorted(all_roads, road_id)), int(geom))
+        for frame in frames.values() if frame is not None
+        for road_id, geom in zip(frame.road_ids.tolist(), frame.geom_idx.tolist())
+    }
+    polylines = index.polylines(0)
+    got = {
+        (road, timeline["geometries"][geom])
+        for road, geom in zip(timeline["segment_road"], timeline["segment_geometry"])
+    }
+    assert len(timeline["segment_road"]) == len(pairs)
+    assert got == {(road, polylines[geom]) for road, geom in pairs}
+    assert len(timeline["geometries"]) == len({geom for _, geom in pairs})
+
+if __name__ == "__main__":
+    test_timeline_matrix_matches_hours()
+    print("[Success] timeline 행렬이 시간대별 응답과 일치합니다.")
@@ -0,0 +1,60 @@
+import sys
+import os
+import pandas as pd
+
+# 현재 디렉토리(.../package/m1/test)의 상위 상위 디렉토리(.../package)를 path에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+m1_dir = os.path.dirname(current_dir)      # .../package/m1
+package_dir = os.path.dirname(m1_dir)      # .../package
+sys.path.append(current_dir)
+sys.path.append(package_dir)
+
+from m1.loader import get_road_geometry, load_data
+from m1.schemas import RiskResponse
+from m1.service import build_risk_items, encode_json
+from m1_helpers import check_speedup, load_hour_rows, timed
+
+TEST_HOUR = 18
+
+def legacy_build_risk_items(df, gdf):
+    """변경 전 iterrows 기반 구현 (비교용)"""
+    merged_gdf = gdf[['osmid', 'geometry']].merge(df, on='osmid', how='inner')
+    results = []
+    for _, row in merged_gdf.iterrows():
+        if row.geometry is None:
+            continue
+        score = row['risk_score']
+        if score > 0.8: risk_level = "심각"
+        elif score >= 0.6: risk_level = "높음"
+        elif score >= 0.4: risk_level = "중간"
+        else: risk_level = "낮음"
+        results.append({
+            "unique_road_id": row['unique_road_id'],
+            "name": row['name'] if pd.notna(row['name']) else None,
+            "risk_score": row['risk_score'],
+            "risk_level": risk_level,
+            "geometry": row.geometry.__geo_interface__
+        })
+    return results
+
+def encode(hour, items):
+    return encode_json(RiskResponse(hour=hour, count=len(items), data=items))
+
+def test_vectorized_matches_legacy():
+    load_data()
+    gdf = get_road_geometry()
+    df = load_hour_rows(TEST_HOUR)
+
+    legacy, legacy_sec = timed(legacy_build_risk_items, df, gdf)
+    vectorized, vector_sec = timed(build_risk_items, df, gdf)
+
+    print(f"[Test] {TEST_HOUR}시 응답 항목: {len(vectorized)}개")
+    print(f"[Time] iterrows: {legacy_sec * 1000:.1f} ms / vectorized: {vector_sec * 1000:.1f} ms "
+          f"(x{legacy_sec / vector_sec:.1f})")
+
+    assert encode(TEST_HOUR, legacy) == encode(TEST_HOUR, vectorized)
+    check_speedup(vector_sec, legacy_sec)
+
+if __name__ == "__main__":
+    test_vectorized_matches_legacy()
+    print("[Success] 변경 전/후 응답이 동일합니다.")
@@ -0,0 +1,204 @@
+"""
+M1 도로 위험도 Mapbox Vector Tile(MVT) 인코더
+
+/m1/tiles/{hour}/{z}/{x}/{y}.mvt 응답을 만듭니다. 외부 라이브러리 없이
+MVT 2.1 스펙(protobuf)에 필요한 부분만 직접 인코딩합니다.
+
+레이어: road_risk (extent 4096)
+속성: unique_road_id, name, risk_score, risk_level
+"""
+import math
+import struct
+import numpy as np
+import shapely
+
+from .spatial import tier_for_zoom
+
+LAYER_NAME = "road_risk"
+EXTENT = 4096
+BUFFER = 64          # 타일 경계 바깥 여유 (extent 단위)
+MAX_ZOOM = 22
+SEED_ZOOMS = (13, 14, 15, 16)   # 광안리/수영구 지도에서 실제 사용하는 zoom
+PROPERTY_KEYS = ("unique_road_id", "name", "risk_score", "risk_level")
+
+# --- 타일 좌표 계산 (Web Mercator) ---
+
+def tile_bounds(z: int, x: int, y: int, buffer: float = 0.0):
+    """타일 (z, x, y)의 경계를 (min_lon, min_lat, max_lon, max_lat)으로 반환합니다."""
+    n = 2 ** z
+    b = buffer / EXTENT
+
+    def lon(tx):
+        return tx / n * 360.0 - 180.0
+
+    def lat(ty):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * ty / n))))
+
+    return lon(x - b), lat(y + 1 + b), lon(x + 1 + b), lat(y - b)
+
+def tile_intersects(bounds, z: int, x: int, y: int) -> bool:
+    """타일 (z, x, y) 영역(+buffer)이 bounds(min_lon, min_lat, max_lon, max_lat)와 겹치는지 여부"""
+    min_lon, min_lat, max_lon, max_lat = tile_bounds(z, x, y, BUFFER)
+    return min_lon <= bounds[2] and bounds[0] <= max_lon and min_lat <= bounds[3] and bounds[1] <= max_lat
+
+def tiles_for_bounds(bounds, z: int):
+    """bounds(min_lon, min_lat, max_lon, max_lat)를 덮는 zoom z의 타일 (x, y) 목록"""
+    min_lon, min_lat, max_lon, max_lat = bounds
+    n = 2 ** z
+
+    def tx(lon):
+        return int((lon + 180.0) / 360.0 * n)
+
+    def ty(lat):
+        rad = math.radians(lat)
+        return int((1 - math.log(math.tan(rad) + 1 / math.cos(rad)) / math.pi) / 2 * n)
+
+    xs = range(max(tx(min_lon), 0), min(tx(max_lon), n - 1) + 1)
+    ys = range(max(ty(max_lat), 0), min(ty(min_lat), n - 1) + 1)
+    return [(x, y) for x in xs for y in ys]
+
+def _to_tile_pixels(coords: np.ndarray, z: int, x: int, y: int) -> np.ndarray:
+    """경위도 좌표 배열 (N, 2)를 타일 내부 정수 좌표로 일괄 변환합니다."""
+    n = 2 ** z
+    lon = coords[:, 0]
+    lat = np.radians(coords[:, 1])
+    px = ((lon + 180.0) / 360.0 * n - x) * EXTENT
+    py = ((1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / np.pi) / 2 * n - y) * EXTENT
+    return np.rint(np.column_stack([px, py])).astype(np.int64)
+
+# --- protobuf 인코딩 ---
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        bits = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(bits | 0x80)
+        else:
+            out.append(bits)
+            return bytes(out)
+
+def _zigzag(value: int) -> int:
+    return (value << 1) ^ (value >> 63)
+
+def _field(number: int, wire_type: int) -> bytes:
+    return _varint((number << 3) | wire_type)
+
+def _bytes_field(number: int, payload: bytes) -> bytes:
+    return _field(number, 2) + _varint(len(payload)) + payload
+
+def _packed(number: int, values) -> bytes:
+    return _bytes_field(number, b"".join(_varint(v) for v in values))
+
+def _encode_value(value) -> bytes:
+    # Value: string_value=1, double_value=3, int_value=4
+    if isinstance(value, str):
+        return _bytes_field(1, value.encode("utf-8"))
+    if isinstance(value, float):
+        return _field(3, 1) + struct.pack("<d", value)
+    return _field(4, 0) + _varint(int(value) & 0xFFFFFFFFFFFFFFFF)
+
+def _line_commands(parts) -> list:
+    """LineString 조각들의 정수 좌표를 MoveTo/LineTo 명령 스트림으로 변환합니다."""
+    commands = []
+    cx, cy = 0, 0
+    for part in parts:
+        # 반올림 후 중복된 연속 좌표 제거
+        keep = np.ones(len(part), dtype=bool)
+        keep[1:] = np.any(np.diff(part, axis=0) != 0, axis=1)
+        part = part[keep]
+        if len(part) < 2:
+            continue
+        deltas = np.diff(np.vstack([[cx, cy], part]), axis=0).tolist()
+        commands.append((1 << 3) | 1)      # MoveTo x1
+        commands.extend((_zigzag(deltas[0][0]), _zigzag(deltas[0][1])))
+        commands.append(((len(part) - 1) << 3) | 2)   # LineTo x(n-1)
+        for dx, dy in deltas[1:]:
+            commands.extend((_zigzag(dx), _zigzag(dy)))
+        cx, cy = part[-1].tolist()
+    return commands
+
+def encode_geometries(geoms, z: int, x: int, y: int) -> dict:
+    """
+    geometry 배열을 타일 경계(+buffer)로 자른 뒤 MVT geometry 명령(packed bytes)으로 변환합니다.
+    반환: {입력 위치: 인코딩된 geometry 필드}
+    """
+    clipped = shapely.clip_by_rect(geoms, *tile_bounds(z, x, y, BUFFER))
+    parts, owner = shapely.get_parts(clipped, return_index=True)
+    is_line = shapely.get_type_id(parts) == 1
+    parts, owner = parts[is_line], owner[is_line]
+    if len(parts) == 0:
+        return {}
+
+    coords, part_idx = shapely.get_coordinates(parts, return_index=True)
+    pixels = _to_tile_pixels(coords, z, x, y)
+    splits = np.flatnonzero(np.diff(part_idx)) + 1
+
+    grouped = {}
+    for i, part in zip(owner.tolist(), np.split(pixels, splits)):
+        grouped.setdefault(i, []).append(part)
+
+    encoded = {}
+    for i, geom_parts in grouped.items():
+        commands = _line_commands(geom_parts)
+        if commands:
+            encoded[i] = _packed(4, commands)
+    return encoded
+
+def encode_tile(frame, levels, index, z: int, x: int, y: int) -> bytes:
+    """
+    한 시간대의 병합 결과(frame)에서 타일 영역에 걸친 도로를 MVT로 인코딩합니다.
+    levels는 frame 행별 위험도 등급 이름입니다. 빈 타일은 b"" 를 반환합니다.
+    feature id는 frame 행 위치 + 1 입니다. (unique_road_id는 조각마다 중복되므로 속성으로만 전달,
+    같은 시간대에서는 타일이 달라도 같은 행이면 같은 id)
+    """
+    candidates = index.tree.query(shapely.box(*tile_bounds(z, x, y, BUFFER)), predicate="intersects")
+    if len(candidates) == 0:
+        return b""
+
+    geoms = index.tiers[tier_for_zoom(z)][candidates]
+    encoded = encode_geometries(geoms, z, x, y)
+    # geometry 인덱스 -> 인코딩 결과 (같은 geometry를 공유하는 행은 재사용)
+    geom_bytes = {int(candidates[i]): data for i, data in encoded.items()}
+    if not geom_bytes:
+        return b""
+
+    rows = np.flatnonzero(np.isin(frame.geom_idx, list(geom_bytes)))
+
+    values, value_index = [], {}
+
+    def value_id(value):
+        key = (type(value), value)
+        if key not in value_index:
+            value_index[key] = len(values)
+            values.append(value)
+        return value_index[key]
+
+    features = []
+    for row in rows.tolist():
+        level = levels[row]
+        road_id = int(frame.road_ids[row])
+        name = frame.names[row]
+        tags = [0, value_id(road_id)]
+        if name is not None:
+            tags += [1, value_id(name)]
+        tags += [2, value_id(float(frame.scores[row])), 3, value_id(level)]
+
+        feature = (
+            _field(1, 0) + _varint(row + 1)      # id
+            + _packed(2, tags)                   # tags
+            + _field(3, 0) + _varint(2)          # type = LINESTRING
+            + geom_bytes[int(frame.geom_idx[row])]
+        )
+        features.append(_bytes_field(2, feature))
+
+    layer = (
+        _field(15, 0) + _varint(2)               # version
+        + _bytes_field(1, LAYER_NAME.encode("utf-8"))
+        + b"".join(features)
+        + b"".join(_bytes_field(3, key.encode("utf-8")) for key in PROPERTY_KEYS)
+        + b"".join(_bytes_field(4, _encode_value(value)) for value in values)
+        + _field(5, 0) + _varint(EXTENT)
+    )
+    return _bytes_field(3, layer)
@@ -16,3 +16,6 @@ class Config:
     TABLE_HEATMAP = "heatmap_data" # 필요한 경우
     TABLE_SECTION = "sections"
 
+    # CCTV 밀집도 갱신 주기 (초, 기본 0: 갱신하지 않음 / 사용 시 M2_REFRESH_INTERVAL=10 등으로 지정)
+    REFRESH_INTERVAL = float(os.getenv("M2_REFRESH_INTERVAL", "0"))
+
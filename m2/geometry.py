@@ -0,0 +1,100 @@
+import os
+import json
+import hashlib
+import threading
+import numpy as np
+
+SECTION_NAMES = ("whole_section", "section1", "section2", "section3")
+WHOLE_SECTION = "whole_section"
+
+
+def points_in_polygon(lon, lat, poly) -> np.ndarray:
+    """
+    Ray casting point-in-polygon for many points at once.
+    Same rule as DataLoader.is_inside (loop over edges, vectorized over points), so boundary
+    points get the same answer as the scalar version.
+    """
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    inside = np.zeros(lon.shape, dtype=bool)
+    n = len(poly)
+    if n == 0:
+        return inside
+
+    p1x, p1y = poly[0]
+    for i in range(n + 1):
+        p2x, p2y = poly[i % n]
+        # 수평 edge는 lat > min and lat <= max를 만족할 수 없으므로 건너뜀
+        if p1y != p2y:
+            crossing = (lat > min(p1y, p2y)) & (lat <= max(p1y, p2y)) & (lon <= max(p1x, p2x))
+            if p1x != p2x:
+                xinters = (lat - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
+                crossing &= lon <= xinters
+            inside ^= crossing
+        p1x, p1y = p2x, p2y
+    return inside
+
+
+class SectionGeometry:
+    """
+    Section polygons (whole_section.json, section1-3.json), each read from disk on first use.
+    Only whole_section is used by the service, so the other files are never opened unless asked for.
+    """
+
+    def __init__(self, section_dir: str):
+        self.section_dir = section_dir
+        self.sections = {}
+        self._lock = threading.Lock()
+        self._mask_lock = threading.Lock()
+
+    def _section(self, name: str) -> dict:
+        with self._lock:
+            if name not in self.sections:
+                path = os.path.join(self.section_dir, f"{name}.json")
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        self.sections[name] = json.load(f)
+                except Exception as e:
+                    # 실패도 저장하여 요청마다 다시 읽지 않음
+                    print(f"[M2] Error loading section {name}: {e}")
+                    self.sections[name] = {}
+            return self.sections[name]
+
+    def polygon(self, name: str = WHOLE_SECTION) -> list:
+        """[[lon, lat], ...] coordinates of a section ([] if missing)"""
+        return self._section(name).get("coordinates", [])
+
+    def contains(self, lon, lat, name: str = WHOLE_SECTION) -> np.ndarray:
+        """Boolean mask of the points inside the section"""
+        return points_in_polygon(lon, lat, self.polygon(name))
+
+    def grid_mask(self, lat, lon, path: str, name: str = WHOLE_SECTION) -> np.ndarray:
+        """
+        Inside-mask of a static grid, cached on disk.
+        The file is keyed by a checksum of the grid points and the polygon, so it is rebuilt
+        automatically when either changes.
+        """
+        h = hashlib.sha1()
+        h.update(np.ascontiguousarray(lat, dtype=np.float64).tobytes())
+        h.update(np.ascontiguousarray(lon, dtype=np.float64).tobytes())
+        h.update(json.dumps(self.polygon(name)).encode("utf-8"))
+        key = h.hexdigest()
+
+        with self._mask_lock:
+            if os.path.exists(path):
+                try:
+                    with np.load(path) as data:
+                        if str(data["key"]) == key:
+                            return data["mask"]
+                except Exception as e:
+                    print(f"[M2] Error loading grid mask: {e}")
+
+            mask = self.contains(lon, lat, name)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = path + ".tmp.npz"
+                np.savez(tmp, key=np.array(key), mask=mask)
+                os.replace(tmp, path)
+            except Exception as e:
+                print(f"[M2] Error saving grid mask: {e}")
+            return mask
@@ -0,0 +1,166 @@
+"""
+Persistent OSM graph artifact for M2.
+
+    python -m m2.graph_store              # build m2/data/cache/graph.pkl if missing or stale
+    python -m m2.graph_store --rebuild    # rebuild from the bundled Overpass cache (m2/cache, no network)
+    python -m m2.graph_store --rebuild --online   # rebuild from a fresh Overpass download
+
+graph.pkl     pickled raw graph (before density weights)
+graph.json    format version, query, library versions, sha256 of graph.pkl
+
+Trust boundary: unpickling runs arbitrary code, so graph.pkl must only ever be a file this
+module wrote into a directory the service alone can write to. The sha256 in graph.json detects
+corruption and partial writes, not tampering (anyone who can replace graph.pkl can rewrite
+graph.json too). Never point cache_dir at a shared or downloaded location; to use a graph from
+elsewhere, rebuild it here from the Overpass cache instead of copying the pickle.
+"""
+import os
+import json
+import time
+import pickle
+import uuid
+import hashlib
+import argparse
+import threading
+
+import networkx as nx
+import osmnx as ox
+
+FORMAT_VERSION = 2     # 2: G.graph[TOPOLOGY_KEY]
+# Gwangalli Beach Center
+GRAPH_CENTER = (35.1532, 129.1186)
+GRAPH_DIST = 3000
+NETWORK_TYPE = "drive"
+
+# G.graph key identifying the edge set (kept by G.copy(), so weighted copies share derived indexes)
+TOPOLOGY_KEY = "m2_topology"
+
+M2_DIR = os.path.dirname(os.path.abspath(__file__))
+# Overpass responses cached by osmnx, shipped with the repo
+BUNDLED_OVERPASS_CACHE = os.path.join(M2_DIR, "cache")
+DEFAULT_CACHE_DIR = os.path.join(M2_DIR, "data", "cache")
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def graph_query() -> dict:
+    return {"center": list(GRAPH_CENTER), "dist": GRAPH_DIST, "network_type": NETWORK_TYPE}
+
+def library_versions() -> dict:
+    # 버전이 바뀌면 pickle 호환을 보장할 수 없으므로 다시 생성
+    return {"osmnx": ox.__version__, "networkx": nx.__version__}
+
+
+class GraphStore:
+    """Versioned, checksummed graph artifact in cache_dir."""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.graph_path = os.path.join(cache_dir, "graph.pkl")
+        self.meta_path = os.path.join(cache_dir, "graph.json")
+        self._lock = threading.Lock()
+
+    def read_meta(self):
+        try:
+            with open(self.meta_path, encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def stale_reason(self, meta):
+        """Why the artifact cannot be used (None if it is valid)"""
+        if meta is None or not os.path.exists(self.graph_path):
+            return "missing"
+        if meta.get("format") != FORMAT_VERSION:
+            return f"format {meta.get('format')} != {FORMAT_VERSION}"
+        if meta.get("query") != graph_query():
+            return "query changed"
+        if meta.get("versions") != library_versions():
+            return f"library versions changed ({meta.get('versions')})"
+        if meta.get("sha256") != _sha256(self.graph_path):
+            return "checksum mismatch"
+        return None
+
+    def build(self, online: bool = False):
+        """
+        Builds the raw graph with osmnx. By default the Overpass response is read from the
+        bundled cache (m2/cache), so no network is needed.
+        """
+        previous = ox.settings.cache_folder, ox.settings.use_cache
+        ox.settings.cache_folder = BUNDLED_OVERPASS_CACHE
+        # online: 캐시를 무시하고 새로 내려받음 (응답은 번들 캐시 폴더에 저장됨)
+        ox.settings.use_cache = not online
+        try:
+            source = "Overpass API" if online else BUNDLED_OVERPASS_CACHE
+            print(f"[M2] Building OSM graph from {source}...")
+            G = ox.graph_from_point(GRAPH_CENTER, dist=GRAPH_DIST, network_type=NETWORK_TYPE)
+            G.graph[TOPOLOGY_KEY] = uuid.uuid4().hex
+            return G
+        finally:
+            ox.settings.cache_folder, ox.settings.use_cache = previous
+
+    def save(self, G):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = self.graph_path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(G, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.graph_path)
+
+        meta = {
+            "format": FORMAT_VERSION,
+            "query": graph_query(),
+            "versions": library_versions(),
+            "sha256": _sha256(self.graph_path),
+            "nodes": G.number_of_nodes(),
+            "edges": G.number_of_edges(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        with open(self.meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        print(f"[M2] Graph artifact saved: {meta['nodes']} nodes / {meta['edges']} edges -> {self.graph_path}")
+
+    def load(self, rebuild: bool = False, online: bool = False):
+        """
+        Returns the raw graph: the saved artifact if it is valid, otherwise a graph built from
+        the bundled Overpass cache (and saved). rebuild=True always builds.
+        """
+        with self._lock:
+            if not rebuild:
+                t0 = time.time()
+                reason = self.stale_reason(self.read_meta())
+                if reason is None:
+                    try:
+                        with open(self.graph_path, "rb") as f:
+                            G = pickle.load(f)
+                        print(f"[M2] Graph artifact loaded ({time.time() - t0:.2f}s)")
+                        return G
+                    except Exception as e:
+                        reason = f"load error: {e}"
+                print(f"[M2] Graph artifact not usable ({reason}), building...")
+
+            G = self.build(online)
+            try:
+                self.save(G)
+            except Exception as e:
+                print(f"[M2] Error saving graph artifact: {e}")
+            return G
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the persistent M2 OSM graph artifact")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild even if the artifact is valid")
+    parser.add_argument("--online", action="store_true", help="download from Overpass instead of the bundled cache")
+    parser.add_argument("--cache-dir", help="artifact directory (default: m2/data/cache)")
+    args = parser.parse_args(argv)
+
+    store = GraphStore(args.cache_dir or DEFAULT_CACHE_DIR)
+    G = store.load(rebuild=args.rebuild or args.online, online=args.online)
+    return G.number_of_nodes(), G.number_of_edges()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import os
+import math
+import hashlib
+import numpy as np
+
+# Grid Configuration (Gwangalli Beach)
+CENTER_LAT = 35.1524
+CENTER_LON = 129.1193
+HEX_RADIUS = 0.0003
+LON_SCALE = 1.216
+LAT_STEP = 1.5 * HEX_RADIUS
+LON_STEP = math.sqrt(3) * HEX_RADIUS * LON_SCALE
+ROW_COUNT = 80
+COL_COUNT = 80
+
+POWER = 2
+EXACT_MATCH_M = 66      # 이 거리 안의 CCTV가 있으면 보간 없이 해당 CCTV 밀집도 사용
+EARTH_RADIUS_M = 6371000
+FORMAT_VERSION = 2      # 2: 정규화 전 가중치 + 행 합계 저장
+BLOCK_CELLS = 4096      # 거리 행렬을 나눠 계산하는 셀 수 (메모리 상한: BLOCK_CELLS x CCTV 수)
+TRUNC_EPS = 1e-9        # int 변환 전 부동소수점 오차 보정 (정수 밀집도만 섞인 셀이 n-1로 잘리지 않도록)
+
+
+def hex_grid():
+    """
+    Returns (lat, lon) arrays of all hex grid centres, row-major
+    (rows -ROW_COUNT..ROW_COUNT-1, odd rows shifted by half a column).
+    """
+    r, c = np.meshgrid(
+        np.arange(-ROW_COUNT, ROW_COUNT), np.arange(-COL_COUNT, COL_COUNT), indexing="ij"
+    )
+    r, c = r.ravel(), c.ravel()
+    offset_x = np.where(r % 2 != 0, LON_STEP / 2.0, 0.0)
+    lat = CENTER_LAT + (r * LAT_STEP)
+    lon = CENTER_LON + (c * LON_STEP) + offset_x
+    return lat, lon
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Elementwise haversine distance (m), same formula as M2Service.calculate_distance (broadcasts)."""
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    dphi = np.radians(lat2 - lat1)
+    dlambda = np.radians(lon2 - lon1)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS_M * c
+
+def haversine_matrix(lat1, lon1, lat2, lon2):
+    """Haversine distances (m) between points 1 (rows) and points 2 (columns)."""
+    return haversine(
+        np.asarray(lat1, dtype=np.float64)[:, None],
+        np.asarray(lon1, dtype=np.float64)[:, None],
+        np.asarray(lat2, dtype=np.float64)[None, :],
+        np.asarray(lon2, dtype=np.float64)[None, :],
+    )
+
+def idw_matrix(lat, lon, cctv_lat, cctv_lon, block=BLOCK_CELLS):
+    """
+    Unnormalized IDW weights (cells x CCTV) and their row sums; divide by the row sum after the product.
+    A cell closer than EXACT_MATCH_M to a CCTV gets a one-hot row for the first such CCTV (list order).
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    matrix = np.zeros((len(lat), len(cctv_lat)), dtype=np.float64)
+    row_sums = np.ones(len(lat), dtype=np.float64)
+    if len(cctv_lat) == 0:
+        return matrix, row_sums
+
+    for start in range(0, len(lat), block):
+        stop = min(start + block, len(lat))
+        dist = haversine_matrix(lat[start:stop], lon[start:stop], cctv_lat, cctv_lon)
+
+        near = dist < EXACT_MATCH_M
+        exact = np.flatnonzero(near.any(axis=1))
+        weight = 1.0 / (np.power(dist, POWER) + 1e-6)
+        weight[exact] = 0.0
+        weight[exact, near[exact].argmax(axis=1)] = 1.0
+        matrix[start:stop] = weight
+        row_sums[start:stop] = weight.sum(axis=1)
+    return matrix, row_sums
+
+def weights_key(lat, lon, cctv_ids, cctv_lat, cctv_lon) -> str:
+    """Checksum of everything the weight matrix depends on (grid cells, CCTV order and positions)."""
+    h = hashlib.sha1()
+    h.update(f"idw-v{FORMAT_VERSION}:{POWER}:{EXACT_MATCH_M}".encode("utf-8"))
+    for values in (lat, lon, cctv_lat, cctv_lon):
+        h.update(np.ascontiguousarray(values, dtype=np.float64).tobytes())
+    h.update("\x1f".join(str(v) for v in cctv_ids).encode("utf-8"))
+    return h.hexdigest()
+
+
+class IDWWeights:
+    """
+    Static IDW weight matrix for the hex grid cells inside the section.
+    Grid and CCTV positions do not change, so a heatmap refresh is one matrix-vector product
+    over the current CCTV densities.
+    """
+
+    def __init__(self, key: str, matrix: np.ndarray, row_sums: np.ndarray):
+        self.key = key
+        self.matrix = matrix
+        self.row_sums = row_sums
+
+    @classmethod
+    def build(cls, lat, lon, cctv_ids, cctv_lat, cctv_lon):
+        key = weights_key(lat, lon, cctv_ids, cctv_lat, cctv_lon)
+        return cls(key, *idw_matrix(lat, lon, cctv_lat, cctv_lon))
+
+    def interpolate(self, densities) -> np.ndarray:
+        """
+        CCTV densities (matrix column order) -> cell densities (truncated to int).
+        Σ(w·d) / Σw like the per-cell loop, dividing last; TRUNC_EPS keeps a cell whose CCTVs all
+        report n at n instead of truncating n - ulp to n - 1.
+        """
+        values = (self.matrix @ np.asarray(densities, dtype=np.float64)) / self.row_sums
+        return np.trunc(values + TRUNC_EPS).astype(np.int64)
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, key=np.array(self.key), matrix=self.matrix, row_sums=self.row_sums)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, key: str):
+        """Returns the saved weights if they were built for `key`, otherwise None."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                if str(data["key"]) != key:
+                    return None
+                return cls(key, data["matrix"], data["row_sums"])
+        except Exception as e:
+            print(f"[M2] Error loading IDW weights: {e}")
+            return None
+
+
+def get_idw_weights(path: str, lat, lon, cctv_ids, cctv_lat, cctv_lon) -> IDWWeights:
+    """Loads the persisted weight matrix for this grid/CCTV set, or builds and saves it."""
+    key = weights_key(lat, lon, cctv_ids, cctv_lat, cctv_lon)
+    weights = IDWWeights.load(path, key)
+    if weights is not None:
+        print(f"[M2] IDW weights loaded: {weights.matrix.shape[0]} cells x {weights.matrix.shape[1]} CCTVs")
+        return weights
+
+    weights = IDWWeights.build(lat, lon, cctv_ids, cctv_lat, cctv_lon)
+    try:
+        weights.save(path)
+    except Exception as e:
+        print(f"[M2] Error saving IDW weights: {e}")
+    print(f"[M2] IDW weights built: {weights.matrix.shape[0]} cells x {weights.matrix.shape[1]} CCTVs")
+    return weights
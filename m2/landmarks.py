@@ -0,0 +1,96 @@
+import numpy as np
+import networkx as nx
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+from .weighting import to_unit_xyz
+
+LANDMARK_COUNT = 8
+
+
+def select_landmarks(G, count=LANDMARK_COUNT) -> list:
+    """
+    Farthest-point landmarks on the node coordinates, taken from the largest strongly connected
+    component (landmarks on the edge of the map give the tightest bounds for most queries).
+    Starts from the node farthest from the centroid, then repeatedly adds the node farthest
+    from all chosen landmarks.
+    """
+    if G.number_of_nodes() == 0:
+        return []
+    nodes = list(max(nx.strongly_connected_components(G), key=len))
+    xyz = to_unit_xyz([G.nodes[n]['y'] for n in nodes], [G.nodes[n]['x'] for n in nodes])
+
+    chosen = [int(np.argmax(np.linalg.norm(xyz - xyz.mean(axis=0), axis=1)))]
+    nearest = np.linalg.norm(xyz - xyz[chosen[0]], axis=1)
+    while len(chosen) < min(count, len(nodes)):
+        chosen.append(int(np.argmax(nearest)))
+        nearest = np.minimum(nearest, np.linalg.norm(xyz - xyz[chosen[-1]], axis=1))
+    return [nodes[i] for i in chosen]
+
+def weight_matrix(G, nodes, weight='weight') -> csr_matrix:
+    """(N x N) sparse matrix of the cheapest parallel edge between each node pair (same rule as nx.astar_path)"""
+    pos = {n: i for i, n in enumerate(nodes)}
+    u, v, w = [], [], []
+    for a, b, data in G.edges(data=True):
+        u.append(pos[a])
+        v.append(pos[b])
+        w.append(data.get(weight, 1))
+    u = np.asarray(u, dtype=np.int64)
+    v = np.asarray(v, dtype=np.int64)
+    w = np.asarray(w, dtype=np.float64)
+
+    # csr_matrix는 중복 좌표를 더하므로 (u, v)마다 최소 weight 하나만 남김
+    order = np.lexsort((w, v, u))
+    u, v, w = u[order], v[order], w[order]
+    first = np.ones(len(u), dtype=bool)
+    first[1:] = (u[1:] != u[:-1]) | (v[1:] != v[:-1])
+    return csr_matrix((w[first], (u[first], v[first])), shape=(len(nodes), len(nodes)))
+
+
+class LandmarkIndex:
+    """
+    ALT (A*, landmarks, triangle inequality) lower bounds for one weighted graph.
+    Distances from and to each landmark are computed once per weight change; the bound for
+    a target is then a vectorized max over landmarks:
+        h(v) = max(0, d(L, t) - d(L, v), d(v, L) - d(t, L))
+    The graph is directed, so both directions are kept. h never exceeds the true cost,
+    so A* with it returns least-cost routes.
+    """
+
+    def __init__(self, nodes, landmarks, from_landmark, to_landmark):
+        self.nodes = nodes
+        self.pos = {n: i for i, n in enumerate(nodes)}
+        self.landmarks = landmarks
+        self.from_landmark = from_landmark      # (L x N) d(L, v)
+        self.to_landmark = to_landmark          # (L x N) d(v, L)
+
+    @classmethod
+    def build(cls, G, landmarks, weight='weight'):
+        nodes = list(G.nodes)
+        if not landmarks:
+            empty = np.zeros((0, len(nodes)))
+            return cls(nodes, [], empty, empty)
+        matrix = weight_matrix(G, nodes, weight)
+        pos = {n: i for i, n in enumerate(nodes)}
+        rows = [pos[n] for n in landmarks]
+        from_landmark = dijkstra(matrix, directed=True, indices=rows)
+        to_landmark = dijkstra(matrix.T.tocsr(), directed=True, indices=rows)
+        return cls(nodes, list(landmarks), from_landmark, to_landmark)
+
+    def lower_bounds(self, target) -> np.ndarray:
+        """Lower bound of the cost from every node (self.nodes order) to target"""
+        t = self.pos[target]
+        # 도달 불가(inf - inf = nan)인 랜드마크는 무시
+        with np.errstate(invalid="ignore"):
+            forward = self.from_landmark[:, [t]] - self.from_landmark
+            backward = self.to_landmark - self.to_landmark[:, [t]]
+            bounds = np.fmax(forward, backward)
+        if len(bounds) == 0:
+            return np.zeros(len(self.nodes))
+        bounds = np.nan_to_num(bounds, nan=0.0, posinf=np.inf, neginf=0.0)
+        return np.maximum(bounds.max(axis=0), 0.0)
+
+    def heuristic(self, target):
+        """A* heuristic (u, v) -> bound for nx.astar_path to target"""
+        bounds = dict(zip(self.nodes, self.lower_bounds(target).tolist()))
+        return lambda u, v: bounds[u]
@@ -1,8 +1,9 @@
 import os
-import json
+import numpy as np
 import pandas as pd
 from typing import List, Dict, Optional
 from .config import Config
+from .geometry import SectionGeometry
 
 # Supabase Client (Try import)
 try:
@@ -20,6 +21,12 @@ class DataLoader:
         self.csv_path = os.path.join(self.base_dir, "cctv_data.csv")
         self.section_dir = os.path.join(self.base_dir, "section")
         self.whole_section_path = os.path.join(self.section_dir, "whole_section.json")
+        # Generated artifacts (IDW weights etc.), safe to delete
+        self.cache_dir = os.path.join(self.base_dir, "cache")
+        self.idw_weights_path = os.path.join(self.cache_dir, "idw_weights.npz")
+        self.grid_mask_path = os.path.join(self.cache_dir, "grid_mask.npz")
+        # Section polygons are read once, on first use (only whole_section in practice)
+        self.sections = SectionGeometry(self.section_dir)
         
         # Initialize Supabase
         self.supabase: Optional[Client] = None
@@ -48,12 +55,7 @@ class DataLoader:
         return inside
 
     def get_whole_poly(self):
-        try:
-            with open(self.whole_section_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data.get("coordinates", [])
-        except:
-            return []
+        return self.sections.polygon()
 
     def load_cctv_data(self) -> List[Dict]:
         """
@@ -82,12 +84,13 @@ class DataLoader:
 
                 # Map: cctv_no -> {lat, lon, density=0}
                 cctv_map = {}
-                for item in base_data:
+                lats = [float(item.get('latitude', 0)) for item in base_data]
+                lons = [float(item.get('longitude', 0)) for item in base_data]
+                inside = self.sections.contains(lons, lats) if whole_poly else [True] * len(base_data)
+                for item, lat, lon, is_in in zip(base_data, lats, lons, inside):
                     cctv_no = item.get('cctv_no')
-                    lat = float(item.get('latitude', 0))
-                    lon = float(item.get('longitude', 0))
                     
-                    if not whole_poly or self.is_inside(lon, lat, whole_poly):
+                    if is_in:
                         cctv_map[cctv_no] = {
                             "cctv_no": cctv_no,
                             "lat": lat,
@@ -148,13 +151,18 @@ class DataLoader:
                 if not all(col in df.columns for col in required_cols):
                     return []
 
-                for _, row in df.iterrows():
+                # Bulk containment (non-numeric rows -> NaN -> outside, skipped below as before)
+                inside = self.sections.contains(
+                    pd.to_numeric(df['lon'], errors='coerce'), pd.to_numeric(df['lat'], errors='coerce')
+                ) if whole_poly else np.ones(len(df), dtype=bool)
+
+                for (_, row), is_in in zip(df.iterrows(), inside):
                     try:
                         lon = float(row['lon'])
                         lat = float(row['lat'])
                         density = int(row['density'])
                         
-                        if not whole_poly or self.is_inside(lon, lat, whole_poly):
+                        if is_in:
                             cctv_no = row.get('cctv_no')
                             if pd.isna(cctv_no):
                                 cctv_no = str(len(cctv_list) + 1) # Convert to str for consistency
@@ -1,5 +1,7 @@
+from datetime import datetime
 from fastapi import APIRouter, HTTPException, Depends
 from typing import List
+from .config import Config
 from .schemas import (
     RouteRequest, RouteResponse, 
     HeatmapResponse, CCTVResponse,
@@ -23,18 +25,26 @@ def get_service():
 
 @router.on_event("startup")
 async def startup_event():
-    """서버 시작 시 무거운 데이터 로드"""
-    get_service()
+    """서버 시작 시 무거운 데이터 로드 + 밀집도 주기 갱신 시작"""
+    get_service().start_refresher(Config.REFRESH_INTERVAL)
+
+@router.on_event("shutdown")
+async def shutdown_event():
+    if m2_service is not None:
+        m2_service.stop_refresher()
 
 @router.post("/route", response_model=RouteResponse)
 async def calculate_safe_route(req: RouteRequest, service: M2Service = Depends(get_service)):
     """
     [안심 경로] 출발지/도착지를 받아 밀집도를 피하는 최적 경로를 반환합니다.
     """
+    # 요청 하나는 한 시점의 데이터만 사용 (계산 중 갱신되어도 섞이지 않음)
+    state = service.state
     try:
         path, dist, duration = service.find_shortest_path(
             req.origin.lat, req.origin.lng,
-            req.destination.lat, req.destination.lng
+            req.destination.lat, req.destination.lng,
+            state=state
         )
         
         # Pydantic 모델 변환
@@ -43,7 +53,9 @@ async def calculate_safe_route(req: RouteRequest, service: M2Service = Depends(g
         return RouteResponse(
             success=True,
             path=path_objs,
-            info=RouteInfo(distance=dist, duration_min=duration)
+            info=RouteInfo(distance=dist, duration_min=duration),
+            data_version=state.version,
+            data_updated_at=datetime.fromtimestamp(state.updated_at).isoformat(timespec="seconds")
         )
     except Exception as e:
         import traceback
@@ -31,6 +31,9 @@ class RouteResponse(BaseModel):
     path: List[LatLng]
     info: RouteInfo
     error: Optional[str] = None
+    # 경로 계산에 사용한 밀집도 데이터 버전과 갱신 시각
+    data_version: Optional[int] = None
+    data_updated_at: Optional[str] = None
 
 class HeatmapResponse(BaseModel):
     success: bool
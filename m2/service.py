@@ -1,20 +1,53 @@
 import networkx as nx
 import osmnx as ox
 import math
+import time
+import threading
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Tuple
+from typing import List, Dict, NamedTuple, Optional, Tuple
 from .loader import DataLoader
+from .idw import IDWWeights, get_idw_weights, hex_grid, weights_key
+from .graph_store import GraphStore, TOPOLOGY_KEY
+from .landmarks import LandmarkIndex, select_landmarks
+from .weighting import DensityIndex, penalty_factors
+
+class RoutingState(NamedTuple):
+    """
+    Published routing data (read-only). Requests read `M2Service.state` once and use only that
+    snapshot, so a refresh swapping in a new state never changes weights under an in-flight search.
+    """
+    G: object
+    heatmap_data: List[Dict]
+    density_grid: Dict
+    landmarks: Optional[LandmarkIndex]
+    version: int
+    updated_at: float
+
 
 class M2Service:
-    def __init__(self):
+    def __init__(self, initialize: bool = True):
         self.loader = DataLoader()
+        # Working buffers: only touched by initialize / refresh (under _refresh_lock), then published
         self.heatmap_data = []
         self.density_grid = {}
         self.G = None
+        self.cctv_list = None
+        self.state: Optional[RoutingState] = None
+
+        self.grid_cells = None
+        self.idw_weights = None
+        self.density_index = None
+        self.landmark_nodes = None
+        self.graph_store = GraphStore(self.loader.cache_dir)
+        self._refresh_lock = threading.Lock()
+        self._refresh_stop = threading.Event()
+        self._refresher = None
         
         # Lazy Loading은 실제 요청 시 또는 서버 시작 시 트리거 가능
         # 여기서는 초기화 시 로드 시도
-        self.initialize()
+        if initialize:
+            self.initialize()
 
     def initialize(self):
         print("[M2] Initializing Service...")
@@ -42,6 +75,28 @@ class M2Service:
         # 3. Load Graph
         self.load_graph()
 
+        # 4. Publish for requests
+        self.publish()
+
+    def publish(self):
+        """Swaps the working buffers in as the new routing state (single reference assignment)."""
+        version = self.state.version + 1 if self.state is not None else 1
+        # ALT 랜드마크 거리는 weight가 바뀔 때마다 다시 계산 (상태와 함께 교체)
+        landmarks = LandmarkIndex.build(self.G, self.get_landmarks()) if self.G is not None else None
+        self.state = RoutingState(self.G, self.heatmap_data, self.density_grid, landmarks, version, time.time())
+
+    def get_landmarks(self) -> list:
+        """ALT landmark nodes, reselected only when the graph topology changes"""
+        topology = self.G.graph.get(TOPOLOGY_KEY)
+        if self.landmark_nodes is None or topology is None or self.landmark_nodes[0] != topology:
+            self.landmark_nodes = (topology, select_landmarks(self.G))
+        return self.landmark_nodes[1]
+
+    def begin_update(self):
+        """Makes the working buffers private copies of the published state before they are modified."""
+        self.G = self.state.G.copy()
+        self.heatmap_data = [dict(point) for point in self.state.heatmap_data]
+
     def build_density_grid(self):
         """Builds O(1) density lookup grid"""
         self.density_grid = {}
@@ -62,9 +117,32 @@ class M2Service:
         c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
         return R * c
 
-    def generate_heatmap_with_idw(self) -> List[Dict]:
+    def get_grid_cells(self):
+        """(lat, lon) arrays of the hex grid centres inside the whole section (static, mask cached on disk)"""
+        if self.grid_cells is None:
+            lat, lon = hex_grid()
+            inside = self.loader.sections.grid_mask(lat, lon, self.loader.grid_mask_path)
+            self.grid_cells = (lat[inside], lon[inside])
+        return self.grid_cells
+
+    def get_idw_weights(self, lat, lon, cctv_list) -> IDWWeights:
+        """Static (cells x CCTV) IDW matrix, rebuilt only when the CCTV set or positions change"""
+        ids = [cctv['cctv_no'] for cctv in cctv_list]
+        cctv_lat = [cctv['lat'] for cctv in cctv_list]
+        cctv_lon = [cctv['lon'] for cctv in cctv_list]
+        if self.idw_weights is None or self.idw_weights.key != weights_key(lat, lon, ids, cctv_lat, cctv_lon):
+            self.idw_weights = get_idw_weights(self.loader.idw_weights_path, lat, lon, ids, cctv_lat, cctv_lon)
+        return self.idw_weights
+
+    def generate_heatmap_with_idw(self, cctv_list: Optional[List[Dict]] = None, save: bool = True) -> List[Dict]:
+        """
+        Builds the IDW heatmap for cctv_list (default: loaded from DB/CSV).
+        save=False skips writing heatmap.csv (background refreshes keep the tracked file untouched).
+        """
         print("[M2] Generating IDW Heatmap...")
-        cctv_list = self.loader.load_cctv_data()
+        self.cctv_list = None
+        if cctv_list is None:
+            cctv_list = self.loader.load_cctv_data()
         if not cctv_list:
             return []
 
@@ -72,122 +150,147 @@ class M2Service:
         if not whole_poly:
             return []
 
-        # Grid Configuration (Gwangalli Beach)
-        center_lat = 35.1524
-        center_lon = 129.1193
-        hex_radius = 0.0003
-        lon_scale = 1.216
-        lat_step = 1.5 * hex_radius
-        lon_step = math.sqrt(3) * hex_radius * lon_scale
-        row_count = 80
-        col_count = 80
-        POWER = 2
-
-        final_data = []
-
-        for r in range(-row_count, row_count):
-            for c in range(-col_count, col_count):
-                offset_x = (lon_step / 2.0) if (r % 2 != 0) else 0.0
-                lat = center_lat + (r * lat_step)
-                lon = center_lon + (c * lon_step) + offset_x
-                
-                if not self.loader.is_inside(lon, lat, whole_poly):
-                    continue
-
-                numerator = 0.0
-                denominator = 0.0
-                interpolated_density = 0
-                exact_match = False
-
-                for cctv in cctv_list:
-                    dist = self.calculate_distance(lat, lon, cctv['lat'], cctv['lon'])
-                    if dist < 66: # 10 meters approx check? Logic kept from original
-                        interpolated_density = cctv['density']
-                        exact_match = True
-                        break
-                    
-                    weight = 1.0 / (pow(dist, POWER) + 1e-6) 
-                    numerator += weight * cctv['density']
-                    denominator += weight
-                
-                if not exact_match:
-                    interpolated_density = numerator / denominator if denominator > 0 else 0
-
-                final_data.append({
-                    "lat": round(lat, 7),
-                    "lon": round(lon, 7),
-                    "density": int(interpolated_density)
-                })
-
-        self.loader.save_heatmap_csv(final_data)
+        # Grid and CCTV positions are static: heatmap = (cells x CCTV) weights @ current densities
+        lat, lon = self.get_grid_cells()
+        weights = self.get_idw_weights(lat, lon, cctv_list)
+        densities = weights.interpolate([cctv['density'] for cctv in cctv_list])
+
+        final_data = [
+            {"lat": round(y, 7), "lon": round(x, 7), "density": d}
+            for y, x, d in zip(lat.tolist(), lon.tolist(), densities.tolist())
+        ]
+
+        if save:
+            self.loader.save_heatmap_csv(final_data)
+        self.cctv_list = cctv_list
         return final_data
 
+    def get_density_index(self) -> DensityIndex:
+        """Edge <-> heatmap cell inverted index, rebuilt when the graph or the cell positions change"""
+        heat_lat = np.array([p['lat'] for p in self.heatmap_data], dtype=np.float64)
+        heat_lon = np.array([p['lon'] for p in self.heatmap_data], dtype=np.float64)
+        if self.density_index is None or not self.density_index.matches(self.G, heat_lat, heat_lon):
+            self.density_index = DensityIndex(self.G, heat_lat, heat_lon)
+        return self.density_index
+
+    def set_edge_weights(self, index: DensityIndex, edge_ids, max_density):
+        for i, factor in zip(edge_ids.tolist(), penalty_factors(max_density).tolist()):
+            data = self.G.edges[index.edges[i]]
+            base_weight = data.get('length', 1.0)
+            data['weight'] = base_weight * factor
+
     def apply_density_weights(self):
         print("[M2] Applying density weights to graph...")
-        for u, v, k, data in self.G.edges(keys=True, data=True):
-            check_points = []
-            node_u = self.G.nodes[u]
-            node_v = self.G.nodes[v]
-            
-            if 'geometry' in data:
-                coords = list(data['geometry'].coords)
-                for lon, lat in coords:
-                    check_points.append((lat, lon))
-            else:
-                check_points.append((node_u['y'], node_u['x']))
-                check_points.append((node_v['y'], node_v['x']))
-                mid_lat = (node_u['y'] + node_v['y']) / 2
-                mid_lon = (node_u['x'] + node_v['x']) / 2
-                check_points.append((mid_lat, mid_lon))
-                
-                if data.get('length', 0) > 50:
-                    check_points.append((node_u['y']*0.75 + node_v['y']*0.25, node_u['x']*0.75 + node_v['x']*0.25))
-                    check_points.append((node_u['y']*0.25 + node_v['y']*0.75, node_u['x']*0.25 + node_v['x']*0.75))
+        # Edge sample points are matched to heatmap cells within 40 m once (KD-tree),
+        # then each edge takes the max density of its linked cells
+        index = self.get_density_index()
+        densities = np.array([p['density'] for p in self.heatmap_data], dtype=np.int64)
+        self.set_edge_weights(index, np.arange(len(index.edges)), index.max_density(densities))
 
-            base_weight = data.get('length', 1.0)
-            max_density = 0
-            
-            # Check density using simplified grid lookup or full check
-            # For performance, using grid lookup first could be better, but sticking to logic
-            # Using raw heatmap data loop is slow, let's optimize using grid if possible?
-            # Original code looped all heatmap points. Let's keep it robust but maybe optimize later.
-            # Here we use the original logic for consistency.
-            
-            for lat, lon in check_points:
-                # Optimization: Check grid first
-                grid_key = (round(lat, 3), round(lon, 3))
-                if grid_key in self.density_grid:
-                    # If grid has value, it might be close. 
-                    # But grid is just max value of cell.
-                    # Let's adhere to original logic: check proximity to heatmap points
-                    pass
-
-                # Warning: Looping 2000+ heatmap points for every edge is SLOW.
-                # But it's done once at startup.
-                for point in self.heatmap_data:
-                    if abs(point['lat'] - lat) > 0.001 or abs(point['lon'] - lon) > 0.001:
-                        continue
-                    dist = self.calculate_distance(lat, lon, point['lat'], point['lon'])
-                    if dist < 40:
-                        if point['density'] > max_density:
-                            max_density = point['density']
-                
-                if max_density >= 80:
-                    break
-            
-            penalty_factor = 1.0
-            if max_density >= 80:
-                penalty_factor = 10000.0
-            elif max_density >= 50:
-                penalty_factor = 1.3
-            
-            data['weight'] = base_weight * penalty_factor
+    def update_cctv_densities(self, densities: Dict) -> int:
+        """
+        Applies new densities for some CCTVs ({cctv_no: density}) on a copy of the published graph,
+        reweighting only the edges linked to heatmap cells whose density changed, then publishes it.
+        Returns the number of reweighted edges. (Needs a heatmap generated by IDW; heatmap.csv is not rewritten.)
+        """
+        with self._refresh_lock:
+            return self._update_cctv_densities(densities)
+
+    def _update_cctv_densities(self, densities: Dict) -> int:
+        # _refresh_lock 안에서 호출
+        if not self.cctv_list or self.idw_weights is None or self.state is None or self.state.G is None:
+            print("[M2] Incremental update unavailable (no IDW heatmap or graph).")
+            return 0
+
+        changes = {
+            cctv['cctv_no']: int(densities[cctv['cctv_no']])
+            for cctv in self.cctv_list
+            if cctv['cctv_no'] in densities and cctv['density'] != int(densities[cctv['cctv_no']])
+        }
+        if not changes:
+            return 0
+        # 새 목록에 반영하고 publish 후에 교체 (기존 목록은 그대로)
+        cctv_list = [dict(cctv, density=changes.get(cctv['cctv_no'], cctv['density'])) for cctv in self.cctv_list]
+
+        self.begin_update()
+        cells = self.idw_weights.interpolate([cctv['density'] for cctv in cctv_list])
+        previous = np.array([p['density'] for p in self.heatmap_data], dtype=np.int64)
+        changed_cells = np.flatnonzero(cells != previous)
+        for i in changed_cells.tolist():
+            self.heatmap_data[i]['density'] = int(cells[i])
+        self.build_density_grid()
+
+        index = self.get_density_index()
+        edge_ids = index.edges_for_cells(changed_cells)
+        self.set_edge_weights(index, edge_ids, index.max_density(cells, edge_ids))
+        self.publish()
+        self.cctv_list = cctv_list
+        print(f"[M2] Densities updated (v{self.state.version}): {len(changes)} CCTVs, "
+              f"{len(changed_cells)} cells changed, {len(edge_ids)} edges reweighted.")
+        return len(edge_ids)
+
+    def refresh_densities(self) -> bool:
+        """
+        Pulls the latest CCTV densities and publishes new routing weights.
+        Same CCTV set -> incremental update, otherwise the heatmap and all edge weights are rebuilt
+        on a copy. Returns True if a new state was published. heatmap.csv is not rewritten.
+        """
+        cctv_list = self.loader.load_cctv_data()
+        if not cctv_list:
+            return False
 
-    def load_graph(self):
+        # 비교부터 publish까지 한 번에 (다른 갱신이 그 사이에 cctv_list/state를 바꾸지 않도록)
+        with self._refresh_lock:
+            if self.state is None or self.state.G is None:
+                return False
+            version = self.state.version
+
+            positions = [(cctv['cctv_no'], cctv['lat'], cctv['lon']) for cctv in cctv_list]
+            if self.cctv_list and positions == [(c['cctv_no'], c['lat'], c['lon']) for c in self.cctv_list]:
+                self._update_cctv_densities({cctv['cctv_no']: cctv['density'] for cctv in cctv_list})
+                return self.state.version != version
+
+            cctv_before = self.cctv_list
+            heatmap_data = self.generate_heatmap_with_idw(cctv_list, save=False)
+            if not heatmap_data:
+                self.cctv_list = cctv_before
+                return False
+            self.begin_update()
+            self.heatmap_data = heatmap_data
+            self.build_density_grid()
+            self.apply_density_weights()
+            self.publish()
+            print(f"[M2] Heatmap and weights rebuilt (v{self.state.version}).")
+            return True
+
+    def start_refresher(self, interval: float):
+        """Runs refresh_densities every `interval` seconds in a daemon thread (interval <= 0: disabled)."""
+        if interval <= 0 or (self._refresher is not None and self._refresher.is_alive()):
+            return
+        self._refresh_stop.clear()
+
+        def run():
+            while not self._refresh_stop.wait(interval):
+                try:
+                    self.refresh_densities()
+                except Exception as e:
+                    print(f"[M2] Density refresh error: {e}")
+
+        self._refresher = threading.Thread(target=run, name="m2-density-refresh", daemon=True)
+        self._refresher.start()
+        print(f"[M2] Density refresher started (every {interval}s).")
+
+    def stop_refresher(self):
+        self._refresh_stop.set()
+
+    def load_graph(self, rebuild: bool = False):
+        """
+        Loads the raw graph from the persistent artifact (m2/data/cache/graph.pkl) and applies
+        density weights. Missing/stale artifacts are rebuilt from the bundled Overpass cache.
+        """
         print("[M2] Loading OSM Graph...")
         try:
-            # Gwangalli Beach Center
-            self.G = ox.graph_from_point((35.1532, 129.1186), dist=3000, network_type='drive')
+            self.G = self.graph_store.load(rebuild=rebuild)
             if self.heatmap_data:
                 self.apply_density_weights()
             else:
@@ -197,46 +300,30 @@ class M2Service:
         except Exception as e:
             print(f"[M2] Error loading graph: {e}")
 
-    def find_shortest_path(self, origin_lat, origin_lng, dest_lat, dest_lng):
-        if self.G is None:
+    def find_shortest_path(self, origin_lat, origin_lng, dest_lat, dest_lng, state: Optional[RoutingState] = None):
+        # One snapshot for the whole search (a refresh may publish a new state meanwhile)
+        state = state or self.state
+        if state is None or state.G is None:
             raise Exception("Graph not initialized")
+        G = state.G
 
-        orig_node = ox.distance.nearest_nodes(self.G, origin_lng, origin_lat)
-        dest_node = ox.distance.nearest_nodes(self.G, dest_lng, dest_lat)
-
-        def improved_heuristic(u, v):
-            u_node = self.G.nodes[u]
-            v_node = self.G.nodes[v]
-            dx = u_node['x'] - v_node['x']
-            dy = u_node['y'] - v_node['y']
-            dist = math.sqrt(dx**2 + dy**2)
-            
-            penalty_multiplier = 1.0
-            for t in [0.3, 0.6]:
-                sample_lat = u_node['y'] + dy * t
-                sample_lon = u_node['x'] + dx * t
-                key = (round(sample_lat, 3), round(sample_lon, 3))
-                density = self.density_grid.get(key, 0)
-                if density > 80:
-                    penalty_multiplier += 5.0
-                    break
-                elif density > 40:
-                    penalty_multiplier += 2.0
-            
-            return dist * penalty_multiplier * 100000
+        orig_node = ox.distance.nearest_nodes(G, origin_lng, origin_lat)
+        dest_node = ox.distance.nearest_nodes(G, dest_lng, dest_lat)
 
-        path_nodes = nx.astar_path(self.G, orig_node, dest_node, heuristic=improved_heuristic, weight='weight')
+        # ALT lower bound (admissible): A* returns the least-cost route under the density weights
+        heuristic = state.landmarks.heuristic(dest_node) if state.landmarks is not None else None
+        path_nodes = nx.astar_path(G, orig_node, dest_node, heuristic=heuristic, weight='weight')
         
         path_coords = []
         for node_id in path_nodes:
-            node = self.G.nodes[node_id]
+            node = G.nodes[node_id]
             path_coords.append({"lat": node['y'], "lng": node['x']})
             
         total_dist = 0
         for i in range(len(path_nodes)-1):
             u = path_nodes[i]
             v = path_nodes[i+1]
-            edge_data = self.G.get_edge_data(u, v)
+            edge_data = G.get_edge_data(u, v)
             min_w = float('inf')
             len_val = 0
             # MultiDiGraph may have multiple edges between nodes
@@ -258,5 +345,5 @@ class M2Service:
         return self.loader.load_cctv_data()
 
     def get_heatmap_list(self):
-        return self.heatmap_data
+        return self.state.heatmap_data if self.state is not None else []
 
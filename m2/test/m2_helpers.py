@@ -0,0 +1,69 @@
+"""
+m2 테스트 공용 도구 (DB 없이 CSV + 번들된 Overpass 캐시 사용)
+
+    from m2_helpers import make_service, make_published_service, timed
+"""
+import sys
+import os
+import time
+import functools
+
+# 현재 디렉토리(.../package/m2/test)의 상위 상위 디렉토리(.../package)를 path에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+m2_dir = os.path.dirname(current_dir)      # .../package/m2
+package_dir = os.path.dirname(m2_dir)      # .../package
+if package_dir not in sys.path:
+    sys.path.append(package_dir)
+
+from m2.service import M2Service
+from m2.graph_store import GraphStore, DEFAULT_CACHE_DIR
+
+HEATMAP_PATH = os.path.join(m2_dir, "data", "heatmap.csv")
+
+@functools.lru_cache(maxsize=1)
+def _raw_graph():
+    return GraphStore(DEFAULT_CACHE_DIR).build()
+
+def raw_graph():
+    """번들된 Overpass 캐시(m2/cache)로 만든 원본 그래프 (테스트마다 복사본)"""
+    return _raw_graph().copy()
+
+def make_service(heatmap=False, graph=False):
+    """
+    DB 없이 CSV만 사용하고 heatmap.csv를 덮어쓰지 않는 서비스 (initialize 생략)
+    heatmap=True: heatmap.csv 로드, graph=True: 원본 그래프 (가중치 미적용)
+    """
+    service = M2Service(initialize=False)
+    service.loader.supabase = None
+    service.loader.save_heatmap_csv = lambda data: None
+    if heatmap:
+        service.heatmap_data = service.loader.load_heatmap_csv()
+    if graph:
+        service.G = raw_graph()
+    return service
+
+def make_published_service():
+    """IDW 히트맵 + 밀집도 가중치를 적용한 그래프를 게시(publish)한 서비스"""
+    service = make_service(graph=True)
+    service.heatmap_data = service.generate_heatmap_with_idw()
+    service.build_density_grid()
+    service.apply_density_weights()
+    service.publish()
+    return service
+
+def edge_weights(G):
+    return {(u, v, k): data['weight'] for u, v, k, data in G.edges(keys=True, data=True)}
+
+def timed(func, *args, repeat=3):
+    """func(*args)를 repeat번 실행하여 (결과, 가장 짧은 실행 시간)을 반환합니다."""
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - t0)
+    return result, best
+
+def check_speedup(new_sec, old_sec):
+    """BENCH_ASSERT=1 일 때만 속도 개선을 검사합니다. (부하가 있는 CI에서 시간 비교는 불안정)"""
+    if os.getenv("BENCH_ASSERT") == "1":
+        assert new_sec < old_sec
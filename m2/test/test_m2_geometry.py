@@ -0,0 +1,51 @@
+import sys
+import os
+import time
+import numpy as np
+
+# 현재 디렉토리(.../package/m2/test)의 상위 상위 디렉토리(.../package)를 path에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+package_dir = os.path.dirname(os.path.dirname(current_dir))
+sys.path.append(package_dir)
+
+from m2.loader import DataLoader
+from m2.geometry import SECTION_NAMES, WHOLE_SECTION, points_in_polygon
+from m2.idw import hex_grid
+
+def test_sections_load_on_first_use():
+    loader = DataLoader()
+    # 서비스가 사용하는 whole_section만 읽음
+    assert loader.sections.sections == {}
+    assert loader.get_whole_poly() == loader.sections.polygon(WHOLE_SECTION)
+    assert list(loader.sections.sections) == [WHOLE_SECTION]
+    assert loader.sections.polygon("없는구역") == []
+
+def test_points_in_polygon_matches_ray_casting():
+    loader = DataLoader()
+    lat, lon = hex_grid()
+
+    for name in SECTION_NAMES:
+        poly = loader.sections.polygon(name)
+        assert poly, f"{name}.json not loaded"
+
+        # 격자 중심 + 꼭짓점/변 중점 (경계 위의 점도 기존 구현과 같은 결과여야 함)
+        vertices = np.asarray(poly)
+        edges = (vertices + np.roll(vertices, 1, axis=0)) / 2
+        xs = np.concatenate([lon, vertices[:, 0], edges[:, 0]])
+        ys = np.concatenate([lat, vertices[:, 1], edges[:, 1]])
+
+        t0 = time.perf_counter()
+        expected = np.array([loader.is_inside(x, y, poly) for x, y in zip(xs.tolist(), ys.tolist())])
+        loop_sec = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        actual = points_in_polygon(xs, ys, poly)
+        vector_sec = time.perf_counter() - t0
+
+        print(f"[Test] {name}: inside {int(actual.sum())} / {len(xs)} "
+              f"(loop {loop_sec * 1000:.1f} ms / vectorized {vector_sec * 1000:.2f} ms)")
+        assert (actual == expected).all()
+
+if __name__ == "__main__":
+    test_sections_load_on_first_use()
+    test_points_in_polygon_matches_ray_casting()
+    print("[Success] 벡터화된 포함 판정이 기존 구현과 동일합니다.")
@@ -0,0 +1,112 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+
+# 현재 디렉토리(.../package/m2/test)의 상위 상위 디렉토리(.../package)를 path에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+m2_dir = os.path.dirname(current_dir)      # .../package/m2
+package_dir = os.path.dirname(m2_dir)      # .../package
+sys.path.append(current_dir)
+sys.path.append(package_dir)
+
+from m2.graph_store import TOPOLOGY_KEY, GraphStore, library_versions
+from m2_helpers import raw_graph
+
+def make_store(work_dir):
+    """번들 캐시로 만든 그래프를 돌려주고 build 횟수를 세는 GraphStore"""
+    store = GraphStore(work_dir)
+    store.builds = 0
+
+    def build(online=False):
+        store.builds += 1
+        return raw_graph()
+    store.build = build
+    return store
+
+def same_graph(a, b):
+    return (
+        a.graph[TOPOLOGY_KEY] == b.graph[TOPOLOGY_KEY]
+        and sorted(a.nodes) == sorted(b.nodes)
+        and list(a.edges(keys=True, data="length")) == list(b.edges(keys=True, data="length"))
+    )
+
+def test_build_then_load_unchanged():
+    work_dir = tempfile.mkdtemp(prefix="m2_graph_")
+    try:
+        store = make_store(work_dir)
+        built = store.load()
+        assert store.builds == 1
+        meta = store.read_meta()
+        print(f"[Test] 저장: {meta['nodes']} nodes / {meta['edges']} edges, sha256 {meta['sha256'][:12]}")
+        assert store.stale_reason(meta) is None
+        assert meta["versions"] == library_versions()
+
+        # 다시 불러오면 build 없이 같은 그래프
+        loaded = make_store(work_dir).load()
+        assert same_graph(loaded, built)
+        assert (meta["nodes"], meta["edges"]) == (loaded.number_of_nodes(), loaded.number_of_edges())
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def test_corrupted_pickle_fails_checksum_and_rebuilds():
+    work_dir = tempfile.mkdtemp(prefix="m2_graph_")
+    try:
+        store = make_store(work_dir)
+        store.load()
+        sha = store.read_meta()["sha256"]
+
+        # 파일 중간 1바이트 변경 -> sha256 불일치 -> pickle.load 없이 다시 생성
+        with open(store.graph_path, "r+b") as f:
+            f.seek(os.path.getsize(store.graph_path) // 2)
+            byte = f.read(1)
+            f.seek(-1, os.SEEK_CUR)
+            f.write(bytes([byte[0] ^ 0xFF]))
+        assert store.stale_reason(store.read_meta()) == "checksum mismatch"
+
+        store = make_store(work_dir)
+        G = store.load()
+        assert store.builds == 1
+        assert store.stale_reason(store.read_meta()) is None
+        assert store.read_meta()["sha256"] == sha
+        assert same_graph(G, raw_graph())
+
+        # 잘린 파일도 같음
+        with open(store.graph_path, "r+b") as f:
+            f.truncate(100)
+        store = make_store(work_dir)
+        store.load()
+        assert store.builds == 1
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def test_library_version_mismatch_rebuilds():
+    work_dir = tempfile.mkdtemp(prefix="m2_graph_")
+    try:
+        make_store(work_dir).load()
+
+        # 다른 osmnx 버전으로 저장된 파일 (pickle 호환을 보장할 수 없음)
+        store = make_store(work_dir)
+        meta = store.read_meta()
+        meta["versions"] = dict(meta["versions"], osmnx="0.0.1")
+        with open(store.meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        assert store.stale_reason(store.read_meta()).startswith("library versions changed")
+
+        store.load()
+        assert store.builds == 1
+        assert store.read_meta()["versions"] == library_versions()
+
+        # 그 다음에는 다시 만들지 않음
+        store = make_store(work_dir)
+        store.load()
+        assert store.builds == 0
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_build_then_load_unchanged()
+    test_corrupted_pickle_fails_checksum_and_rebuilds()
+    test_library_version_mismatch_rebuilds()
+    print("[Success] 그래프 파일 재사용 / 손상 시 재생성 / 라이브러리 버전 변경 시 재생성")
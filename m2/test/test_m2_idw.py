@@ -0,0 +1,110 @@
+import sys
+import os
+import io
+import math
+import time
+import numpy as np
+import pandas as pd
+
+# 현재 디렉토리(.../package/m2/test)의 상위 상위 디렉토리(.../package)를 path에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+m2_dir = os.path.dirname(current_dir)      # .../package/m2
+package_dir = os.path.dirname(m2_dir)      # .../package
+sys.path.append(current_dir)
+sys.path.append(package_dir)
+
+from m2.idw import IDWWeights
+from m2_helpers import HEATMAP_PATH, check_speedup, make_service, timed
+
+# 정수 밀집도 조합 (모두 같은 값 n -> 모든 셀 n, 0 포함)
+MIXTURE_VALUES = (0, 1, 3, 7, 10, 29, 100, 12345)
+
+def legacy_generate_heatmap(service):
+    """변경 전 셀 x CCTV 이중 루프 구현 (비교용)"""
+    cctv_list = service.loader.load_cctv_data()
+    whole_poly = service.loader.get_whole_poly()
+    center_lat = 35.1524
+    center_lon = 129.1193
+    hex_radius = 0.0003
+    lon_scale = 1.216
+    lat_step = 1.5 * hex_radius
+    lon_step = math.sqrt(3) * hex_radius * lon_scale
+    POWER = 2
+
+    final_data = []
+    for r in range(-80, 80):
+        for c in range(-80, 80):
+            offset_x = (lon_step / 2.0) if (r % 2 != 0) else 0.0
+            lat = center_lat + (r * lat_step)
+            lon = center_lon + (c * lon_step) + offset_x
+            if not service.loader.is_inside(lon, lat, whole_poly):
+                continue
+
+            numerator = 0.0
+            denominator = 0.0
+            interpolated_density = 0
+            exact_match = False
+            for cctv in cctv_list:
+                dist = service.calculate_distance(lat, lon, cctv['lat'], cctv['lon'])
+                if dist < 66:
+                    interpolated_density = cctv['density']
+                    exact_match = True
+                    break
+                weight = 1.0 / (pow(dist, POWER) + 1e-6)
+                numerator += weight * cctv['density']
+                denominator += weight
+            if not exact_match:
+                interpolated_density = numerator / denominator if denominator > 0 else 0
+
+            final_data.append({"lat": round(lat, 7), "lon": round(lon, 7), "density": int(interpolated_density)})
+    return final_data
+
+def to_csv(data):
+    buffer = io.StringIO()
+    pd.DataFrame(data).to_csv(buffer, index=False)
+    return buffer.getvalue()
+
+def test_vectorized_idw_matches_legacy():
+    service = make_service()
+
+    legacy, legacy_sec = timed(legacy_generate_heatmap, service)
+    vectorized, vector_sec = timed(service.generate_heatmap_with_idw)
+
+    print(f"[Test] 히트맵 셀: {len(vectorized)}개")
+    print(f"[Time] loop: {legacy_sec * 1000:.1f} ms / vectorized: {vector_sec * 1000:.1f} ms "
+          f"(x{legacy_sec / vector_sec:.1f})")
+
+    assert vectorized == legacy
+    assert to_csv(vectorized) == to_csv(legacy)
+    with open(HEATMAP_PATH, encoding="utf-8") as f:
+        assert to_csv(vectorized).splitlines() == f.read().splitlines()
+    check_speedup(vector_sec, legacy_sec)
+
+def test_integer_mixtures_are_not_truncated():
+    service = make_service()
+    cctv_list = service.loader.load_cctv_data()
+    lat, lon = service.get_grid_cells()
+    weights = IDWWeights.build(
+        lat, lon, [c['cctv_no'] for c in cctv_list], [c['lat'] for c in cctv_list], [c['lon'] for c in cctv_list],
+    )
+    # 변경 전: 정규화된 행렬 @ 밀집도 -> 같은 값 n만 섞여도 n - ulp가 n-1로 잘림
+    normalized = weights.matrix / weights.row_sums[:, None]
+
+    for n in MIXTURE_VALUES:
+        densities = np.full(len(cctv_list), n)
+        cells = weights.interpolate(densities)
+        truncated = int(((normalized @ densities.astype(np.float64)).astype(np.int64) != n).sum())
+        print(f"[Test] 모든 CCTV 밀집도 {n}: 셀 {len(cells)}개 (정규화 후 곱셈 시 n-1로 잘린 셀 {truncated}개)")
+        assert (cells == n).all()
+
+    # 두 값만 섞인 경우: 각 셀은 두 값 사이, 한쪽만 가까운 셀(one-hot)은 그 값
+    densities = np.where(np.arange(len(cctv_list)) % 2 == 0, 4, 9)
+    cells = weights.interpolate(densities)
+    assert ((cells >= 4) & (cells <= 9)).all()
+    exact = weights.row_sums == 1.0
+    assert (cells[exact] == (weights.matrix[exact] @ densities)).all()
+
+if __name__ == "__main__":
+    test_vectorized_idw_matches_legacy()
+    test_integer_mixtures_are_not_truncated()
+    print("[Success] 변경 전/후 heatmap.csv가 동일합니다.")
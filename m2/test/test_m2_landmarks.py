@@ -0,0 +1,98 @@
+import sys
+import os
+import math
+import time
+import random
+import networkx as nx
+
+# 현재 디렉토리(.../package/m2/test)의 상위 상위 디렉토리(.../package)를 path에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+m2_dir = os.path.dirname(current_dir)      # .../package/m2
+package_dir = os.path.dirname(m2_dir)      # .../package
+sys.path.append(current_dir)
+sys.path.append(package_dir)
+
+from m2_helpers import make_published_service
+
+QUERY_COUNT = 30
+
+def legacy_heuristic(G, density_grid):
+    """변경 전 improved_heuristic (밀집도 격자 조회 x 100000, 비교용)"""
+    def improved_heuristic(u, v):
+        u_node = G.nodes[u]
+        v_node = G.nodes[v]
+        dx = u_node['x'] - v_node['x']
+        dy = u_node['y'] - v_node['y']
+        dist = math.sqrt(dx**2 + dy**2)
+
+        penalty_multiplier = 1.0
+        for t in [0.3, 0.6]:
+            sample_lat = u_node['y'] + dy * t
+            sample_lon = u_node['x'] + dx * t
+            key = (round(sample_lat, 3), round(sample_lon, 3))
+            density = density_grid.get(key, 0)
+            if density > 80:
+                penalty_multiplier += 5.0
+                break
+            elif density > 40:
+                penalty_multiplier += 2.0
+
+        return dist * penalty_multiplier * 100000
+    return improved_heuristic
+
+def path_cost(G, path):
+    return sum(min(data['weight'] for data in G.get_edge_data(u, v).values()) for u, v in zip(path[:-1], path[1:]))
+
+def random_queries(G, count, seed=0):
+    nodes = list(max(nx.strongly_connected_components(G), key=len))
+    rng = random.Random(seed)
+    return [tuple(rng.sample(nodes, 2)) for _ in range(count)]
+
+def test_lower_bounds_are_admissible():
+    service = make_published_service()
+    state = service.state
+    for target in random_queries(state.G, 5, seed=1):
+        target = target[1]
+        bounds = state.landmarks.lower_bounds(target)
+        # 모든 노드 -> target 실제 최소 비용 (역방향 Dijkstra)
+        exact = nx.single_source_dijkstra_path_length(state.G.reverse(copy=False), target, weight='weight')
+        for node, bound in zip(state.landmarks.nodes, bounds.tolist()):
+            assert bound <= exact.get(node, math.inf) * (1 + 1e-9) + 1e-6
+
+def test_alt_routes_are_least_cost():
+    service = make_published_service()
+    state = service.state
+    G = state.G
+    queries = random_queries(G, QUERY_COUNT)
+
+    legacy_costs, alt_costs, exact_costs = [], [], []
+    t0 = time.perf_counter()
+    for source, target in queries:
+        path = nx.astar_path(G, source, target, heuristic=legacy_heuristic(G, state.density_grid), weight='weight')
+        legacy_costs.append(path_cost(G, path))
+    legacy_sec = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for source, target in queries:
+        path = nx.astar_path(G, source, target, heuristic=state.landmarks.heuristic(target), weight='weight')
+        alt_costs.append(path_cost(G, path))
+    alt_sec = time.perf_counter() - t0
+
+    for source, target in queries:
+        exact_costs.append(nx.dijkstra_path_length(G, source, target, weight='weight'))
+
+    worse = sum(legacy > exact * (1 + 1e-9) for legacy, exact in zip(legacy_costs, exact_costs))
+    print(f"[Test] 경로 {len(queries)}개: 기존 휴리스틱이 최소 비용보다 비싼 경로 {worse}개")
+    print(f"[Time] legacy: {legacy_sec * 1000:.1f} ms / ALT: {alt_sec * 1000:.1f} ms")
+
+    for alt, exact in zip(alt_costs, exact_costs):
+        assert math.isclose(alt, exact, rel_tol=1e-9)
+
+    # find_shortest_path도 같은 상태의 ALT 휴리스틱 사용
+    path, dist, duration = service.find_shortest_path(35.1532, 129.1186, 35.16, 129.13)
+    assert len(path) > 1 and dist > 0
+
+if __name__ == "__main__":
+    test_lower_bounds_are_admissible()
+    test_alt_routes_are_least_cost()
+    print("[Success] ALT 경로가 Dijkstra 최소 비용과 같습니다.")
@@ -0,0 +1,201 @@
+import sys
+import os
+import time
+import threading
+import networkx as nx
+
+# 현재 디렉토리(.../package/m2/test)의 상위 상위 디렉토리(.../package)를 path에 추가
+current_dir = os.path.dirname(os.path.abspath(__file__))
+m2_dir = os.path.dirname(current_dir)      # .../package/m2
+package_dir = os.path.dirname(m2_dir)      # .../package
+sys.path.append(current_dir)
+sys.path.append(package_dir)
+
+from m2_helpers import check_speedup, edge_weights, make_published_service, make_service
+
+TEST_ROUTE = (35.1532, 129.1186, 35.16, 129.13)
+
+def legacy_apply_density_weights(service):
+    """변경 전 edge x 샘플 점 x 히트맵 점 루프 구현 (비교용)"""
+    G = service.G
+    for u, v, k, data in G.edges(keys=True, data=True):
+        check_points = []
+        node_u = G.nodes[u]
+        node_v = G.nodes[v]
+        if 'geometry' in data:
+            for lon, lat in list(data['geometry'].coords):
+                check_points.append((lat, lon))
+        else:
+            check_points.append((node_u['y'], node_u['x']))
+            check_points.append((node_v['y'], node_v['x']))
+            check_points.append(((node_u['y'] + node_v['y']) / 2, (node_u['x'] + node_v['x']) / 2))
+            if data.get('length', 0) > 50:
+                check_points.append((node_u['y']*0.75 + node_v['y']*0.25, node_u['x']*0.75 + node_v['x']*0.25))
+                check_points.append((node_u['y']*0.25 + node_v['y']*0.75, node_u['x']*0.25 + node_v['x']*0.75))
+
+        base_weight = data.get('length', 1.0)
+        max_density = 0
+        for lat, lon in check_points:
+            for point in service.heatmap_data:
+                if abs(point['lat'] - lat) > 0.001 or abs(point['lon'] - lon) > 0.001:
+                    continue
+                dist = service.calculate_distance(lat, lon, point['lat'], point['lon'])
+                if dist < 40 and point['density'] > max_density:
+                    max_density = point['density']
+            if max_density >= 80:
+                break
+
+        penalty_factor = 1.0
+        if max_density >= 80:
+            penalty_factor = 10000.0
+        elif max_density >= 50:
+            penalty_factor = 1.3
+        data['weight'] = base_weight * penalty_factor
+
+def test_kdtree_weights_match_legacy():
+    service = make_service(heatmap=True, graph=True)
+
+    t0 = time.perf_counter()
+    legacy_apply_density_weights(service)
+    legacy_sec = time.perf_counter() - t0
+    legacy = edge_weights(service.G)
+
+    t0 = time.perf_counter()
+    service.apply_density_weights()
+    vector_sec = time.perf_counter() - t0
+
+    penalized = sum(w != service.G.edges[key]['length'] for key, w in legacy.items())
+    print(f"[Test] edge: {len(legacy)}개, 밀집도 가중치 적용 edge: {penalized}개")
+    print(f"[Time] loop: {legacy_sec * 1000:.1f} ms / kd-tree: {vector_sec * 1000:.1f} ms (x{legacy_sec / vector_sec:.1f})")
+
+    assert edge_weights(service.G) == legacy
+    check_speedup(vector_sec, legacy_sec)
+
+def test_incremental_reweight_matches_full():
+    service = make_published_service()
+    before = service.state
+    before_weights = edge_weights(before.G)
+
+    # CCTV 3개의 밀집도만 바뀐 상황
+    changes = {cctv['cctv_no']: (100 - cctv['density']) for cctv in service.cctv_list[:3]}
+    t0 = time.perf_counter()
+    reweighted = service.update_cctv_densities(changes)
+    incremental_sec = time.perf_counter() - t0
+    incremental = edge_weights(service.state.G)
+
+    # 같은 밀집도로 전체 재계산
+    t0 = time.perf_counter()
+    service.begin_update()
+    service.apply_density_weights()
+    full_sec = time.perf_counter() - t0
+
+    print(f"[Test] 변경 CCTV {len(changes)}개 -> edge {reweighted}개 재계산 "
+          f"(incremental {incremental_sec * 1000:.1f} ms / full {full_sec * 1000:.1f} ms)")
+    assert reweighted > 0
+    assert incremental == edge_weights(service.G)
+    # 이전 상태(계산 중인 요청이 보는 그래프)는 그대로
+    assert service.state.version == before.version + 1
+    assert edge_weights(before.G) == before_weights
+    assert incremental != before_weights
+
+def test_refresh_publishes_new_state():
+    service = make_published_service()
+    before = service.state
+    before_weights = edge_weights(before.G)
+    before_cctv = service.cctv_list
+    before_densities = [cctv['density'] for cctv in before_cctv]
+    saved = []
+    service.loader.save_heatmap_csv = saved.append
+
+    # DB에서 새 밀집도를 가져온 상황
+    latest = [dict(cctv, density=100 - cctv['density']) for cctv in service.cctv_list]
+    service.loader.load_cctv_data = lambda: [dict(cctv) for cctv in latest]
+    assert service.refresh_densities()
+    assert not service.refresh_densities()      # 바뀐 값이 없으면 그대로
+
+    after = service.state
+    assert after.version == before.version + 1 and after.updated_at >= before.updated_at
+    assert edge_weights(before.G) == before_weights
+    assert [p['density'] for p in after.heatmap_data] != [p['density'] for p in before.heatmap_data]
+    # 이전 CCTV 목록은 수정하지 않고 새 목록으로 교체
+    assert service.cctv_list is not before_cctv
+    assert [cctv['density'] for cctv in before_cctv] == before_densities
+
+    # CCTV 구성이 바뀌면 복사본에서 전체 재계산
+    service.loader.load_cctv_data = lambda: [dict(cctv) for cctv in latest[1:]]
+    assert service.refresh_densities()
+    assert service.state.version == after.version + 1
+    assert service.state.G is not after.G and len(service.cctv_list) == len(latest) - 1
+    path, dist, duration = service.find_shortest_path(*TEST_ROUTE, state=before)
+    assert len(path) > 1 and dist > 0
+    # 백그라운드 갱신은 heatmap.csv를 다시 쓰지 않음
+    assert saved == []
+
+def test_state_swap_during_route():
+    service = make_published_service()
+    before = service.state
+    before_weights = edge_weights(before.G)
+    expected = service.find_shortest_path(*TEST_ROUTE)
+
+    # 모든 CCTV가 혼잡해진 상황
+    latest = [dict(cctv, density=100) for cctv in service.cctv_list]
+    service.loader.load_cctv_data = lambda: [dict(cctv) for cctv in latest]
+
+    # A* 탐색 시작 직전에 다른 스레드에서 갱신이 끝나 새 상태가 게시되도록 함
+    astar_path = nx.astar_path
+    swapped = []
+
+    def astar_during_refresh(G, *args, **kwargs):
+        if not swapped:
+            refresher = threading.Thread(target=lambda: swapped.append(service.refresh_densities()))
+            refresher.start()
+            refresher.join()
+        return astar_path(G, *args, **kwargs)
+
+    nx.astar_path = astar_during_refresh
+    try:
+        result = service.find_shortest_path(*TEST_ROUTE)
+    finally:
+        nx.astar_path = astar_path
+
+    print(f"[Test] 탐색 중 상태 교체: v{before.version} -> v{service.state.version}, 경로 {len(result[0])}점")
+    assert swapped == [True]
+    assert service.state.version == before.version + 1
+    # 탐색은 시작 시점의 상태(이전 가중치)를 끝까지 사용
+    assert result == expected
+    assert edge_weights(before.G) == before_weights
+    assert edge_weights(service.state.G) != before_weights
+    assert service.find_shortest_path(*TEST_ROUTE, state=before) == expected
+
+    # 갱신과 경로 요청을 동시에 반복해도 각 요청은 한 상태의 결과
+    states = {}
+    errors = []
+
+    def route():
+        for _ in range(5):
+            state = service.state
+            try:
+                states.setdefault(state.version, (state, []))[1].append(service.find_shortest_path(*TEST_ROUTE, state=state))
+            except Exception as e:
+                errors.append(e)
+
+    def refresh():
+        for density in (10, 90, 60):
+            latest[:] = [dict(cctv, density=density) for cctv in latest]
+            service.refresh_densities()
+
+    threads = [threading.Thread(target=route) for _ in range(3)] + [threading.Thread(target=refresh)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    for version, (state, results) in states.items():
+        assert all(r == service.find_shortest_path(*TEST_ROUTE, state=state) for r in results)
+
+if __name__ == "__main__":
+    test_kdtree_weights_match_legacy()
+    test_incremental_reweight_matches_full()
+    test_refresh_publishes_new_state()
+    test_state_swap_during_route()
+    print("[Success] 변경 전/후 edge weight가 동일합니다.")
@@ -0,0 +1,149 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+from .idw import EARTH_RADIUS_M, haversine
+from .graph_store import TOPOLOGY_KEY
+
+DENSITY_RADIUS_M = 40       # 이 거리 안의 히트맵 점 밀집도를 edge에 반영
+HIGH_DENSITY = 80
+MID_DENSITY = 50
+HIGH_PENALTY = 10000.0
+MID_PENALTY = 1.3
+QUARTER_POINTS_MIN_LENGTH = 50
+
+
+def to_unit_xyz(lat, lon) -> np.ndarray:
+    """lat/lon (deg) -> points on the unit sphere, so chord length is monotonic in great-circle distance"""
+    phi = np.radians(np.asarray(lat, dtype=np.float64))
+    lam = np.radians(np.asarray(lon, dtype=np.float64))
+    return np.column_stack([np.cos(phi) * np.cos(lam), np.cos(phi) * np.sin(lam), np.sin(phi)])
+
+def edge_sample_points(G):
+    """
+    Sample points of every edge in G.edges(keys=True) order.
+    - edge with geometry: all geometry coordinates
+    - otherwise: u, v, midpoint (+ quarter points if length > 50)
+    Returns (edges, edge_idx, lat, lon): edges[i] = (u, v, k), edge_idx[j] = edge of sample point j
+    """
+    edges, edge_idx, lats, lons = [], [], [], []
+    plain = []
+    for i, (u, v, k, data) in enumerate(G.edges(keys=True, data=True)):
+        edges.append((u, v, k))
+        if 'geometry' in data:
+            coords = np.asarray(data['geometry'].coords, dtype=np.float64)
+            edge_idx.append(np.full(len(coords), i))
+            lats.append(coords[:, 1])
+            lons.append(coords[:, 0])
+        else:
+            plain.append((i, u, v, data.get('length', 0) > QUARTER_POINTS_MIN_LENGTH))
+
+    if plain:
+        idx = np.array([p[0] for p in plain])
+        uy = np.array([G.nodes[p[1]]['y'] for p in plain])
+        ux = np.array([G.nodes[p[1]]['x'] for p in plain])
+        vy = np.array([G.nodes[p[2]]['y'] for p in plain])
+        vx = np.array([G.nodes[p[2]]['x'] for p in plain])
+        long_edge = np.array([p[3] for p in plain], dtype=bool)
+
+        edge_idx += [idx, idx, idx, idx[long_edge], idx[long_edge]]
+        lats += [uy, vy, (uy + vy) / 2, (uy * 0.75 + vy * 0.25)[long_edge], (uy * 0.25 + vy * 0.75)[long_edge]]
+        lons += [ux, vx, (ux + vx) / 2, (ux * 0.75 + vx * 0.25)[long_edge], (ux * 0.25 + vx * 0.75)[long_edge]]
+
+    if not edge_idx:
+        return edges, np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0)
+    return edges, np.concatenate(edge_idx).astype(np.int64), np.concatenate(lats), np.concatenate(lons)
+
+def points_within(lat, lon, ref_lat, ref_lon, radius_m=DENSITY_RADIUS_M):
+    """
+    All (point, reference point) pairs closer than radius_m (haversine, strict <).
+    KD-tree on unit-sphere coordinates finds the candidates, the exact haversine distance decides.
+    """
+    if len(lat) == 0 or len(ref_lat) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    # 현(chord) 길이 반경 + 여유분으로 후보를 찾고, 정확한 판정은 haversine으로
+    chord = 2 * np.sin(radius_m / (2 * EARTH_RADIUS_M)) * (1 + 1e-6)
+    tree = cKDTree(to_unit_xyz(ref_lat, ref_lon))
+    pairs = cKDTree(to_unit_xyz(lat, lon)).sparse_distance_matrix(tree, chord, output_type="ndarray")
+    i = pairs["i"].astype(np.int64)
+    j = pairs["j"].astype(np.int64)
+
+    dist = haversine(np.asarray(lat)[i], np.asarray(lon)[i], np.asarray(ref_lat)[j], np.asarray(ref_lon)[j])
+    keep = dist < radius_m
+    return i[keep], j[keep]
+
+def penalty_factors(max_density) -> np.ndarray:
+    max_density = np.asarray(max_density)
+    return np.select(
+        [max_density >= HIGH_DENSITY, max_density >= MID_DENSITY],
+        [HIGH_PENALTY, MID_PENALTY],
+        default=1.0,
+    )
+
+def _ranges(starts, counts) -> np.ndarray:
+    """Concatenation of arange(starts[i], starts[i] + counts[i])"""
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.cumsum(counts) - counts
+    return np.repeat(starts - offsets, counts) + np.arange(total)
+
+
+class DensityIndex:
+    """
+    Inverted index between heatmap cells and graph edges.
+    An edge is linked to every cell within DENSITY_RADIUS_M of one of its sample points, so the
+    max density of an edge only depends on its linked cells. When a few cells change, only the
+    edges linked to them need a new weight.
+    """
+
+    def __init__(self, G, heat_lat, heat_lon):
+        self.topology = G.graph.get(TOPOLOGY_KEY)
+        self.heat_lat = np.asarray(heat_lat, dtype=np.float64)
+        self.heat_lon = np.asarray(heat_lon, dtype=np.float64)
+        self.edges, edge_idx, lat, lon = edge_sample_points(G)
+
+        sample, cell = points_within(lat, lon, self.heat_lat, self.heat_lon)
+        pairs = np.unique(np.column_stack([edge_idx[sample], cell]), axis=0)
+        if len(pairs) == 0:
+            pairs = np.zeros((0, 2), dtype=np.int64)
+
+        # edge -> cells (CSR, pairs are sorted by edge)
+        self.edge_ptr = np.searchsorted(pairs[:, 0], np.arange(len(self.edges) + 1))
+        self.edge_cells = pairs[:, 1]
+        # cell -> edges (CSR)
+        by_cell = pairs[np.lexsort((pairs[:, 0], pairs[:, 1]))]
+        self.cell_ptr = np.searchsorted(by_cell[:, 1], np.arange(len(self.heat_lat) + 1))
+        self.cell_edges = by_cell[:, 0]
+        print(f"[M2] Density index built: {len(self.edges)} edges / {len(self.heat_lat)} cells / {len(pairs)} links")
+
+    def matches(self, G, heat_lat, heat_lon) -> bool:
+        """Same edge set (G or a copy of it) and same cell positions"""
+        topology = G.graph.get(TOPOLOGY_KEY)
+        return (
+            topology is not None and topology == self.topology
+            and np.array_equal(self.heat_lat, heat_lat) and np.array_equal(self.heat_lon, heat_lon)
+        )
+
+    def edges_for_cells(self, cells) -> np.ndarray:
+        """Edge indices linked to any of the cells (sorted, unique)"""
+        cells = np.asarray(cells, dtype=np.int64)
+        starts = self.cell_ptr[cells]
+        return np.unique(self.cell_edges[_ranges(starts, self.cell_ptr[cells + 1] - starts)])
+
+    def max_density(self, densities, edge_ids=None) -> np.ndarray:
+        """Max linked cell density per edge (0 if none), for all edges or for edge_ids"""
+        densities = np.asarray(densities, dtype=np.int64)
+        if edge_ids is None:
+            edge_ids = np.arange(len(self.edges))
+        edge_ids = np.asarray(edge_ids, dtype=np.int64)
+
+        result = np.zeros(len(edge_ids), dtype=np.int64)
+        starts = self.edge_ptr[edge_ids]
+        counts = self.edge_ptr[edge_ids + 1] - starts
+        linked = np.flatnonzero(counts > 0)
+        if len(linked):
+            values = densities[self.edge_cells[_ranges(starts[linked], counts[linked])]]
+            offsets = np.cumsum(counts[linked]) - counts[linked]
+            result[linked] = np.maximum(np.maximum.reduceat(values, offsets), 0)
+        return result